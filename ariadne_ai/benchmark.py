@@ -0,0 +1,345 @@
+"""
+Benchmark harness measuring the end-to-end throughput of the evaluators.
+
+Each case loads a synthetic dataset from a JSON Lines file, evaluates it against a
+ReplayBackend with simulated latency, and publishes the logs and the performance report.
+No request leaves the machine, so the results measure the overhead of the framework
+itself: the loaders, the executor, the metrics and the publishers.
+"""
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Optional
+from .evaluators.rag.answer_relevance_evaluator import AnswerRelevanceEvaluator
+from .evaluators.rag.context_relevance_evaluator import ContextRelevanceEvaluator
+from .evaluators.rag.faithfulness_evaluator import FaithfulnessEvaluator
+from .evaluators.rag.rag_judge_evaluator import RagJudgeEvaluator
+from .evaluators.text_summarization.hallucination_evaluator import HallucinationEvaluator
+from .evaluators.text_summarization.informativeness_evaluator import (
+    InformativenessEvaluator,
+)
+from .evaluators.text_summarization.qag_evaluator import QAGEvaluator
+from .llms.completion_backend import ReplayBackend
+from .llms.instrumentation import percentile
+from .llms.rag.rag_judge import RagJudge
+from .llms.tokens import count_tokens
+from .llms.text_summarization.question_generator import QuestionGenerator
+from .loaders.rag_loader import RagLoader
+from .loaders.summarization_loader import SummarizationLoader
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Evaluator classes by name, with the kind of dataset they evaluate
+EVALUATORS = {
+    "faithfulness": (FaithfulnessEvaluator, "rag"),
+    "context_relevance": (ContextRelevanceEvaluator, "rag"),
+    "answer_relevance": (AnswerRelevanceEvaluator, "rag"),
+    "rag_judge": (RagJudgeEvaluator, "rag"),
+    "hallucination": (HallucinationEvaluator, "summarization"),
+    "informativeness": (InformativenessEvaluator, "summarization"),
+    "qag": (QAGEvaluator, "summarization"),
+}
+
+WORDS = (
+    "the company launched a new product in march revenue grew by ten percent while "
+    "costs remained stable analysts expect further growth next year according to the report"
+).split()
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def _text(rng: random.Random, n_sentences: int) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(n_sentences))
+
+
+def iter_dataset(kind: str, n_rows: int, seed: int = 0):
+    """
+    Yields a synthetic dataset of n_rows raw instances, for 'rag' or 'summarization'.
+    """
+    rng = random.Random(seed)
+    labels = ["faithful", "unfaithful", "partial"]
+    for _ in range(n_rows):
+        if kind == "rag":
+            yield {
+                "question": _sentence(rng, 8)[:-1] + "?",
+                "context": _text(rng, 6),
+                "answer": _text(rng, 2),
+                "label": rng.choice(labels),
+            }
+        else:
+            yield {
+                "document": _text(rng, 12),
+                "summary": _text(rng, 2),
+                "label": rng.choice(labels),
+            }
+
+
+def write_dataset(filename: str, kind: str, n_rows: int, seed: int = 0):
+    """
+    Writes a synthetic dataset to a JSON Lines file, one row at a time.
+    """
+    with open(filename, "w") as f:
+        for row in iter_dataset(kind, n_rows, seed):
+            f.write(json.dumps(row) + "\n")
+
+
+def synthetic_response(messages) -> str:
+    """
+    Returns a well-formed, deterministic response to any prompt of the evaluators.
+    Verdicts and answers are derived from the sum of the character codes of the end of
+    the prompt.
+    """
+    system_message = messages[0]["content"]
+    user_message = messages[-1]["content"]
+    seed = sum(ord(c) for c in user_message[-200:])
+    verdicts = ["Yes", "No"]
+    if system_message == QuestionGenerator.SYSTEM_MESSAGE:
+        n_questions = int(re.search(r"Generate (\d+) closed-ended", user_message).group(1))
+        return json.dumps(
+            {f"question {i + 1}": f"Is fact {i + 1} stated?" for i in range(n_questions)}
+        )
+    if "Questions:" in user_message:
+        keys = sorted(set(re.findall(r"question \d+", user_message)))
+        answers = ["Yes", "No", "Unknown"]
+        return json.dumps({key: answers[(seed + i) % 3] for i, key in enumerate(keys)})
+    if '"results"' in user_message:
+        ids = re.findall(r'"id": (\d+)', user_message)
+        return json.dumps({
+            "results": [
+                {"id": int(i), "verdict": verdicts[(seed + int(i)) % 2], "explanation": "Synthetic."}
+                for i in ids
+            ]
+        })
+    if system_message == RagJudge.SYSTEM_MESSAGE_TEMPLATE:
+        return json.dumps({
+            criterion: {"verdict": verdicts[(seed + i) % 2], "explanation": "Synthetic."}
+            for i, criterion in enumerate(RagJudge.CRITERIA)
+        })
+    return json.dumps({"verdict": verdicts[seed % 2], "explanation": "Synthetic."})
+
+
+class BenchmarkBackend(ReplayBackend):
+    """
+    ReplayBackend answering with synthetic responses, and counting the prompt tokens sent.
+    """
+
+    def __init__(self, latency: float = 0.05, latency_jitter: float = 0.02, seed: int = 0):
+        super().__init__(
+            respond=synthetic_response,
+            latency=latency,
+            latency_jitter=latency_jitter,
+            seed=seed,
+        )
+        self.n_requests = 0
+        self.prompt_tokens = 0
+        self._usage_lock = threading.Lock()
+
+    def _count(self, response):
+        with self._usage_lock:
+            self.n_requests = self.n_requests + 1
+            self.prompt_tokens = self.prompt_tokens + response["usage"]["prompt_tokens"]
+        return response
+
+    def complete(self, model, messages, temperature, max_tokens):
+        return self._count(super().complete(model, messages, temperature, max_tokens))
+
+    async def acomplete(self, model, messages, temperature, max_tokens):
+        return self._count(
+            await super().acomplete(model, messages, temperature, max_tokens)
+        )
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """
+    Returns the peak resident set size of the process, in megabytes, or None where the
+    resource module is not available.
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak_rss / (1024 * 1024)
+    return peak_rss / 1024
+
+
+def _time_llm_evaluations(evaluator, latencies: list):
+    """
+    Wraps the LLM evaluation methods of an evaluator to record the latency of each instance.
+    """
+    run_llm_evaluation = evaluator._run_llm_evaluation
+    arun_llm_evaluation = evaluator._arun_llm_evaluation
+
+    def timed_run_llm_evaluation(instance):
+        start_time = time.perf_counter()
+        try:
+            return run_llm_evaluation(instance)
+        finally:
+            latencies.append(time.perf_counter() - start_time)
+
+    async def timed_arun_llm_evaluation(instance):
+        start_time = time.perf_counter()
+        try:
+            return await arun_llm_evaluation(instance)
+        finally:
+            latencies.append(time.perf_counter() - start_time)
+
+    evaluator._run_llm_evaluation = timed_run_llm_evaluation
+    evaluator._arun_llm_evaluation = timed_arun_llm_evaluation
+
+
+def run_case(
+    evaluator_name: str,
+    n_rows: int,
+    max_concurrency: int = 32,
+    mode: str = "sync",
+    latency: float = 0.05,
+    latency_jitter: float = 0.02,
+    log_format: str = "jsonl",
+    streaming: bool = False,
+    seed: int = 0,
+    dataset_filepath: Optional[str] = None,
+) -> dict:
+    """
+    Runs one benchmark case and returns its measurements.
+
+    The peak RSS is only the one of the loading and the evaluation if the dataset is
+    written beforehand, by another process, to dataset_filepath. Otherwise the dataset
+    is written one row at a time by this process.
+
+    Args:
+        evaluator_name: Name of the evaluator, one of EVALUATORS.
+        n_rows: Number of rows of the synthetic dataset.
+        max_concurrency: Maximum number of instances evaluated concurrently.
+        mode: 'sync' to benchmark run, or 'async' to benchmark arun.
+        latency: Mean simulated latency of a request, in seconds.
+        latency_jitter: Maximum deviation from the mean latency, in seconds.
+        log_format: Log format of the evaluator, or None to skip the logs.
+        streaming: Whether the loader streams the dataset instead of loading it in memory.
+        seed: Seed of the synthetic dataset and of the simulated latencies.
+        dataset_filepath: JSON Lines file of the synthetic dataset, written by write_dataset
+            with the same kind, n_rows and seed.
+    """
+    evaluator_class, kind = EVALUATORS[evaluator_name]
+    # Load the tokenizer before timing anything
+    count_tokens("", "gpt-3.5-turbo")
+    backend = BenchmarkBackend(latency, latency_jitter, seed)
+    with tempfile.TemporaryDirectory() as directory:
+        if dataset_filepath is None:
+            dataset_filepath = os.path.join(directory, "dataset.jsonl")
+            write_dataset(dataset_filepath, kind, n_rows, seed)
+
+        start_time = time.perf_counter()
+        if kind == "rag":
+            loader = RagLoader(col_label="label", format="jsonl", streaming=streaming)
+        else:
+            loader = SummarizationLoader(
+                col_label="label", format="jsonl", streaming=streaming
+            )
+        loader.load(dataset_filepath)
+        load_seconds = time.perf_counter() - start_time
+
+        evaluator = evaluator_class(
+            loader,
+            log_filepath=os.path.join(directory, "log.jsonl"),
+            log_format=log_format,
+            performance_filepath=os.path.join(directory, "perf.txt"),
+            max_concurrency=max_concurrency,
+            backend=backend,
+        )
+        latencies = []
+        _time_llm_evaluations(evaluator, latencies)
+
+        start_time = time.perf_counter()
+        if mode == "async":
+            logs = asyncio.run(evaluator.arun())
+        else:
+            logs = evaluator.run()
+        # Read the logs back, as a caller would
+        n_logs = sum(1 for _ in logs)
+        run_seconds = time.perf_counter() - start_time
+
+    return {
+        "evaluator": evaluator_name,
+        "n_rows": n_rows,
+        "mode": mode,
+        "max_concurrency": max_concurrency,
+        "latency": latency,
+        "log_format": log_format,
+        "streaming": streaming,
+        "n_logs": n_logs,
+        "load_seconds": load_seconds,
+        "run_seconds": run_seconds,
+        "rows_per_second": n_rows / run_seconds if run_seconds > 0 else None,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "n_requests": backend.n_requests,
+        "prompt_tokens_per_row": backend.prompt_tokens / n_rows if n_rows else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(cases: list, isolate: bool = True) -> dict:
+    """
+    Runs benchmark cases, each given as the keyword arguments of run_case, and returns
+    the results with the environment they were measured in.
+
+    With isolate, each case runs in a fresh process, so that its peak RSS is its own. The
+    dataset of the case is written beforehand by this process, so that the peak RSS only
+    measures the loading and the evaluation.
+    """
+    results = []
+    for case in cases:
+        if isolate:
+            _, kind = EVALUATORS[case["evaluator_name"]]
+            with tempfile.TemporaryDirectory() as directory:
+                dataset_filepath = os.path.join(directory, "dataset.jsonl")
+                write_dataset(
+                    dataset_filepath, kind, case["n_rows"], case.get("seed", 0)
+                )
+                with ProcessPoolExecutor(
+                    max_workers=1, mp_context=get_context("spawn")
+                ) as pool:
+                    result = pool.submit(
+                        run_case, **case, dataset_filepath=dataset_filepath
+                    ).result()
+        else:
+            result = run_case(**case)
+        peak_rss = result["peak_rss_mb"]
+        print(
+            f"{result['evaluator']} n_rows={result['n_rows']} mode={result['mode']}: "
+            f"{result['rows_per_second']:.1f} rows/s, p95 {result['latency_p95']:.3f}s, "
+            f"peak RSS {'unknown' if peak_rss is None else f'{peak_rss:.0f}'} MB"
+        )
+        results.append(result)
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def write_results(results: dict, filename: str):
+    """Writes benchmark results to a JSON file."""
+    directory_path = os.path.dirname(filename)
+    if directory_path and not os.path.exists(directory_path):
+        os.makedirs(directory_path)
+    with open(filename, "w") as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,577 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import os
+import warnings
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from statistics import NormalDist
+from ..llms.batch_backend import BatchCollector, PendingRequest, batch_collection
+from ..llms.instrumentation import CompletionStats, completion_hook
+from ..llms.open_ai_completion import pooled_aiosession
+from ..metrics.aggregate import MetricAggregate
+from ..publishers.publisher_log import PublisherLog
+from ..publishers.publisher_jsonl import PublisherJsonl
+from .sampling import random_order, stratified_order
+from .sharding import ShardDataset, shard_filepaths
+
+
+class Evaluator(ABC):
+    """
+    Abstract base class for evaluators.
+
+    The evaluation of an instance is split in two steps:
+    - `_run_llm_evaluation` performs the LLM calls and must not modify the evaluator state,
+      so that it can run concurrently for several instances.
+    - `_process_evaluation` computes the metrics and updates the aggregated scores.
+      It is always called from a single thread, in dataset order.
+
+    Subclasses are expected to set the following attributes in their constructor:
+    dataset, llm_model, executor, logs, n_instances, performance_filepath, metrics and
+    label_counts, and to call `_init_publisher`.
+
+    With the 'jsonl' log format, logs are appended to the log file as instances are evaluated,
+    instead of being kept in memory and written at the end of the run. Such a run can be
+    resumed: the logs checkpointed before the interruption are read back to rebuild the
+    aggregated scores, and only the instances without a log are evaluated.
+
+    During `run` and `arun`, the completions of the process are aggregated in
+    `completion_stats`, and reported in the LLM usage section of the performance report.
+
+    A dataset can also be split in shards evaluated by separate processes or machines with
+    `run_shard`, then merged with `reduce_shards` into the logs and report of a single run.
+    """
+
+    # CompletionStats of the last run
+    completion_stats = None
+    # Number of instances evaluated and stopping point of the last `run_until_confident`
+    early_stopping = None
+    # Order of the instances of a `run_until_confident` in progress, part of the instance ids
+    evaluation_order = None
+
+    @abstractmethod
+    def _run_llm_evaluation(self, instance):
+        """Run the LLM evaluators for an instance."""
+        pass
+
+    async def _arun_llm_evaluation(self, instance):
+        """
+        Asynchronous counterpart of _run_llm_evaluation.
+
+        Evaluators without a native asynchronous implementation run the blocking one in a thread.
+        """
+        return await asyncio.to_thread(self._run_llm_evaluation, instance)
+
+    def _run_llm_evaluation_batch(self, instances):
+        """
+        Run the LLM evaluations of a batch of instances, and return them in the same order.
+
+        Evaluators able to evaluate several instances in a single request override it.
+        """
+        return [self._run_llm_evaluation(instance) for instance in instances]
+
+    async def _arun_llm_evaluation_batch(self, instances):
+        """Asynchronous counterpart of _run_llm_evaluation_batch."""
+        return await asyncio.gather(
+            *[self._arun_llm_evaluation(instance) for instance in instances]
+        )
+
+    @abstractmethod
+    def _process_evaluation(self, instance, evaluation):
+        """Compute the metrics of an instance given its LLM evaluation, and return its log."""
+        pass
+
+    def _init_publisher(self, log_filepath, log_format, resume=False):
+        """Initialize the publisher of the logs, if a log format is defined."""
+        if resume and log_format != "jsonl":
+            raise ValueError("Resuming a run requires the 'jsonl' log format")
+        self.log_format = log_format
+        self.resume = resume
+        if log_format == "jsonl":
+            self.publisher_log = PublisherJsonl(log_filepath, resume=resume)
+        elif log_format is not None:
+            self.publisher_log = PublisherLog(log_filepath, log_format)
+
+    def _fingerprint_config(self):
+        """Return the evaluator settings that the logs of a resumed run must share."""
+        return {
+            "evaluator": type(self).__name__,
+            "llm_model": self.llm_model,
+            "metrics": list(self.metrics),
+        }
+
+    def _instance_id(self, instance):
+        """Return an id identifying an instance by its content and the evaluator settings."""
+        fingerprint = {"config": self._fingerprint_config(), "instance": instance}
+        if self.evaluation_order is not None:
+            fingerprint["order"] = self.evaluation_order
+        serialized = json.dumps(fingerprint, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _get_label(instance):
+        """Return the label of an instance, or 'overall' if it has no label."""
+        if "label" in instance:
+            return instance["label"]
+        return "overall"
+
+    def _evaluate_element(self, instance):
+        """Evaluate an instance."""
+        evaluation = self._run_llm_evaluation(instance)
+        return self._process_evaluation(instance, evaluation)
+
+    def update_metric_aggr(self, metric, label, aggr_score):
+        """Update the aggregated score for a specific metric and label."""
+        metric_aggr = getattr(self, f"{metric}_scores", {})
+        if label not in metric_aggr:
+            metric_aggr[label] = MetricAggregate()
+        metric_aggr[label].add(aggr_score)
+        setattr(self, f"{metric}_scores", metric_aggr)
+
+    def get_metric_aggr(self, metric, label):
+        """Return the MetricAggregate of a metric for a label, or None if it has no score."""
+        metric_aggr = getattr(self, f"{metric}_scores", {})
+        return metric_aggr.get(label, None)
+
+    @staticmethod
+    def get_label_aggregates(score_dict):
+        """Return the aggregates of a metric per label, and merged over all labels as 'overall'."""
+        aggregates = dict(score_dict)
+        overall = MetricAggregate()
+        for aggregate in score_dict.values():
+            overall.merge(aggregate)
+        aggregates["overall"] = overall
+        return aggregates
+
+    def get_average_scores(self, score_dict):
+        """Compute average scores for a metric"""
+        return {
+            label_type: aggregate.mean
+            for label_type, aggregate in self.get_label_aggregates(score_dict).items()
+        }
+
+    def get_reweighted_estimate(self, metric, confidence=0.95):
+        """
+        Return the population estimate of a metric from a stratified sample, as
+        (mean, half-width of its confidence interval), or None if the dataset is not a
+        SampledDataset.
+
+        Each label's mean is weighted by the share of the label in the full dataset, and
+        the variance accounts for the fraction of each label that was sampled. If a label
+        of the full dataset has no score, the population cannot be estimated without
+        bias: a warning is issued and None is returned.
+        """
+        population_counts = getattr(self.dataset, "population_counts", None)
+        if population_counts is None:
+            return None
+        scores = getattr(self, f"{metric}_scores")
+        missing_labels = [
+            label for label, count in population_counts.items()
+            if count > 0 and label not in scores
+        ]
+        if missing_labels:
+            warnings.warn(
+                f"No reweighted estimate of {metric}: labels {missing_labels} have no "
+                "scored instance in the sample."
+            )
+            return None
+        n_population = sum(population_counts.values())
+        mean = 0.0
+        variance = 0.0
+        for label, aggregate in scores.items():
+            weight = population_counts[label] / n_population
+            mean = mean + weight * aggregate.mean
+            if aggregate.count > 1:
+                sampled_fraction = aggregate.count / population_counts[label]
+                variance = variance + weight**2 * aggregate.variance / aggregate.count * (
+                    1 - sampled_fraction
+                )
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        return mean, z * math.sqrt(variance)
+
+    def compute_average_scores(self):
+        """Compute average scores for each metric."""
+        avg_scores = {}
+        for metric in self.metrics:
+            scores = getattr(self, f"{metric}_scores")
+            avg_score = self.get_average_scores(scores)
+            avg_scores[metric] = avg_score
+        return avg_scores
+
+    def write_report_header(self, f):
+        """Write the evaluator settings at the top of the performance report."""
+        f.write(f"Model: {self.llm_model}\n")
+
+    def generate_performance_report(self, filename):
+        """Generate a performance report and save it to the provided filename."""
+        avg_scores = self.compute_average_scores()
+        with open(filename, "w") as f:
+            self.write_report_header(f)
+            f.write("\nNumber of instances per Label:\n")
+            for label, cnt in self.label_counts.items():
+                f.write(f"{label}: {cnt}\n")
+            f.write(f"total: {self.n_instances}\n")
+            if self.early_stopping is not None:
+                f.write(
+                    f"\nEarly stopping: evaluated {self.early_stopping['n_evaluated']} "
+                    f"of {self.early_stopping['n_dataset']} instances, "
+                    f"{'stopped at' if self.early_stopping['stopped'] else 'did not reach'} "
+                    f"a {self.early_stopping['confidence']:.0%} confidence interval "
+                    f"of ±{self.early_stopping['max_half_width']}\n"
+                )
+            for metric in self.metrics:
+                f.write(f"\nAverage {metric} per Label (with 95% confidence interval):\n")
+                aggregates = self.get_label_aggregates(getattr(self, f"{metric}_scores"))
+                for label, avg in avg_scores[metric].items():
+                    interval = aggregates[label].confidence_interval()
+                    if interval is None:
+                        f.write(f"{label}: {avg}\n")
+                    else:
+                        f.write(f"{label}: {avg} ± {(interval[1] - interval[0]) / 2:.4f}\n")
+                estimate = self.get_reweighted_estimate(metric)
+                if estimate is not None:
+                    f.write(f"reweighted overall: {estimate[0]} ± {estimate[1]:.4f}\n")
+            if self.completion_stats is not None:
+                self.completion_stats.write_report(f)
+
+    def _record_log(self, instance, log):
+        """Keep the log of an evaluated instance, or append it to the log file in 'jsonl' format."""
+        if self.log_format == "jsonl":
+            log = {"instance_id": self._instance_id(instance), **log}
+            self.publisher_log.append(log)
+        else:
+            self.logs.append(log)
+
+    def _restore_log(self, log):
+        """Update the aggregated scores with the log of an instance evaluated by a previous run."""
+        if log.get("evaluation") == "undefined":
+            return
+        label = log["label"]
+        for metric in self.metrics:
+            self.update_metric_aggr(metric, label, log[metric])
+        self.n_instances = self.n_instances + 1
+        self.label_counts[label] = self.label_counts.get(label, 0) + 1
+
+    def _pending_instances(self, instances=None):
+        """
+        Return the instances left to evaluate, out of the given instances in evaluation
+        order, the dataset by default.
+        """
+        if instances is None:
+            instances = self.dataset
+        if not self.resume:
+            return instances
+        return self._resume_instances(instances)
+
+    def _resume_instances(self, instances):
+        """
+        Restore the logs of the previous run, then yield the instances it did not evaluate.
+
+        Logs are written in evaluation order, so the restored logs must match the first
+        instances to evaluate. A mismatch means the log was written for other data, with
+        other settings or in another order, and it is reported before any instance is
+        evaluated.
+        """
+        instances = iter(instances)
+        for log in self.publisher_log.read():
+            instance = next(instances, None)
+            if instance is None or self._instance_id(instance) != log["instance_id"]:
+                raise ValueError(
+                    f"Cannot resume from {self.publisher_log.filename}: "
+                    "its logs do not match this dataset, evaluator settings and order"
+                )
+            self._restore_log(log)
+        yield from instances
+
+    def _publish(self):
+        """Write the performance report and the logs, and return the logs."""
+        self.generate_performance_report(self.performance_filepath)
+        if self.log_format == "jsonl":
+            self.publisher_log.close()
+            return self.publisher_log.read()
+        if self.log_format is not None:
+            self.publisher_log.write(self.logs)
+        return self.logs
+
+    def run(self):
+        """
+        Evaluate all instances in the dataset.
+
+        The LLM evaluations run on up to `max_concurrency` instances at a time, while the
+        metrics are aggregated in dataset order, so the report matches a sequential run.
+        The dataset may be any iterable, such as the lazy dataset of a streaming loader.
+        With a `batch_size` above 1, the instances are evaluated in batches instead.
+
+        Returns:
+            The ResultStore of the logs, a sequence of dicts (see `ResultStore.to_list` for a list),
+            or with the 'jsonl' log format, an iterator reading them back from the log file,
+            including the logs of the previous run when resuming.
+        """
+        self._evaluate_instances(self._pending_instances())
+        return self._publish()
+
+    def _map_llm_evaluations(self, instances):
+        """
+        Return an iterator of the (instance, evaluation) pairs of the instances, in order,
+        evaluated in batches with a `batch_size` above 1.
+        """
+        if self.executor.batch_size > 1:
+            return self.executor.map_batches(self._run_llm_evaluation_batch, instances)
+        return self.executor.map(self._run_llm_evaluation, instances)
+
+    def _evaluate_instances(self, instances):
+        """Evaluate the instances and record their logs, collecting the completion stats."""
+        self.completion_stats = CompletionStats()
+        with completion_hook(self.completion_stats):
+            for instance, evaluation in self._map_llm_evaluations(instances):
+                log = self._process_evaluation(instance, evaluation)
+                self._record_log(instance, log)
+
+    def _is_confident(self, max_half_width, confidence, min_instances):
+        """Whether the overall confidence interval of every metric is narrow enough."""
+        if self.n_instances < max(min_instances, 2):
+            return False
+        for metric in self.metrics:
+            overall = MetricAggregate.merge_moments(getattr(self, f"{metric}_scores").values())
+            low, high = overall.confidence_interval(confidence)
+            # A zero-width interval only means that every score so far is the same
+            if high - low <= 0 or (high - low) / 2 > max_half_width:
+                return False
+        return True
+
+    def run_until_confident(
+        self,
+        max_half_width=0.01,
+        confidence=0.95,
+        order="random",
+        min_instances=30,
+        seed=0,
+    ):
+        """
+        Evaluate instances in random order until the overall estimate of every metric is
+        precise enough, instead of the whole dataset.
+
+        After each instance, the confidence interval of the overall mean of every metric
+        is computed; evaluation stops once all of them are narrower than max_half_width
+        on each side. The number of instances evaluated is kept in `early_stopping` and
+        written in the performance report. With a `batch_size` above 1, the instances are
+        evaluated in batches, and the batches in flight are still evaluated when it stops.
+
+        Only the positions of the instances are shuffled: a streaming dataset is not held
+        in memory, but it is re-read about once per thousand instances evaluated.
+
+        The order is part of the instance ids of the 'jsonl' logs, so a run can be resumed
+        by calling `run_until_confident` again with the same order and seed, but not by
+        `run`.
+
+        Args:
+            max_half_width: Target half-width of the confidence intervals, e.g. 0.01 for ±1%.
+            confidence: Confidence level of the intervals.
+            order: 'random', or 'stratified' to keep the labels in the same proportions as
+                the dataset throughout the run.
+            min_instances: Number of instances evaluated before the intervals are trusted.
+            seed: Seed of the random order.
+
+        Returns:
+            The logs of the evaluated instances, as returned by `run`.
+        """
+        if order == "random":
+            ordered_instances = random_order(self.dataset, seed)
+        elif order == "stratified":
+            ordered_instances = stratified_order(self.dataset, self._get_label, seed)
+        else:
+            raise ValueError("order must be 'random' or 'stratified'")
+        self.evaluation_order = {"order": order, "seed": seed}
+        try:
+            stopped = self._evaluate_until_confident(
+                ordered_instances, max_half_width, confidence, min_instances
+            )
+        finally:
+            self.evaluation_order = None
+        self.early_stopping = {
+            "n_evaluated": self.n_instances,
+            "n_dataset": len(ordered_instances),
+            "stopped": stopped,
+            "max_half_width": max_half_width,
+            "confidence": confidence,
+        }
+        return self._publish()
+
+    def _evaluate_until_confident(
+        self, ordered_instances, max_half_width, confidence, min_instances
+    ):
+        """
+        Evaluate the pending instances in order until `_is_confident`, and return whether
+        it stopped before the end.
+        """
+        instances = iter(self._pending_instances(ordered_instances))
+        # Restore the logs of the previous run, if any, before evaluating anything: they
+        # may already be enough
+        first_instance = next(instances, None)
+        if first_instance is None or self._is_confident(max_half_width, confidence, min_instances):
+            return self._is_confident(max_half_width, confidence, min_instances)
+        instances = itertools.chain([first_instance], instances)
+        self.completion_stats = CompletionStats()
+        with completion_hook(self.completion_stats):
+            evaluations = self._map_llm_evaluations(instances)
+            try:
+                for instance, evaluation in evaluations:
+                    log = self._process_evaluation(instance, evaluation)
+                    self._record_log(instance, log)
+                    if self._is_confident(max_half_width, confidence, min_instances):
+                        return True
+                return False
+            finally:
+                # Cancel the evaluations not started yet
+                evaluations.close()
+
+    def _collect_llm_evaluation(self, instance):
+        """Run the LLM evaluation of an instance, or None if it waits for a batch job."""
+        try:
+            return self._run_llm_evaluation(instance)
+        except PendingRequest:
+            return None
+
+    def run_batch(self, backend, directory="data/batches", poll_interval=60, max_rounds=10):
+        """
+        Evaluate all instances in the dataset through offline batch jobs.
+
+        The LLM requests of every instance are written to a batch request file and submitted
+        to the backend. Evaluations needing the responses of a previous request, such as the
+        answers to generated questions, are submitted in the next round. Once all the
+        responses are back, the metrics, logs and report are computed as in `run`.
+
+        Args:
+            backend: The BatchBackend running the batch request files.
+            directory: Directory where the batch request and output files are written.
+            poll_interval: Number of seconds between two polls of a batch job.
+            max_rounds: Maximum number of batch jobs; unfinished evaluations are undefined.
+
+        Returns:
+            The logs, as returned by `run`.
+        """
+        instances = list(self._pending_instances())
+        collector = BatchCollector()
+        with batch_collection(collector):
+            for _ in range(max_rounds):
+                evaluations = [self._collect_llm_evaluation(i) for i in instances]
+                requests = collector.pop_pending()
+                if not requests:
+                    break
+                collector.add_responses(backend.run(requests, directory, poll_interval))
+            else:
+                evaluations = [self._collect_llm_evaluation(i) for i in instances]
+        for instance, evaluation in zip(instances, evaluations):
+            log = self._process_evaluation(instance, evaluation)
+            self._record_log(instance, log)
+        return self._publish()
+
+    async def arun(self):
+        """
+        Asynchronous counterpart of run, to evaluate a dataset from within an event loop.
+
+        Up to `max_concurrency` LLM evaluations are awaited at the same time, sharing a
+        pool of HTTP connections.
+        """
+        instances = self._pending_instances()
+        self.completion_stats = CompletionStats()
+        with completion_hook(self.completion_stats):
+            async with pooled_aiosession(limit=self.executor.max_concurrency):
+                if self.executor.batch_size > 1:
+                    evaluations = self.executor.amap_batches(
+                        self._arun_llm_evaluation_batch, instances
+                    )
+                else:
+                    evaluations = self.executor.amap(self._arun_llm_evaluation, instances)
+                async for instance, evaluation in evaluations:
+                    log = self._process_evaluation(instance, evaluation)
+                    self._record_log(instance, log)
+        return self._publish()
+
+    def run_shard(self, shard_index, n_shards, directory="data/shards"):
+        """
+        Evaluate the instances of one shard of the dataset, selected by the hash of their id.
+
+        The shard logs are appended to a 'jsonl' file in the directory, so an interrupted
+        shard can be resumed by an evaluator created with resume=True. Once the shard is
+        evaluated, its aggregated scores are saved in a state file, which marks it complete.
+
+        Args:
+            shard_index: The shard to evaluate, from 0 to n_shards - 1.
+            n_shards: The number of shards of the dataset.
+            directory: Directory shared by the shards, where their files are written.
+        """
+        filepaths = shard_filepaths(directory, shard_index, n_shards)
+        self.dataset = ShardDataset(self.dataset, self._instance_id, shard_index, n_shards)
+        self.performance_filepath = filepaths["performance"]
+        self._init_publisher(filepaths["log"], "jsonl", self.resume)
+        self._evaluate_instances(self._pending_instances())
+        self.generate_performance_report(self.performance_filepath)
+        self.publisher_log.close()
+        state = {
+            "shard_index": shard_index,
+            "n_shards": n_shards,
+            "n_instances": self.n_instances,
+            "label_counts": self.label_counts,
+            "scores": {
+                metric: [
+                    [label, aggregate.to_dict()]
+                    for label, aggregate in getattr(self, f"{metric}_scores").items()
+                ]
+                for metric in self.metrics
+            },
+            "completion_stats": self.completion_stats.models,
+        }
+        temporary_filepath = f"{filepaths['state']}.tmp"
+        with open(temporary_filepath, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary_filepath, filepaths["state"])
+
+    def reduce_shards(self, n_shards, directory="data/shards"):
+        """
+        Merge the shards evaluated by `run_shard` into the logs and the performance report
+        of a single run over the whole dataset.
+
+        The shard logs are replayed in dataset order, so the logs and the report match those
+        of `run` on a single node.
+
+        Raises:
+            ValueError: If a shard is not complete, or the shards do not match the dataset.
+
+        Returns:
+            The logs, as returned by `run`.
+        """
+        states = []
+        for shard_index in range(n_shards):
+            filepaths = shard_filepaths(directory, shard_index, n_shards)
+            if not os.path.exists(filepaths["state"]):
+                raise ValueError(f"Shard {shard_index} of {n_shards} in {directory} is not complete")
+            with open(filepaths["state"], "r") as f:
+                states.append(json.load(f))
+        logs = defaultdict(deque)
+        for shard_index in range(n_shards):
+            with open(shard_filepaths(directory, shard_index, n_shards)["log"], "r") as f:
+                for line in f:
+                    if line.strip():
+                        log = json.loads(line)
+                        logs[log.pop("instance_id")].append(log)
+
+        self.n_instances = 0
+        self.label_counts = {}
+        for metric in self.metrics:
+            setattr(self, f"{metric}_scores", {})
+        for instance in self.dataset:
+            instance_id = self._instance_id(instance)
+            if not logs.get(instance_id):
+                raise ValueError(
+                    f"The shards in {directory} do not match this dataset and evaluator settings"
+                )
+            log = logs[instance_id].popleft()
+            self._restore_log(log)
+            self._record_log(instance, log)
+        self.completion_stats = CompletionStats()
+        for state in states:
+            self.completion_stats.merge(state["completion_stats"])
+        return self._publish()
@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class EvaluationExecutor:
+    """
+    Runs a function over the instances of a dataset with bounded concurrency.
+
+    Results are always yielded in dataset order, so the caller can aggregate
+    them exactly as a sequential run would.
+
+    Attributes:
+        max_concurrency (int): Maximum number of instances (or batches) evaluated at the same time.
+        batch_size (int): Number of instances grouped by map_batches.
+    """
+
+    def __init__(self, max_concurrency: int = 1, batch_size: int = 1):
+        """
+        Initializes the executor with the maximum number of concurrent evaluations.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self._subtask_pool = None
+        self._subtask_pool_lock = threading.Lock()
+        # Marks the threads of the subtask pool
+        self._local = threading.local()
+
+    def _mark_subtask_thread(self):
+        self._local.is_subtask = True
+
+    def run_parallel(self, *calls):
+        """
+        Runs independent calls made for a single instance concurrently, and returns
+        their results in the order of the calls.
+
+        The first call runs on the current thread and the others on a dedicated pool of
+        max_concurrency workers, distinct from the one used by map, so it is safe to call
+        from map's workers. Calls beyond the size of the pool wait for a free worker.
+        Nested calls made from the pool, such as the chunks of a context answered within
+        a subtask, run one after the other on their thread, since waiting for the pool
+        from one of its own workers could deadlock.
+        """
+        if len(calls) <= 1 or getattr(self._local, "is_subtask", False):
+            return [call() for call in calls]
+        with self._subtask_pool_lock:
+            if self._subtask_pool is None:
+                self._subtask_pool = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, initializer=self._mark_subtask_thread
+                )
+        futures = [
+            self._subtask_pool.submit(contextvars.copy_context().run, call)
+            for call in calls[1:]
+        ]
+        try:
+            first_result = calls[0]()
+        finally:
+            other_results = [future.result() for future in futures]
+        return [first_result, *other_results]
+
+    def map(self, fn, instances):
+        """
+        Applies fn to each instance and yields (instance, result) pairs in dataset order.
+
+        Instances are consumed lazily and only a bounded window of them is in flight,
+        so iterating over a large dataset does not materialize all the results at once.
+
+        Raises:
+            Exception: Any exception raised by fn, re-raised when its instance is reached.
+        """
+        if self.max_concurrency == 1:
+            for instance in instances:
+                yield instance, fn(instance)
+            return
+
+        # Keep twice as many instances in flight as workers, so the workers stay busy
+        # while the caller processes the head of the queue.
+        max_pending = 2 * self.max_concurrency
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            pending = deque()
+            try:
+                for instance in instances:
+                    # Each worker runs in a copy of the caller's context, such as its
+                    # completion hooks
+                    future = pool.submit(contextvars.copy_context().run, fn, instance)
+                    pending.append((instance, future))
+                    if len(pending) >= max_pending:
+                        head_instance, future = pending.popleft()
+                        yield head_instance, future.result()
+                while pending:
+                    head_instance, future = pending.popleft()
+                    yield head_instance, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    async def amap(self, fn, instances):
+        """
+        Asynchronous counterpart of map, where fn is a coroutine function.
+
+        Yields (instance, result) pairs in dataset order, with at most max_concurrency
+        coroutines awaiting fn at the same time.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_bounded(instance):
+            async with semaphore:
+                return await fn(instance)
+
+        max_pending = 2 * self.max_concurrency
+        pending = deque()
+        try:
+            for instance in instances:
+                pending.append((instance, asyncio.ensure_future(run_bounded(instance))))
+                if len(pending) >= max_pending:
+                    head_instance, task = pending.popleft()
+                    yield head_instance, await task
+            while pending:
+                head_instance, task = pending.popleft()
+                yield head_instance, await task
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    def _batches(self, instances):
+        """Groups the instances in lists of up to batch_size instances."""
+        iterator = iter(instances)
+        while True:
+            batch = list(itertools.islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def map_batches(self, fn, instances):
+        """
+        Applies fn to batches of up to batch_size instances, and yields (instance, result)
+        pairs in dataset order. fn must return one result per instance of its batch.
+        """
+        batch_results = self.map(fn, self._batches(instances))
+        try:
+            for batch, results in batch_results:
+                if len(results) != len(batch):
+                    raise ValueError(
+                        f"Expected {len(batch)} results for the batch, got {len(results)}."
+                    )
+                yield from zip(batch, results)
+        finally:
+            # Cancel the batches not started yet when the caller stops early
+            batch_results.close()
+
+    async def amap_batches(self, fn, instances):
+        """
+        Asynchronous counterpart of map_batches, where fn is a coroutine function.
+        """
+        async for batch, results in self.amap(fn, self._batches(instances)):
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"Expected {len(batch)} results for the batch, got {len(results)}."
+                )
+            for instance, result in zip(batch, results):
+                yield instance, result
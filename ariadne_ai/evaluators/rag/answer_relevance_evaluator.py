@@ -1,8 +1,11 @@
 from .rag_evaluator import RagEvaluator
+from ..executor import EvaluationExecutor
 from ...loaders.rag_loader import RagLoader
 from ...metrics.rag.answer_relevance_failure import AnswerRelevanceFailure
-from ...publishers.publisher_log import PublisherLog
+from ...llms.completion_backend import CompletionBackend
+from ...llms.response_cache import ResponseCache
 from ...llms.rag.answer_relevance import AnswerRelevance
+from ...publishers.result_store import ResultStore
 from typing import Optional
 
 
@@ -16,7 +19,7 @@ class AnswerRelevanceEvaluator(RagEvaluator):
         publisher_log: JSON publisher to save the evaluation logs.
         performance_report_filename: txt file to save the perfrormance of a batch
         metrics: List of metrics to evaluate.
-        logs: List to accumulate evaluation results for each instance.
+        logs: Columnar store of the evaluation results of each instance.
     """
 
     # Chamge metric
@@ -34,6 +37,12 @@ class AnswerRelevanceEvaluator(RagEvaluator):
         athina_api_key: Optional[str] = None,
         metadata: Optional[dict] = None,
         additional_instructions: Optional[str] = None,
+        max_concurrency: int = 1,
+        batch_size: int = 1,
+        max_batch_tokens: Optional[int] = None,
+        response_cache: Optional[ResponseCache] = None,
+        backend: Optional[CompletionBackend] = None,
+        resume: bool = False,
     ):
         """
         Initialize the evaluator with given parameters.
@@ -43,6 +52,12 @@ class AnswerRelevanceEvaluator(RagEvaluator):
         - log_filepath: Path to save the logs.
         - llm_model: Language model to be used.
         - metrics: List of metrics for evaluation.
+        - max_concurrency: Maximum number of instances evaluated concurrently.
+        - batch_size: Number of instances packed in a single request, when they fit in the prompt.
+        - max_batch_tokens: Maximum number of prompt tokens of the instances of a batch, by default the room left in the model's context window.
+        - response_cache: Persistent cache of the LLM responses.
+        - backend: Service answering the LLM requests, OpenAI's API by default.
+        - resume: Resume an interrupted run from its 'jsonl' log, evaluating only the missing instances.
         """
         if not isinstance(loader, RagLoader):
             raise TypeError("Loader must be an instance of RagLoader")
@@ -50,18 +65,21 @@ class AnswerRelevanceEvaluator(RagEvaluator):
         self.dataset = loader.processed_dataset
         # Intialize LLMs
         self.llm_model = llm_model
+        self.additional_instructions = additional_instructions
         self.answer_relevance_evaluator = AnswerRelevance(
             llm_model,
             open_ai_key,
             athina_api_key=athina_api_key,
             metadata=metadata,
             additional_instructions=additional_instructions,
+            response_cache=response_cache,
+            max_batch_tokens=max_batch_tokens,
+            backend=backend,
         )
+        self.executor = EvaluationExecutor(max_concurrency, batch_size)
         # Initialize logging
-        self.log_format = log_format
-        if log_format is not None:
-            self.publisher_log = PublisherLog(log_filepath, log_format)
-        self.logs = []
+        self._init_publisher(log_filepath, log_format, resume)
+        self.logs = ResultStore()
         self.n_instances = 0
         # Intialize metrics
         self.performance_filepath = performance_filepath
@@ -70,16 +88,35 @@ class AnswerRelevanceEvaluator(RagEvaluator):
         for metric in metrics:
             setattr(self, f"{metric}_scores", {})
 
-    def _evaluate_element(self, instance):
-        """Evaluate an instance for hallucination."""
+    def _run_llm_evaluation(self, instance):
+        """Run the LLM evaluator for answer relevance."""
+        return self.answer_relevance_evaluator.evaluate(
+            instance["question"], instance["answer"]
+        )
+
+    async def _arun_llm_evaluation(self, instance):
+        """Run the LLM evaluator for answer relevance asynchronously."""
+        return await self.answer_relevance_evaluator.aevaluate(
+            instance["question"], instance["answer"]
+        )
+
+    def _run_llm_evaluation_batch(self, instances):
+        """Run the LLM evaluator for answer relevance on a batch of instances."""
+        return self.answer_relevance_evaluator.evaluate_batch(
+            [(instance["question"], instance["answer"]) for instance in instances]
+        )
+
+    async def _arun_llm_evaluation_batch(self, instances):
+        """Run the LLM evaluator for answer relevance on a batch of instances asynchronously."""
+        return await self.answer_relevance_evaluator.aevaluate_batch(
+            [(instance["question"], instance["answer"]) for instance in instances]
+        )
+
+    def _process_evaluation(self, instance, anw_rel_eval):
+        """Compute the answer relevance metrics of an evaluated instance."""
         question = instance["question"]
         answer = instance["answer"]
-        if "label" in instance:
-            label = instance["label"]
-        else:
-            label = "overall"
-        # Run LLM Evaluator for faithfulness
-        anw_rel_eval = self.answer_relevance_evaluator.evaluate(question, answer)
+        label = self._get_label(instance)
 
         metric_results = {}
         # Compute metrics
@@ -100,60 +137,3 @@ class AnswerRelevanceEvaluator(RagEvaluator):
             "label": label,
             **metric_results,
         }
-
-    def update_metric_aggr(self, metric, label, aggr_score):
-        """Update the aggregated score for a specific metric and label."""
-        metric_aggr = getattr(self, f"{metric}_scores", {})
-        current_score = metric_aggr.get(label, 0)
-        metric_aggr[label] = current_score + aggr_score
-        setattr(self, f"{metric}_scores", metric_aggr)
-
-    def get_metric_aggr(self, metric, label):
-        """Compute the average scores based on the provided score dictionary."""
-        metric_aggr = getattr(self, f"{metric}_scores", {})
-        return metric_aggr.get(label, None)
-
-    def get_average_scores(self, score_dict):
-        """Compute average scores for a metric"""
-        avg_scores = {}
-        sum_score = 0
-        n_instances = 0
-        for label_type, total_score in score_dict.items():
-            avg_scores[label_type] = total_score / self.label_counts[label_type]
-            sum_score = sum_score + total_score
-            n_instances = n_instances + self.label_counts[label_type]
-        avg_scores["overall"] = sum_score / n_instances
-        return avg_scores
-
-    def compute_average_scores(self):
-        """Compute average scores for each metric."""
-        avg_scores = {}
-        for metric in self.metrics:
-            scores = getattr(self, f"{metric}_scores")
-            avg_score = self.get_average_scores(scores)
-            avg_scores[metric] = avg_score
-        return avg_scores
-
-    def generate_performance_report(self, filename):
-        """Generate a performance report and save it to the provided filename."""
-        avg_scores = self.compute_average_scores()
-        with open(filename, "w") as f:
-            f.write(f"Model: {self.llm_model}\n")
-            f.write("\nNumber of instances per Label:\n")
-            for label, cnt in self.label_counts.items():
-                f.write(f"{label}: {cnt}\n")
-            f.write(f"total: {self.n_instances}\n")
-            for metric in self.metrics:
-                f.write(f"\nAverage {metric} per Label:\n")
-                for label, avg in avg_scores[metric].items():
-                    f.write(f"{label}: {avg}\n")
-
-    def run(self):
-        """Evaluate all instances in the dataset."""
-        for instance in self.dataset:
-            log = self._evaluate_element(instance)
-            self.logs.append(log)
-        self.generate_performance_report(self.performance_filepath)
-        if self.log_format is not None:
-            self.publisher_log.write(self.logs)
-        return self.logs
@@ -1,12 +1,15 @@
-from abc import ABC, abstractmethod
+from abc import abstractmethod
+from ..evaluator import Evaluator
 from ...loaders.rag_loader import RagLoader
 
 
-class RagEvaluator(ABC):
+class RagEvaluator(Evaluator):
     @abstractmethod
     def __init__(self, loader: RagLoader, **kwargs):
         pass
 
-    @abstractmethod
-    def run(self):
-        pass
+    def _fingerprint_config(self):
+        """Return the evaluator settings, including the additional instructions of the prompt."""
+        config = super()._fingerprint_config()
+        config["additional_instructions"] = getattr(self, "additional_instructions", None)
+        return config
@@ -0,0 +1,145 @@
+from .rag_evaluator import RagEvaluator
+from ..executor import EvaluationExecutor
+from ...loaders.rag_loader import RagLoader
+from ...metrics.rag.faithfulness_failure import FaithfulnessFailure
+from ...metrics.rag.context_relevance_failure import ContextRelevanceFailure
+from ...metrics.rag.answer_relevance_failure import AnswerRelevanceFailure
+from ...llms.completion_backend import CompletionBackend
+from ...llms.response_cache import ResponseCache
+from ...llms.rag.rag_judge import RagJudge
+from ...publishers.result_store import ResultStore
+from typing import Optional
+
+
+class RagJudgeEvaluator(RagEvaluator):
+    """
+    Evaluator for faithfulness, context relevance and answer relevance in rag chatbot,
+    judged in a single LLM call per instance.
+
+    The metrics are computed with the same metric classes as FaithfulnessEvaluator,
+    ContextRelevanceEvaluator and AnswerRelevanceEvaluator, so the results are comparable.
+
+    Attributes:
+        dataset: Dataset containing instances for evaluation.
+        rag_judge: Evaluator for the three criteria.
+        publisher_log: JSON publisher to save the evaluation logs.
+        performance_report_filename: txt file to save the perfrormance of a batch
+        metrics: List of metrics to evaluate.
+        logs: Columnar store of the evaluation results of each instance.
+    """
+
+    metric_str_to_class = {
+        "faithfulness_failure": FaithfulnessFailure,
+        "context_relevance_failure": ContextRelevanceFailure,
+        "answer_relevance_failure": AnswerRelevanceFailure,
+    }
+
+    # Criterion of the judge's response used by each metric
+    metric_str_to_criterion = {
+        "faithfulness_failure": "faithfulness",
+        "context_relevance_failure": "context_relevance",
+        "answer_relevance_failure": "answer_relevance",
+    }
+
+    def __init__(
+        self,
+        loader,
+        log_filepath="data/logs/log_rag_judge_eval.json",
+        log_format="json",
+        performance_filepath="data/logs/perf_rag_judge_eval.txt",
+        llm_model="gpt-3.5-turbo",
+        metrics=[
+            "faithfulness_failure",
+            "context_relevance_failure",
+            "answer_relevance_failure",
+        ],
+        open_ai_key=None,
+        athina_api_key: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        additional_instructions: Optional[str] = None,
+        max_concurrency: int = 1,
+        response_cache: Optional[ResponseCache] = None,
+        backend: Optional[CompletionBackend] = None,
+        resume: bool = False,
+    ):
+        """
+        Initialize the evaluator with given parameters.
+
+        Args:
+        - loader: An instance of RagLoader.
+        - log_filepath: Path to save the logs.
+        - llm_model: Language model to be used.
+        - metrics: List of metrics for evaluation.
+        - max_concurrency: Maximum number of instances evaluated concurrently.
+        - response_cache: Persistent cache of the LLM responses.
+        - backend: Service answering the LLM requests, OpenAI's API by default.
+        - resume: Resume an interrupted run from its 'jsonl' log, evaluating only the missing instances.
+        """
+        if not isinstance(loader, RagLoader):
+            raise TypeError("Loader must be an instance of RagLoader")
+        # Load data
+        self.dataset = loader.processed_dataset
+        # Intialize LLMs
+        self.llm_model = llm_model
+        self.additional_instructions = additional_instructions
+        self.rag_judge = RagJudge(
+            llm_model,
+            open_ai_key,
+            athina_api_key=athina_api_key,
+            metadata=metadata,
+            additional_instructions=additional_instructions,
+            response_cache=response_cache,
+            backend=backend,
+        )
+        self.executor = EvaluationExecutor(max_concurrency)
+        # Initialize logging
+        self._init_publisher(log_filepath, log_format, resume)
+        self.logs = ResultStore()
+        self.n_instances = 0
+        # Intialize metrics
+        self.performance_filepath = performance_filepath
+        self.metrics = metrics
+        self.label_counts = {}
+        for metric in metrics:
+            setattr(self, f"{metric}_scores", {})
+
+    def _run_llm_evaluation(self, instance):
+        """Run the LLM judge for all the criteria."""
+        return self.rag_judge.evaluate(
+            instance["question"], instance["context"], instance["answer"]
+        )
+
+    async def _arun_llm_evaluation(self, instance):
+        """Run the LLM judge for all the criteria asynchronously."""
+        return await self.rag_judge.aevaluate(
+            instance["question"], instance["context"], instance["answer"]
+        )
+
+    def _process_evaluation(self, instance, rag_eval):
+        """Compute the metrics of an evaluated instance from the judge's verdicts."""
+        question = instance["question"]
+        context = instance["context"]
+        answer = instance["answer"]
+        label = self._get_label(instance)
+
+        metric_results = {}
+        # Compute metrics
+        if rag_eval is None:
+            metric_results["evaluation"] = "undefined"
+        else:
+            for metric in self.metrics:
+                metric_class = self.metric_str_to_class.get(metric)
+                criterion = self.metric_str_to_criterion[metric]
+                metric_result, explanation = metric_class.compute(rag_eval[criterion])
+                metric_results[metric] = metric_result
+                metric_results[f"reason_{metric}"] = explanation
+                self.update_metric_aggr(metric, label, metric_result)
+            self.n_instances = self.n_instances + 1
+            self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        return {
+            "question": question,
+            "context": context,
+            "answer": answer,
+            "label": label,
+            **metric_results,
+        }
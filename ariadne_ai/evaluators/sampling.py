@@ -0,0 +1,257 @@
+import copy
+import math
+import random
+from collections.abc import Sequence
+from typing import Callable, Optional
+from ..llms.instrumentation import estimate_cost
+from ..llms.tokens import count_tokens
+
+
+class ReorderedDataset:
+    """
+    The instances of a dataset read in another order, given by their positions.
+
+    A dataset with random access, such as a list, is indexed directly. Any other dataset,
+    such as the lazy dataset of a streaming loader, is re-read once per chunk of
+    chunk_size positions, keeping only the instances of the chunk, so that the dataset is
+    never held in memory as a whole.
+
+    Attributes:
+        dataset (Iterable): The dataset, a sequence or an iterable that can be re-read.
+        positions (list): Positions of the instances in the dataset, in the new order.
+        chunk_size (int): Number of instances read per pass over a dataset without random
+            access.
+    """
+
+    def __init__(self, dataset, positions: list, chunk_size: int = 1000):
+        self.dataset = dataset
+        self.positions = positions
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        if isinstance(self.dataset, Sequence):
+            for position in self.positions:
+                yield self.dataset[position]
+            return
+        for start in range(0, len(self.positions), self.chunk_size):
+            chunk = self.positions[start:start + self.chunk_size]
+            wanted = set(chunk)
+            instances = {
+                position: instance
+                for position, instance in enumerate(self.dataset)
+                if position in wanted
+            }
+            for position in chunk:
+                yield instances[position]
+
+
+def _rereadable(dataset):
+    """
+    Returns the dataset, or a list of its instances if it is a one-shot iterator, such
+    as a generator, which cannot be read more than once.
+    """
+    if iter(dataset) is dataset:
+        return list(dataset)
+    return dataset
+
+
+def random_order(dataset, seed: int = 0) -> ReorderedDataset:
+    """
+    Returns the instances of a dataset in a random order. Only the positions of the
+    instances are shuffled, so a streaming dataset stays lazy.
+    """
+    dataset = _rereadable(dataset)
+    positions = list(range(sum(1 for _ in dataset)))
+    random.Random(seed).shuffle(positions)
+    return ReorderedDataset(dataset, positions)
+
+
+def stratified_order(dataset, get_label: Callable, seed: int = 0) -> ReorderedDataset:
+    """
+    Returns the instances of a dataset in a random order stratified by label: every prefix
+    of the order holds the labels in about the same proportions as the whole dataset.
+    Only the labels and positions of the instances are kept, so a streaming dataset stays
+    lazy.
+    """
+    dataset = _rereadable(dataset)
+    rng = random.Random(seed)
+    positions_by_label = {}
+    for position, instance in enumerate(dataset):
+        positions_by_label.setdefault(get_label(instance), []).append(position)
+    keyed_positions = []
+    for positions in positions_by_label.values():
+        rng.shuffle(positions)
+        for rank, position in enumerate(positions):
+            # The k-th instance of a label comes at about the fraction k/n of the order
+            keyed_positions.append(((rank + rng.random()) / len(positions), position))
+    keyed_positions.sort(key=lambda keyed_position: keyed_position[0])
+    return ReorderedDataset(dataset, [position for _, position in keyed_positions])
+
+
+class SampledDataset(list):
+    """
+    A stratified sample of a dataset, with the size of each label in the full dataset,
+    so that evaluators can reweight the per-label estimates into population estimates.
+
+    Attributes:
+        population_counts (dict): Number of instances of each label in the full dataset.
+    """
+
+    def __init__(self, instances, population_counts: dict):
+        super().__init__(instances)
+        self.population_counts = population_counts
+
+
+class StratifiedSampler:
+    """
+    Selects a label-stratified sample of a loader's dataset, to be evaluated instead of the
+    whole dataset, so that rare labels are not drowned out by the majority label.
+
+    The size of the sample of each label is given, in order of priority, by:
+    - quotas: a number of instances per label, or the same number for every label. A
+      dict of quotas must cover every label of the dataset, as the labels left out could
+      not be reweighted into the population estimates.
+    - budget_tokens or budget_usd: a total budget, spent according to the objective.
+      The cost of an instance is estimated from the tokens of its texts plus the tokens
+      of the prompts around them.
+
+    With the 'label' objective, the budget is split to give every label the same number
+    of instances, which maximizes the precision of the worst estimated label. With the
+    'overall' objective, it follows the Neyman allocation, n_h proportional to
+    N_h * S_h / sqrt(c_h), which maximizes the precision of the overall estimate.
+
+    Attributes:
+        quotas (dict or int, optional): Number of instances to sample per label.
+        budget_tokens (int, optional): Total number of prompt tokens to spend.
+        budget_usd (float, optional): Total estimated cost to spend, priced for the model.
+        objective (str): 'label' or 'overall', how a budget is allocated between labels.
+        std_by_label (dict, optional): Expected standard deviation of the metric per label,
+            e.g. from a previous run, for the Neyman allocation. 0.5 by default, the worst
+            case of a failure rate.
+        model (str): Model used to count the tokens and price the budget.
+        prompt_tokens (int): Tokens of the prompts around the texts of an instance.
+        completion_tokens (int): Tokens of the completions of an instance.
+        seed (int): Seed of the random selection within each label.
+    """
+
+    def __init__(
+        self,
+        quotas=None,
+        budget_tokens: Optional[int] = None,
+        budget_usd: Optional[float] = None,
+        objective: str = "label",
+        std_by_label: Optional[dict] = None,
+        model: str = "gpt-3.5-turbo",
+        prompt_tokens: int = 600,
+        completion_tokens: int = 100,
+        seed: int = 0,
+    ):
+        if quotas is None and budget_tokens is None and budget_usd is None:
+            raise ValueError("Either quotas, budget_tokens or budget_usd must be given")
+        if objective not in ["label", "overall"]:
+            raise ValueError("objective must be 'label' or 'overall'")
+        if budget_usd is not None and estimate_cost(model, 1, 0) is None:
+            raise ValueError(f"No known price for model {model}; use budget_tokens instead")
+        self.quotas = quotas
+        self.budget_tokens = budget_tokens
+        self.budget_usd = budget_usd
+        self.objective = objective
+        self.std_by_label = std_by_label or {}
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.seed = seed
+
+    def instance_cost(self, instance: dict) -> float:
+        """Returns the estimated cost of evaluating an instance, in tokens or in USD."""
+        n_tokens = self.prompt_tokens + sum(
+            count_tokens(value, self.model)
+            for value in instance.values()
+            if isinstance(value, str)
+        )
+        if self.budget_usd is None:
+            return n_tokens
+        return estimate_cost(self.model, n_tokens, self.completion_tokens) or 0.0
+
+    def allocate(self, population_counts: dict, costs: dict) -> dict:
+        """
+        Returns the number of instances to sample per label, given the number of instances
+        and the mean cost of an instance of each label.
+        """
+        if self.quotas is not None:
+            if isinstance(self.quotas, dict):
+                missing_labels = [
+                    label for label in population_counts if label not in self.quotas
+                ]
+                if missing_labels:
+                    raise ValueError(
+                        f"quotas must be given for every label, missing: {missing_labels}"
+                    )
+                return {
+                    label: min(self.quotas[label], count)
+                    for label, count in population_counts.items()
+                }
+            return {label: min(self.quotas, count) for label, count in population_counts.items()}
+
+        budget = self.budget_usd if self.budget_usd is not None else self.budget_tokens
+        if self.objective == "label":
+            weights = {label: 1.0 for label in population_counts}
+        else:
+            weights = {
+                label: count * self.std_by_label.get(label, 0.5) / math.sqrt(costs[label])
+                if costs[label] > 0 else count
+                for label, count in population_counts.items()
+            }
+        # Split the budget by weight, capping the labels fully sampled and giving what they
+        # leave to the others
+        allocation = {}
+        remaining = dict(weights)
+        while remaining:
+            total_weight = sum(weights[label] * costs[label] for label in remaining)
+            if total_weight <= 0:
+                break
+            scale = budget / total_weight
+            capped = {
+                label for label in remaining
+                if scale * weights[label] >= population_counts[label]
+            }
+            if not capped:
+                for label in remaining:
+                    allocation[label] = int(scale * weights[label])
+                break
+            for label in capped:
+                allocation[label] = population_counts[label]
+                budget = budget - population_counts[label] * costs[label]
+                del remaining[label]
+        return {label: allocation.get(label, 0) for label in population_counts}
+
+    def sample(self, loader):
+        """
+        Returns a copy of the loader whose processed dataset is the stratified sample,
+        as a SampledDataset, to be passed to an evaluator.
+        """
+        instances_by_label = {}
+        for instance in loader.processed_dataset:
+            label = instance["label"] if "label" in instance else "overall"
+            instances_by_label.setdefault(label, []).append(instance)
+        population_counts = {label: len(instances) for label, instances in instances_by_label.items()}
+        costs = {}
+        if self.quotas is None:
+            costs = {
+                label: sum(self.instance_cost(instance) for instance in instances) / len(instances)
+                for label, instances in instances_by_label.items()
+            }
+        allocation = self.allocate(population_counts, costs)
+
+        rng = random.Random(self.seed)
+        instances = []
+        for label, label_instances in instances_by_label.items():
+            instances.extend(rng.sample(label_instances, allocation[label]))
+        rng.shuffle(instances)
+        sampled_loader = copy.copy(loader)
+        sampled_loader._raw_dataset = {}
+        sampled_loader._processed_dataset = SampledDataset(instances, population_counts)
+        return sampled_loader
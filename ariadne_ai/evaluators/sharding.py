@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Optional
+
+
+def shard_of(instance_id: str, n_shards: int) -> int:
+    """Returns the shard of an instance, given its id as computed by the evaluator."""
+    return int(instance_id[:16], 16) % n_shards
+
+
+def shard_filepaths(directory: str, shard_index: int, n_shards: int) -> dict:
+    """Returns the paths of the log, report and state files of a shard."""
+    stem = os.path.join(directory, f"shard-{shard_index:05d}-of-{n_shards:05d}")
+    return {
+        "log": f"{stem}.jsonl",
+        "performance": f"{stem}.perf.txt",
+        "state": f"{stem}.state.json",
+    }
+
+
+class ShardDataset:
+    """
+    The instances of a dataset belonging to one shard, selected by the hash of their id.
+
+    The dataset is filtered lazily, so a streaming dataset stays streamed.
+
+    Attributes:
+        dataset: The full dataset, any iterable of instances.
+        instance_id (callable): Function returning the id of an instance.
+        shard_index (int): The shard to select, from 0 to n_shards - 1.
+        n_shards (int): The number of shards.
+    """
+
+    def __init__(self, dataset, instance_id: Callable, shard_index: int, n_shards: int):
+        if not 0 <= shard_index < n_shards:
+            raise ValueError("shard_index must be between 0 and n_shards - 1")
+        self.dataset = dataset
+        self.instance_id = instance_id
+        self.shard_index = shard_index
+        self.n_shards = n_shards
+
+    def __iter__(self):
+        for instance in self.dataset:
+            if shard_of(self.instance_id(instance), self.n_shards) == self.shard_index:
+                yield instance
+
+
+def _run_shard(make_evaluator: Callable, shard_index: int, n_shards: int, directory: str):
+    make_evaluator().run_shard(shard_index, n_shards, directory)
+
+
+def run_sharded(
+    make_evaluator: Callable,
+    n_shards: int,
+    directory: str = "data/shards",
+    n_workers: Optional[int] = None,
+):
+    """
+    Evaluates a dataset in n_shards worker processes, then merges the shards.
+
+    Each worker builds its own evaluator with make_evaluator, which must be picklable,
+    such as a module-level function, and evaluates one shard with `run_shard`. The
+    evaluator built in this process then merges the shards with `reduce_shards`, and
+    publishes the logs and the report as a single run would.
+
+    To shard across machines instead, run `run_shard` on each machine with a shared
+    directory, then `reduce_shards` on one of them.
+
+    Returns:
+        The logs, as returned by `run`.
+    """
+    with ProcessPoolExecutor(
+        max_workers=n_workers or n_shards, mp_context=get_context("spawn")
+    ) as pool:
+        futures = [
+            pool.submit(_run_shard, make_evaluator, shard_index, n_shards, directory)
+            for shard_index in range(n_shards)
+        ]
+        for future in futures:
+            future.result()
+    return make_evaluator().reduce_shards(n_shards, directory)
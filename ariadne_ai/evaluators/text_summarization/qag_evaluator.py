@@ -0,0 +1,114 @@
+from .summarization_evaluator import SummarizationEvaluator
+from ..executor import EvaluationExecutor
+from ...loaders.summarization_loader import SummarizationLoader
+from ...metrics.text_summarization.aggreement_score import AgreementScore
+from ...metrics.text_summarization.contradiction_failure import ContradictionFailure
+from ...metrics.text_summarization.hallucination_failure import HallucinationFailure
+from ...metrics.text_summarization.informativeness_failure import InformativenessFailure
+from ...llms.completion_backend import CompletionBackend
+from ...llms.response_cache import ResponseCache
+from ...llms.text_summarization.question_generator import QuestionGenerator
+from ...llms.text_summarization.question_answerer import QuestionAnswerer
+from ...publishers.result_store import ResultStore
+from typing import Optional
+
+
+class QAGEvaluator(SummarizationEvaluator):
+    """
+    Evaluator computing every text summarization metric in a single pass.
+
+    The questions are generated once per summary, and answered once based on the document
+    and once based on the summary. Hallucination, contradiction, non-informativeness and
+    agreement are then all computed from the same answers, instead of running
+    HallucinationEvaluator and InformativenessEvaluator separately.
+
+    Attributes:
+        dataset: Dataset containing instances for evaluation.
+        question_generator: Question generator based on summaries.
+        question_answerer: Question answerer for the questions based on documents/summaries.
+        publisher_log: JSON publisher to save the evaluation logs.
+        performance_report_filename: txt file to save the perfrormance of a batch
+        metrics: List of metrics to evaluate.
+        logs: Columnar store of the evaluation results of each instance.
+        n_questions: Number of questions to be generated for each summary.
+    """
+
+    metric_str_to_class = {
+        "agreement_score": AgreementScore,
+        "hallucination_failure": HallucinationFailure,
+        "contradiction_failure": ContradictionFailure,
+        "informativeness_failure": InformativenessFailure,
+    }
+
+    def __init__(
+        self,
+        loader,
+        questions=None,
+        log_filepath="data/logs/log_sum_qag_eval.json",
+        log_format="json",
+        performance_filepath="data/logs/perf_sum_qag_eval.txt",
+        n_questions=5,
+        llm_model="gpt-3.5-turbo",
+        metrics=[
+            "hallucination_failure",
+            "contradiction_failure",
+            "informativeness_failure",
+            "agreement_score",
+        ],
+        open_ai_key=None,
+        max_concurrency: int = 1,
+        response_cache: Optional[ResponseCache] = None,
+        backend: Optional[CompletionBackend] = None,
+        resume: bool = False,
+    ):
+        """
+        Initialize the evaluator with given parameters.
+
+        Args:
+        - loader: An instance of SummarizationLoader.
+        - log_filepath: Path to save the logs.
+        - n_questions: Number of questions to generate for summaries.
+        - llm_model: Language model to be used.
+        - metrics: List of metrics for evaluation.
+        - max_concurrency: Maximum number of instances evaluated concurrently.
+        - response_cache: Persistent cache of the LLM responses.
+        - backend: Service answering the LLM requests, OpenAI's API by default.
+        - resume: Resume an interrupted run from its 'jsonl' log, evaluating only the missing instances.
+        """
+        if not isinstance(loader, SummarizationLoader):
+            raise TypeError("Loader must be an instance of SummarizationLoader")
+        # Load data
+        self.dataset = loader.processed_dataset
+        # Intialize LLMs
+        self.llm_model = llm_model
+        self.n_questions = n_questions
+        self.questions_defined = None
+        if questions is None:
+            self.question_generator = QuestionGenerator(
+                llm_model,
+                n_questions,
+                open_ai_key,
+                response_cache=response_cache,
+                backend=backend,
+            )
+        else:
+            self.question_generator = None
+            self.questions_defined = questions
+        self.executor = EvaluationExecutor(max_concurrency)
+        self.question_answerer = QuestionAnswerer(
+            llm_model,
+            open_ai_key,
+            response_cache=response_cache,
+            backend=backend,
+            executor=self.executor,
+        )
+        # Initialize logging
+        self._init_publisher(log_filepath, log_format, resume)
+        self.logs = ResultStore()
+        self.n_instances = 0
+        # Intialize metrics
+        self.performance_filepath = performance_filepath
+        self.metrics = metrics
+        self.label_counts = {}
+        for metric in metrics:
+            setattr(self, f"{metric}_scores", {})
@@ -1,13 +1,149 @@
-from abc import ABC, abstractmethod
+import asyncio
+from abc import abstractmethod
+from ..evaluator import Evaluator
 from ...loaders.summarization_loader import SummarizationLoader
+from ...metrics.aggregate import MetricAggregate
+from ...metrics.text_summarization.answer_matrix import AnswerMatrix, split_by_label
+
+class SummarizationEvaluator(Evaluator):
+    """
+    Base class for the question-answer generation (QAG) evaluators of text summarizations.
+
+    Questions are generated from the summary (or pre-defined), then answered based on the
+    document and on the summary. Every summarization metric is computed from these answers.
+
+    Subclasses are expected to set question_generator, questions_defined, question_answerer,
+    n_questions and metric_str_to_class, in addition to the Evaluator attributes.
+    """
 
-class SummarizationEvaluator(ABC):
-    
     @abstractmethod
     def __init__(self, loader:SummarizationLoader, **kwargs):
         pass
 
-    @abstractmethod
-    def run(self):
-        pass
+    def _fingerprint_config(self):
+        """Return the evaluator settings, including how the questions are obtained."""
+        config = super()._fingerprint_config()
+        config["n_questions"] = self.n_questions
+        config["questions"] = self.questions_defined
+        return config
+
+    def write_report_header(self, f):
+        """Write the evaluator settings at the top of the performance report."""
+        f.write(f"Number of Questions: {self.n_questions}\n")
+        f.write(f"Model: {self.llm_model}\n")
+
+    def _run_llm_evaluation(self, instance):
+        """
+        Generate the questions and answer them based on the document and the summary.
+
+        The two answering calls are independent and run concurrently. Across instances,
+        the workers of the executor overlap, so the question generation of an instance
+        runs while the questions of the previous ones are being answered.
+        """
+        document = instance["document"]
+        summary = instance["summary"]
+
+        # Generate questions based on summary
+        if self.questions_defined is None:
+            questions = self.question_generator.generate(summary)
+        # Or load the pre-defined questions:
+        else:
+            questions = self.questions_defined
+
+        if questions is None:
+            return None, None, None
+
+        # Get answers from document and summary, concurrently
+        answers_doc, answers_sum = self.executor.run_parallel(
+            lambda: self.question_answerer.answer(questions, document),
+            lambda: self.question_answerer.answer(questions, summary),
+        )
+        return questions, answers_doc, answers_sum
+
+    async def _arun_llm_evaluation(self, instance):
+        """Asynchronous counterpart of _run_llm_evaluation."""
+        document = instance["document"]
+        summary = instance["summary"]
+
+        # Generate questions based on summary
+        if self.questions_defined is None:
+            questions = await self.question_generator.agenerate(summary)
+        # Or load the pre-defined questions:
+        else:
+            questions = self.questions_defined
+
+        if questions is None:
+            return None, None, None
+
+        # Get answers from document and summary, concurrently
+        answers_doc, answers_sum = await asyncio.gather(
+            self.question_answerer.aanswer(questions, document),
+            self.question_answerer.aanswer(questions, summary),
+        )
+        return questions, answers_doc, answers_sum
+
+    def _process_evaluation(self, instance, evaluation):
+        """Compute the summarization metrics of an evaluated instance."""
+        document = instance["document"]
+        summary = instance["summary"]
+        label = self._get_label(instance)
+        # The evaluation is None when it could not be run, such as in an unfinished batch job
+        questions, answers_doc, answers_sum = evaluation or (None, None, None)
+
+        metric_results = {}
+        # Compute metrics
+        if answers_doc is None or answers_sum is None or questions is None:
+            metric_results["evaluation"] = "undefined"
+        else:
+            for metric in self.metrics:
+                metric_class = self.metric_str_to_class.get(metric)
+                # Metrics may return additional values after the score and explanation
+                metric_result, explanation = metric_class.compute(
+                    answers_doc, answers_sum, questions, self.n_questions
+                )[:2]
+                metric_results[metric] = metric_result
+                metric_results[f"reason_{metric}"] = explanation
+                self.update_metric_aggr(metric, label, metric_result)
+            self.n_instances = self.n_instances + 1
+            self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        return {
+            "document": document,
+            "summary": summary,
+            "questions": questions,
+            "answers_doc": answers_doc,
+            "answers_sum": answers_sum,
+            "label": label,
+            **metric_results,
+        }
+
+    def rescore(self, logs):
+        """
+        Recompute the metrics and the aggregated scores from the answers of evaluation logs,
+        such as the logs of a previous run, without any LLM call.
+
+        The answers are normalized once into an AnswerMatrix, and every metric is computed
+        for all the instances in a single vectorized pass.
 
+        Returns:
+            dict: The average scores per metric and label, as in the performance report.
+        """
+        answers_src_list, answers_sum_list, labels = [], [], []
+        for log in logs:
+            if log.get("evaluation") == "undefined":
+                continue
+            answers_src_list.append(log["answers_doc"])
+            answers_sum_list.append(log["answers_sum"])
+            labels.append(log["label"])
+        answer_matrix = AnswerMatrix.from_answers(answers_src_list, answers_sum_list)
+        label_counts = {}
+        for metric in self.metrics:
+            scores = split_by_label(answer_matrix.compute(metric, self.n_questions), labels)
+            metric_scores = {
+                label: MetricAggregate.from_array(label_scores)
+                for label, label_scores in scores.items()
+            }
+            label_counts = {label: len(label_scores) for label, label_scores in scores.items()}
+            setattr(self, f"{metric}_scores", metric_scores)
+        self.label_counts = label_counts
+        self.n_instances = len(labels)
+        return self.compute_average_scores()
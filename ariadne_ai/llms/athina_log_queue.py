@@ -0,0 +1,118 @@
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from typing import Callable, Optional
+from athina_logger.inference_logger import InferenceLogger
+
+
+class AthinaLogQueue:
+    """
+    A bounded queue of inference logs, sent to Athina by a background worker thread,
+    so that logging never adds a network round trip to the completions.
+
+    The worker sends the logs one request at a time, in order, as the Athina API has no
+    batch endpoint. When the queue is full, new logs are dropped with the 'drop' policy, or
+    wait for room with the 'block' policy. Queued logs are flushed when the interpreter exits.
+
+    Attributes:
+        max_size (int): Maximum number of logs waiting to be sent.
+        policy (str): 'drop' or 'block', what to do with a log when the queue is full.
+        n_dropped (int): Number of logs dropped because the queue was full.
+        n_failed (int): Number of logs that could not be sent.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        policy: str = "drop",
+        send: Optional[Callable] = None,
+    ):
+        if policy not in ["drop", "block"]:
+            raise ValueError("policy must be 'drop' or 'block'")
+        self.max_size = max_size
+        self.policy = policy
+        self.n_dropped = 0
+        self.n_failed = 0
+        self._send = send if send is not None else self._send_to_athina
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._worker = None
+
+    @classmethod
+    def default(cls) -> "AthinaLogQueue":
+        """Returns the process-wide queue, flushed at exit."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+                atexit.register(cls._default.flush)
+            return cls._default
+
+    @staticmethod
+    def _send_to_athina(log: dict):
+        InferenceLogger.log_open_ai_chat_response(**log)
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._work, name="athina-log-queue", daemon=True
+                )
+                self._worker.start()
+
+    def _work(self):
+        while True:
+            log = self._queue.get()
+            # A flush marker: every log queued before it is sent
+            if isinstance(log, threading.Event):
+                log.set()
+                continue
+            try:
+                self._send(log)
+            except Exception as e:
+                self.n_failed = self.n_failed + 1
+                print("Failed to log to Athina", e)
+
+    def put(self, log: dict):
+        """
+        Queues the keyword arguments of InferenceLogger.log_open_ai_chat_response.
+        """
+        self._start_worker()
+        try:
+            self._queue.put(log, block=self.policy == "block")
+        except queue.Full:
+            with self._lock:
+                self.n_dropped = self.n_dropped + 1
+
+    async def aput(self, log: dict):
+        """
+        Asynchronous counterpart of put, waiting for room off the event loop with the
+        'block' policy.
+        """
+        if self.policy == "block":
+            await asyncio.to_thread(self.put, log)
+        else:
+            self.put(log)
+
+    def flush(self, timeout: Optional[float] = 30):
+        """
+        Waits until the logs queued before the call are sent, or until the timeout expires.
+        A marker is queued behind them, and set by the worker when it reaches it.
+
+        Returns:
+            bool: Whether all the queued logs were sent.
+        """
+        if self._worker is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        return done.wait(remaining)
@@ -2,7 +2,9 @@ from abc import ABC, abstractmethod
 from typing import Optional
 from dotenv import load_dotenv
 import os
+from .completion_backend import CompletionBackend
 from .open_ai_completion import OpenAICompletion
+from .response_cache import ResponseCache
 
 load_dotenv()
 
@@ -14,12 +16,16 @@ class BaseLlmEvaluator(ABC):
         open_ai_key: str,
         athina_api_key: Optional[str] = None,
         metadata: Optional[dict] = None,
+        response_cache: Optional[ResponseCache] = None,
+        backend: Optional[CompletionBackend] = None,
     ):
         self.metadata = metadata
         self.open_ai_key = (
             open_ai_key if open_ai_key is not None else os.getenv("OPENAI_API_KEY")
         )
-        if self.open_ai_key is None:
+        # Only the OpenAI backend needs a key
+        requires_open_ai_key = backend is None or backend.requires_open_ai_key
+        if self.open_ai_key is None and requires_open_ai_key:
             raise ValueError(
                 "You must provide an OpenAI API key or set the OPENAI_API_KEY environment variable."
             )
@@ -29,4 +35,6 @@ class BaseLlmEvaluator(ABC):
             open_ai_key=self.open_ai_key,
             athina_api_key=athina_api_key,
             metadata=metadata,
+            response_cache=response_cache,
+            backend=backend,
         )
@@ -0,0 +1,282 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Optional
+import openai
+from openai.api_requestor import APIRequestor
+from .open_ai_completion import current_batch_collector
+from .response_cache import ResponseCache
+
+
+class PendingRequest(Exception):
+    """
+    Raised by a completion request collected for a batch job, whose response is not known yet.
+    """
+
+    def __init__(self, custom_id: str):
+        super().__init__(f"Request {custom_id} is waiting for a batch job")
+        self.custom_id = custom_id
+
+
+class BatchCollector:
+    """
+    Collects the completion requests of an evaluation instead of sending them, and serves
+    the responses once a batch job has returned them.
+
+    Requests are identified by the same key as the response cache, so identical requests
+    are submitted once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._responses = {}
+
+    def lookup(self, model: str, messages, temperature: float, max_tokens: int):
+        """
+        Returns the response of a request, or records it and raises PendingRequest.
+        A response of None means the batch job failed to complete the request.
+        """
+        custom_id = ResponseCache.make_key(model, messages, temperature, max_tokens)
+        with self._lock:
+            if custom_id in self._responses:
+                return self._responses[custom_id]
+            self._pending[custom_id] = {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            }
+        raise PendingRequest(custom_id)
+
+    def pop_pending(self) -> dict:
+        """Returns the requests collected since the last call, keyed by custom id."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        return pending
+
+    def add_responses(self, responses: dict):
+        """Adds the responses of a batch job, keyed by custom id."""
+        with self._lock:
+            self._responses.update(responses)
+
+
+@contextmanager
+def batch_collection(collector: BatchCollector):
+    """
+    Routes the completion requests made inside the context to the collector, instead of
+    OpenAI's ChatCompletion API. Requests made in other threads or tasks are unaffected,
+    unless they run in a copy of the context, as the workers of the evaluation executor do.
+    """
+    token = current_batch_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        current_batch_collector.reset(token)
+
+
+def write_batch_requests(requests: dict, filename: str):
+    """
+    Writes requests keyed by custom id to a JSON Lines batch request file,
+    in the format of OpenAI's Batch API.
+    """
+    with open(filename, "w") as f:
+        for custom_id, body in requests.items():
+            request = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }
+            f.write(json.dumps(request) + "\n")
+
+
+def read_batch_responses(filename: str) -> dict:
+    """
+    Reads a JSON Lines batch output file, and returns the response content keyed by
+    custom id, or None for the requests that failed.
+    """
+    responses = {}
+    with open(filename, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            output = json.loads(line)
+            try:
+                content = output["response"]["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                print("Batch request failed", output.get("error"))
+                content = None
+            responses[output["custom_id"]] = content
+    return responses
+
+
+class BatchBackend(ABC):
+    """
+    Abstract base class for the services running batch request files.
+
+    Subclasses submit a batch request file, report the status of the job and download its
+    output file, both in the JSON Lines format of OpenAI's Batch API.
+    """
+
+    COMPLETED_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+    @abstractmethod
+    def submit(self, requests_filename: str) -> str:
+        """Submits a batch request file and returns the id of the batch job."""
+        pass
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Returns the status of a batch job, such as 'in_progress' or 'completed'."""
+        pass
+
+    @abstractmethod
+    def download(self, batch_id: str, output_filename: str) -> bool:
+        """Downloads the output file of a finished batch job. Returns False if it has none."""
+        pass
+
+    def run(self, requests: dict, directory: str, poll_interval: float = 60) -> dict:
+        """
+        Submits requests keyed by custom id, waits for the batch job to finish, and returns
+        the response content keyed by custom id. Requests without a response are set to None.
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        requests_filename = os.path.join(directory, f"{uuid.uuid4().hex}.requests.jsonl")
+        write_batch_requests(requests, requests_filename)
+        batch_id = self.submit(requests_filename)
+        print(f"Submitted batch {batch_id} with {len(requests)} requests")
+
+        status = self.status(batch_id)
+        while status not in self.COMPLETED_STATUSES:
+            time.sleep(poll_interval)
+            status = self.status(batch_id)
+        if status != "completed":
+            print(f"Batch {batch_id} finished with status {status}")
+
+        responses = dict.fromkeys(requests)
+        output_filename = os.path.join(directory, f"{batch_id}.output.jsonl")
+        if self.download(batch_id, output_filename):
+            responses.update(read_batch_responses(output_filename))
+        return responses
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    A file-based stand-in for a batch service, to run batch jobs offline.
+
+    Each request body is passed to `respond`, which returns the content of the response.
+    The jobs complete as soon as they are submitted.
+
+    Attributes:
+        respond (Callable[[dict], str]): Returns the response content of a request body.
+        directory (str): Directory holding the request and output files of the jobs.
+    """
+
+    def __init__(self, respond: Callable[[dict], str], directory: str = "data/batches/local"):
+        self.respond = respond
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def _output_filename(self, batch_id: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.local_output.jsonl")
+
+    def submit(self, requests_filename: str) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex}"
+        with open(requests_filename, "r") as f_in, open(
+            self._output_filename(batch_id), "w"
+        ) as f_out:
+            for line in f_in:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                output = {"custom_id": request["custom_id"], "response": None, "error": None}
+                try:
+                    content = self.respond(request["body"])
+                    output["response"] = {
+                        "status_code": 200,
+                        "body": {
+                            "model": request["body"]["model"],
+                            "choices": [
+                                {"index": 0, "message": {"role": "assistant", "content": content}}
+                            ],
+                        },
+                    }
+                except Exception as e:
+                    output["error"] = {"message": str(e)}
+                f_out.write(json.dumps(output) + "\n")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        if os.path.exists(self._output_filename(batch_id)):
+            return "completed"
+        return "failed"
+
+    def download(self, batch_id: str, output_filename: str) -> bool:
+        if not os.path.exists(self._output_filename(batch_id)):
+            return False
+        shutil.copyfile(self._output_filename(batch_id), output_filename)
+        return True
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """
+    Runs batch jobs with OpenAI's Batch API, at a lower cost and on a separate quota,
+    with results returned within the completion window.
+
+    Attributes:
+        open_ai_key (str): The API key for OpenAI.
+        completion_window (str): Time frame within which the batch jobs are processed.
+    """
+
+    def __init__(self, open_ai_key: Optional[str] = None, completion_window: str = "24h"):
+        self.open_ai_key = (
+            open_ai_key if open_ai_key is not None else os.getenv("OPENAI_API_KEY")
+        )
+        self.completion_window = completion_window
+        self._batches = {}
+
+    def _request(self, method: str, url: str, params: Optional[dict] = None) -> dict:
+        response, _, _ = APIRequestor(key=self.open_ai_key).request(
+            method, url, params=params
+        )
+        return response.data
+
+    def submit(self, requests_filename: str) -> str:
+        with open(requests_filename, "rb") as f:
+            input_file = openai.File.create(
+                file=f, purpose="batch", api_key=self.open_ai_key
+            )
+        batch = self._request(
+            "post",
+            "/batches",
+            params={
+                "input_file_id": input_file["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": self.completion_window,
+            },
+        )
+        self._batches[batch["id"]] = batch
+        return batch["id"]
+
+    def status(self, batch_id: str) -> str:
+        batch = self._request("get", f"/batches/{batch_id}")
+        self._batches[batch_id] = batch
+        return batch["status"]
+
+    def download(self, batch_id: str, output_filename: str) -> bool:
+        output_file_id = self._batches.get(batch_id, {}).get("output_file_id")
+        if output_file_id is None:
+            return False
+        content = openai.File.download(output_file_id, api_key=self.open_ai_key)
+        with open(output_filename, "wb") as f:
+            f.write(content)
+        return True
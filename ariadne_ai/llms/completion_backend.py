@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+import openai
+from .response_cache import ResponseCache
+from .tokens import count_message_tokens, count_tokens
+
+
+class CompletionBackend(ABC):
+    """
+    Abstract base class for the services answering chat completion requests.
+
+    A backend only sends a request and returns the raw response, in the format of OpenAI's
+    ChatCompletion API. Caching, rate limiting, retries and logging are handled by
+    OpenAICompletion, whatever the backend.
+    """
+
+    # Whether the backend calls OpenAI's API, and therefore needs an OpenAI API key
+    requires_open_ai_key = False
+
+    @abstractmethod
+    def complete(self, model: str, messages, temperature: float, max_tokens: int):
+        """Returns the chat completion response of a request."""
+        pass
+
+    async def acomplete(self, model: str, messages, temperature: float, max_tokens: int):
+        """
+        Asynchronous counterpart of complete. Runs the blocking implementation in a thread
+        unless overridden.
+        """
+        return await asyncio.to_thread(
+            self.complete, model, messages, temperature, max_tokens
+        )
+
+
+class OpenAIBackend(CompletionBackend):
+    """
+    Sends the requests to OpenAI's ChatCompletion API.
+    """
+
+    requires_open_ai_key = True
+
+    def complete(self, model: str, messages, temperature: float, max_tokens: int):
+        return openai.ChatCompletion.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+
+    async def acomplete(self, model: str, messages, temperature: float, max_tokens: int):
+        return await openai.ChatCompletion.acreate(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+
+
+def make_completion_response(model: str, messages, content: str) -> dict:
+    """
+    Builds a response in the format of OpenAI's ChatCompletion API, with the token usage
+    of the request counted locally.
+    """
+    prompt_tokens = count_message_tokens(messages, model)
+    completion_tokens = count_tokens(content, model)
+    return {
+        "id": f"chatcmpl-local-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class ReplayBackend(CompletionBackend):
+    """
+    A local, deterministic backend serving canned or recorded responses, to measure the
+    overhead and the concurrency scaling of the evaluations offline.
+
+    A request is answered, in order of priority, with its recorded response, the result of
+    `respond`, or `default_response`. Each request waits for a simulated latency, drawn
+    from a seeded random generator so that runs are reproducible.
+
+    Attributes:
+        responses (dict): Recorded response contents, keyed by ResponseCache.make_key.
+        respond (Callable, optional): Returns the response content of a list of messages.
+        default_response (str, optional): Response content of the other requests.
+        latency (float): Mean simulated latency of a request, in seconds.
+        latency_jitter (float): Maximum deviation from the mean latency, in seconds.
+    """
+
+    def __init__(
+        self,
+        responses: Optional[dict] = None,
+        respond: Optional[Callable] = None,
+        default_response: Optional[str] = None,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        seed: int = 0,
+    ):
+        self.responses = responses if responses is not None else {}
+        self.respond = respond
+        self.default_response = default_response
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_jsonl(cls, filename: str, **kwargs) -> "ReplayBackend":
+        """
+        Loads the responses recorded by a RecordingBackend.
+        """
+        responses = {}
+        with open(filename, "r") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    responses[record["key"]] = record["response"]
+        return cls(responses=responses, **kwargs)
+
+    def _get_latency(self) -> float:
+        with self._lock:
+            jitter = self._random.uniform(-self.latency_jitter, self.latency_jitter)
+        return max(0.0, self.latency + jitter)
+
+    def _get_content(self, model: str, messages, temperature: float, max_tokens: int) -> str:
+        key = ResponseCache.make_key(model, messages, temperature, max_tokens)
+        if key in self.responses:
+            return self.responses[key]
+        if self.respond is not None:
+            return self.respond(messages)
+        if self.default_response is not None:
+            return self.default_response
+        raise LookupError(f"No response recorded for request {key}")
+
+    def complete(self, model: str, messages, temperature: float, max_tokens: int):
+        time.sleep(self._get_latency())
+        content = self._get_content(model, messages, temperature, max_tokens)
+        return make_completion_response(model, messages, content)
+
+    async def acomplete(self, model: str, messages, temperature: float, max_tokens: int):
+        await asyncio.sleep(self._get_latency())
+        content = self._get_content(model, messages, temperature, max_tokens)
+        return make_completion_response(model, messages, content)
+
+
+class RecordingBackend(CompletionBackend):
+    """
+    Wraps a backend and appends every request and its response content to a JSON Lines file,
+    to be replayed later with ReplayBackend.from_jsonl.
+    """
+
+    def __init__(self, backend: CompletionBackend, filename: str):
+        self.backend = backend
+        self.filename = filename
+        self.requires_open_ai_key = backend.requires_open_ai_key
+        self._lock = threading.Lock()
+        directory_path = os.path.dirname(filename)
+        if directory_path and not os.path.exists(directory_path):
+            os.makedirs(directory_path)
+
+    def _record(self, model: str, messages, temperature: float, max_tokens: int, response):
+        record = {
+            "key": ResponseCache.make_key(model, messages, temperature, max_tokens),
+            "model": model,
+            "messages": messages,
+            "response": response["choices"][0]["message"]["content"],
+        }
+        with self._lock:
+            with open(self.filename, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def complete(self, model: str, messages, temperature: float, max_tokens: int):
+        response = self.backend.complete(model, messages, temperature, max_tokens)
+        self._record(model, messages, temperature, max_tokens, response)
+        return response
+
+    async def acomplete(self, model: str, messages, temperature: float, max_tokens: int):
+        response = await self.backend.acomplete(model, messages, temperature, max_tokens)
+        self._record(model, messages, temperature, max_tokens, response)
+        return response
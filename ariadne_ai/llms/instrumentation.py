@@ -0,0 +1,404 @@
+import contextvars
+import os
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Prices of the models in USD per 1K tokens, as (prompt, completion).
+# Models are matched by longest prefix.
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0015, 0.002),
+    "gpt-3.5-turbo-16k": (0.003, 0.004),
+    "gpt-3.5-turbo-1106": (0.001, 0.002),
+    "gpt-3.5-turbo-0125": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-32k": (0.06, 0.12),
+    "gpt-4-1106-preview": (0.01, 0.03),
+    "gpt-4-0125-preview": (0.01, 0.03),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+_PREFIXES_LONGEST_FIRST = sorted(MODEL_PRICES, key=len, reverse=True)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """
+    Returns the estimated cost of a completion in USD, or None if the model has no known price.
+    """
+    for prefix in _PREFIXES_LONGEST_FIRST:
+        if model.startswith(prefix):
+            prompt_price, completion_price = MODEL_PRICES[prefix]
+            break
+    else:
+        return None
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+class CompletionEvent:
+    """
+    A record of one completion attempt, passed to the completion hooks.
+
+    Attributes:
+        model (str): The model of the request.
+        attempt (int): 0 for the first attempt of a request, n for its n-th retry.
+        cached (bool): Whether the response was served from the response cache.
+        queue_wait (float): Seconds spent waiting for the rate limiter.
+        latency (float): Wall time of the request to the backend, in seconds.
+        prompt_tokens (int): Prompt tokens reported by the response.
+        completion_tokens (int): Completion tokens reported by the response.
+        cost (float, optional): Estimated cost in USD, if the model has a known price.
+        error (str, optional): Class name of the error raised by the attempt, if any.
+        timestamp (float): Time at which the attempt finished.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        attempt: int = 0,
+        cached: bool = False,
+        queue_wait: float = 0.0,
+        latency: float = 0.0,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: Optional[str] = None,
+    ):
+        self.model = model
+        self.attempt = attempt
+        self.cached = cached
+        self.queue_wait = queue_wait
+        self.latency = latency
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        self.error = error
+        self.timestamp = time.time()
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+# Hooks of the whole process, such as exporters
+_hooks = []
+_hooks_lock = threading.Lock()
+# Hooks of the current context, such as the statistics of one evaluation run
+_context_hooks = contextvars.ContextVar("completion_hooks", default=())
+
+
+def add_completion_hook(hook: Callable[[CompletionEvent], None]):
+    """
+    Registers a function called with the CompletionEvent of every completion attempt of
+    the process.
+    """
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_completion_hook(hook: Callable[[CompletionEvent], None]):
+    """Unregisters a completion hook."""
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+@contextmanager
+def completion_hook(hook: Callable[[CompletionEvent], None]):
+    """
+    Registers a completion hook for the duration of the context. Only the completions
+    made within the context, including the threads and tasks it starts with a copy of
+    its context, reach the hook, so concurrent runs each see their own events.
+    """
+    token = _context_hooks.set(_context_hooks.get() + (hook,))
+    try:
+        yield hook
+    finally:
+        _context_hooks.reset(token)
+
+
+def emit_completion_event(event: CompletionEvent):
+    """
+    Passes an event to the hooks of the process and of the current context. A failing
+    hook never fails the completion.
+    """
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for hook in hooks + list(_context_hooks.get()):
+        try:
+            hook(event)
+        except Exception as e:
+            warnings.warn(f"Completion hook {hook!r} failed: {e!r}")
+
+
+def percentile(values: list, q: float) -> Optional[float]:
+    """
+    Returns the q-th percentile (0-100) of a list of values, by linear interpolation, or
+    None if the list is empty.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class CompletionStats:
+    """
+    A completion hook aggregating the events per model: requests, cache hits, retries,
+    errors by class, tokens, estimated cost, queue wait and latency.
+    """
+
+    QUANTILES = (50, 95, 99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models = {}
+        self._latencies = []
+
+    def __call__(self, event: CompletionEvent):
+        with self._lock:
+            stats = self.models.setdefault(
+                event.model,
+                {
+                    "requests": 0,
+                    "cached": 0,
+                    "retries": 0,
+                    "errors": {},
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost": 0.0,
+                    "queue_wait": 0.0,
+                    "latency": 0.0,
+                },
+            )
+            if event.attempt == 0:
+                stats["requests"] = stats["requests"] + 1
+            else:
+                stats["retries"] = stats["retries"] + 1
+            if event.cached:
+                stats["cached"] = stats["cached"] + 1
+            if event.error is not None:
+                stats["errors"][event.error] = stats["errors"].get(event.error, 0) + 1
+            stats["prompt_tokens"] = stats["prompt_tokens"] + event.prompt_tokens
+            stats["completion_tokens"] = stats["completion_tokens"] + event.completion_tokens
+            stats["cost"] = stats["cost"] + (event.cost or 0.0)
+            stats["queue_wait"] = stats["queue_wait"] + event.queue_wait
+            stats["latency"] = stats["latency"] + event.latency
+            if not event.cached:
+                self._latencies.append(event.latency)
+
+    def merge(self, models: dict):
+        """
+        Adds the per-model stats of another CompletionStats, such as the stats of a shard.
+        Their latencies are not merged.
+        """
+        with self._lock:
+            for model, other in models.items():
+                stats = self.models.setdefault(
+                    model, {**{key: 0 for key in other}, "errors": {}}
+                )
+                for key, value in other.items():
+                    if key == "errors":
+                        for error, count in value.items():
+                            stats["errors"][error] = stats["errors"].get(error, 0) + count
+                    else:
+                        stats[key] = stats[key] + value
+
+    def latency_quantiles(self) -> dict:
+        """Returns the latency percentiles of the requests sent to the backend."""
+        with self._lock:
+            latencies = list(self._latencies)
+        return {q: percentile(latencies, q) for q in self.QUANTILES}
+
+    def summary(self) -> dict:
+        """Returns the totals over every model."""
+        with self._lock:
+            models = list(self.models.values())
+        totals = {
+            key: sum(stats[key] for stats in models)
+            for key in [
+                "requests", "cached", "retries", "prompt_tokens",
+                "completion_tokens", "cost", "queue_wait", "latency",
+            ]
+        }
+        errors = {}
+        for stats in models:
+            for error, count in stats["errors"].items():
+                errors[error] = errors.get(error, 0) + count
+        totals["errors"] = errors
+        return totals
+
+    def write_report(self, f):
+        """Writes the LLM usage section of a performance report."""
+        summary = self.summary()
+        if summary["requests"] == 0:
+            return
+        f.write("\nLLM usage:\n")
+        f.write(f"requests: {summary['requests']}\n")
+        f.write(f"cached: {summary['cached']}\n")
+        f.write(f"retries: {summary['retries']}\n")
+        for error, count in summary["errors"].items():
+            f.write(f"errors {error}: {count}\n")
+        f.write(f"prompt tokens: {summary['prompt_tokens']}\n")
+        f.write(f"completion tokens: {summary['completion_tokens']}\n")
+        f.write(f"estimated cost (USD): {summary['cost']:.4f}\n")
+        f.write(f"queue wait (s): {summary['queue_wait']:.2f}\n")
+        f.write(f"request time (s): {summary['latency']:.2f}\n")
+        for q, latency in self.latency_quantiles().items():
+            if latency is not None:
+                f.write(f"latency p{q} (s): {latency:.3f}\n")
+
+
+class PrometheusExporter:
+    """
+    Renders CompletionStats in the Prometheus text exposition format, for instance to be
+    collected by the node exporter's textfile collector.
+    """
+
+    def __init__(self, stats: CompletionStats, prefix: str = "ariadne_llm"):
+        self.stats = stats
+        self.prefix = prefix
+
+    def to_text(self) -> str:
+        p = self.prefix
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {metric_type}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{p}_{name}{{{label_text}}} {value}")
+
+        with self.stats._lock:
+            models = {model: dict(stats) for model, stats in self.stats.models.items()}
+        metric(
+            "requests_total",
+            "counter",
+            "Completion requests.",
+            [({"model": m}, s["requests"]) for m, s in models.items()],
+        )
+        metric(
+            "cache_hits_total",
+            "counter",
+            "Completions served from the response cache.",
+            [({"model": m}, s["cached"]) for m, s in models.items()],
+        )
+        metric(
+            "retries_total",
+            "counter",
+            "Retried completion attempts.",
+            [({"model": m}, s["retries"]) for m, s in models.items()],
+        )
+        metric(
+            "errors_total",
+            "counter",
+            "Failed completion attempts by error class.",
+            [
+                ({"model": m, "error": e}, n)
+                for m, s in models.items()
+                for e, n in s["errors"].items()
+            ],
+        )
+        metric(
+            "tokens_total",
+            "counter",
+            "Tokens used by the completions.",
+            [
+                ({"model": m, "type": t}, s[f"{t}_tokens"])
+                for m, s in models.items()
+                for t in ["prompt", "completion"]
+            ],
+        )
+        metric(
+            "cost_usd_total",
+            "counter",
+            "Estimated cost of the completions in USD.",
+            [({"model": m}, s["cost"]) for m, s in models.items()],
+        )
+        metric(
+            "queue_wait_seconds_total",
+            "counter",
+            "Time spent waiting for the rate limiter.",
+            [({"model": m}, s["queue_wait"]) for m, s in models.items()],
+        )
+        metric(
+            "request_seconds_total",
+            "counter",
+            "Time spent in requests to the backend.",
+            [({"model": m}, s["latency"]) for m, s in models.items()],
+        )
+        metric(
+            "request_seconds",
+            "summary",
+            "Latency of the requests to the backend.",
+            [
+                ({"quantile": str(q / 100)}, v)
+                for q, v in self.stats.latency_quantiles().items()
+                if v is not None
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+    def write(self, filename: str):
+        """Writes the metrics to a file, replacing it atomically."""
+        temporary_filename = f"{filename}.tmp"
+        with open(temporary_filename, "w") as f:
+            f.write(self.to_text())
+        os.replace(temporary_filename, filename)
+
+
+class OpenTelemetryHook:
+    """
+    A completion hook recording the events as OpenTelemetry metrics.
+
+    Requires the opentelemetry-api package; the exporter is configured through the
+    OpenTelemetry SDK of the application.
+    """
+
+    def __init__(self, meter_name: str = "ariadne_ai"):
+        try:
+            from opentelemetry import metrics
+        except ImportError:
+            raise ImportError(
+                "The OpenTelemetry hook requires the opentelemetry-api package: "
+                "pip install opentelemetry-api"
+            )
+        meter = metrics.get_meter(meter_name)
+        self._requests = meter.create_counter(
+            "llm.requests", description="Completion attempts."
+        )
+        self._tokens = meter.create_counter(
+            "llm.tokens", description="Tokens used by the completions."
+        )
+        self._cost = meter.create_counter(
+            "llm.cost", unit="USD", description="Estimated cost of the completions."
+        )
+        self._latency = meter.create_histogram(
+            "llm.latency", unit="s", description="Latency of the requests."
+        )
+        self._queue_wait = meter.create_histogram(
+            "llm.queue_wait",
+            unit="s",
+            description="Time spent waiting for the rate limiter.",
+        )
+
+    def __call__(self, event: CompletionEvent):
+        attributes = {
+            "model": event.model,
+            "cached": event.cached,
+            "retry": event.attempt > 0,
+            "error": event.error or "",
+        }
+        self._requests.add(1, attributes)
+        self._tokens.add(event.prompt_tokens, {"model": event.model, "type": "prompt"})
+        self._tokens.add(event.completion_tokens, {"model": event.model, "type": "completion"})
+        if event.cost:
+            self._cost.add(event.cost, {"model": event.model})
+        if not event.cached:
+            self._latency.record(event.latency, attributes)
+            self._queue_wait.record(event.queue_wait, {"model": event.model})
@@ -1,11 +1,46 @@
 import openai
+import aiohttp
+import asyncio
+import contextvars
 import time
 import traceback
 import json
+from contextlib import asynccontextmanager
 from typing import Optional
-from athina_logger.inference_logger import InferenceLogger
 from athina_logger.api_key import AthinaApiKey
 from athina_logger.exception.custom_exception import CustomException
+from .athina_log_queue import AthinaLogQueue
+from .completion_backend import CompletionBackend, OpenAIBackend
+from .instrumentation import CompletionEvent, emit_completion_event
+from .response_cache import ResponseCache
+from .rate_limiter import RateLimiter, backoff_wait_time
+from .tokens import context_window, count_message_tokens
+
+# Collector of the requests of a batch job, for the completions of the current context
+current_batch_collector = contextvars.ContextVar("batch_collector", default=None)
+
+
+@asynccontextmanager
+async def pooled_aiosession(limit: int = 100):
+    """
+    Shares one pooled aiohttp session between all the asynchronous OpenAI requests
+    made inside the context, instead of opening a new connection for each request.
+
+    If a session has already been set through `openai.aiosession`, it is reused as is.
+
+    Args:
+        limit (int): Maximum number of simultaneous connections in the pool.
+    """
+    if openai.aiosession.get() is not None:
+        yield openai.aiosession.get()
+        return
+    connector = aiohttp.TCPConnector(limit=limit)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        token = openai.aiosession.set(session)
+        try:
+            yield session
+        finally:
+            openai.aiosession.reset(token)
 
 
 class OpenAICompletion:
@@ -16,141 +51,373 @@ class OpenAICompletion:
     - model (str): The model to use for completions, default is "gpt-3.5-turbo".
     - open_ai_key (str): The API key for OpenAI.
     - temperature (float): OpenAI temperature setting.
-    - max_tokens (int): OpenAI maximum number of tokens setting. The token count of your prompt plus max_tokens cannot exceed the model's context.
+    - max_tokens (int): OpenAI maximum number of tokens setting, 2000 by default. The token count of your prompt plus max_tokens cannot exceed the model's context, so it is lowered for long prompts.
+    - response_cache (ResponseCache, optional): Persistent cache of the responses, keyed by request.
+    - rate_limiter (RateLimiter): Process-wide requests and tokens per minute limiter of the model.
+    - backend (CompletionBackend): Service answering the requests, OpenAI's API by default.
+    - athina_log_queue (AthinaLogQueue): Background queue of the logs sent to Athina, process-wide by default.
+    - batch_collector (BatchCollector, optional): Collector of the requests of a batch job, set for
+      the current context by `batch_collection`. While set, requests are collected instead of being sent.
     """
 
+    @property
+    def batch_collector(self):
+        return current_batch_collector.get()
+
     def __init__(
         self,
         model: str,
         open_ai_key: str,
         athina_api_key: Optional[str] = None,
         metadata: Optional[dict] = None,
+        response_cache: Optional[ResponseCache] = None,
+        max_tokens: int = 2000,
+        backend: Optional[CompletionBackend] = None,
+        athina_log_queue: Optional[AthinaLogQueue] = None,
     ):
         """
         Initializes the OpenAICompletion with the provided settings.
         """
         # Setting instance attributes based on provided parameters or defaults
         self.model = model
+        self.max_tokens = max_tokens
         self.metadata = metadata
         self.open_ai_key = open_ai_key
+        self.response_cache = response_cache
+        self.rate_limiter = RateLimiter.for_model(model)
+        self.backend = backend if backend is not None else OpenAIBackend()
+        self.athina_log_queue = (
+            athina_log_queue
+            if athina_log_queue is not None
+            else AthinaLogQueue.default()
+        )
         AthinaApiKey.set_api_key(athina_api_key)
 
         # Setting the API key for OpenAI based on provided key
-        openai.api_key = self.open_ai_key
+        if self.backend.requires_open_ai_key:
+            openai.api_key = self.open_ai_key
+
+    def _get_athina_log(self, messages, response, response_time_ms: int) -> Optional[dict]:
+        """
+        Returns the Athina log of a completion response, or None if no Athina API key has been set.
+        """
+        if AthinaApiKey.get_api_key() is None:
+            return None
+
+        if self.metadata is None:
+            environment = None
+            prompt_slug = None
+            customer_id = None
+            customer_user_id = None
+            external_reference_id = None
+            session_id = None
+        else:
+            environment = (
+                self.metadata["environment"]
+                if self.metadata["environment"] is not None
+                else "default"
+            )
+            prompt_slug = (
+                self.metadata["prompt_slug"]
+                if self.metadata["prompt_slug"] is not None
+                else "default"
+            )
+            customer_id = (self.metadata["customer_id"],)
+            customer_user_id = (self.metadata["customer_user_id"],)
+            external_reference_id = (self.metadata["external_reference_id"],)
+            session_id = (self.metadata["session_id"],)
+
+        return {
+            "prompt_slug": prompt_slug,
+            "messages": messages,
+            "model": self.model,
+            "completion": response,
+            "context": None,
+            "response_time": response_time_ms,
+            "customer_id": customer_id,
+            "customer_user_id": customer_user_id,
+            "external_reference_id": external_reference_id,
+            "session_id": session_id,
+            "environment": environment,
+        }
+
+    def _log_to_athina(self, messages, response, response_time_ms: int):
+        """
+        Queues the log of a completion response, sent to Athina in the background.
+        """
+        log = self._get_athina_log(messages, response, response_time_ms)
+        if log is not None:
+            self.athina_log_queue.put(log)
+
+    async def _alog_to_athina(self, messages, response, response_time_ms: int):
+        """
+        Asynchronous counterpart of _log_to_athina.
+        """
+        log = self._get_athina_log(messages, response, response_time_ms)
+        if log is not None:
+            await self.athina_log_queue.aput(log)
+
+    def _fit_max_tokens(self, messages, max_tokens: Optional[int]) -> int:
+        """
+        Returns the maximum number of completion tokens of a request, lowered if needed so
+        that the prompt and the completion fit in the model's context window.
+        """
+        if max_tokens is None:
+            max_tokens = self.max_tokens
+        available = context_window(self.model) - count_message_tokens(messages, self.model)
+        if 0 < available < max_tokens:
+            return available
+        return max_tokens
+
+    def _get_cache_key(
+        self, messages, temperature: float, max_tokens: int, use_cache: bool
+    ) -> Optional[str]:
+        """
+        Returns the cache key of a request, or None if the request should not be cached.
+        """
+        if not use_cache or self.response_cache is None:
+            return None
+        return ResponseCache.make_key(self.model, messages, temperature, max_tokens)
+
+    def _collect_batch_request(
+        self, messages, temperature: float, max_tokens: int, cache_key: Optional[str]
+    ):
+        """
+        Returns the response of a request from the batch collector, or raises PendingRequest
+        if the request still has to be sent as part of a batch job.
+        """
+        content = self.batch_collector.lookup(
+            self.model, messages, temperature, max_tokens
+        )
+        if cache_key is not None and content is not None:
+            self.response_cache.set(cache_key, content)
+        return content
+
+    def _get_retry_wait_time(self, error, retry_count: int) -> Optional[float]:
+        """
+        Returns the number of seconds to wait before retrying a failed request,
+        or None if the maximum number of retries has been reached.
+
+        The wait is a jittered, capped exponential backoff, extended to the provider's
+        Retry-After if longer. Rate-limit headers sent with the error update the limiter.
+        """
+        max_retries = 3
+        retry_after = self.rate_limiter.update_from_headers(
+            getattr(error, "headers", None)
+        )
+        if retry_count >= max_retries:
+            print("Max retries reached - unable to complete OpenAI request")
+            return None
+        if isinstance(error, openai.error.RateLimitError):
+            print("RateLimitError", error)
+            wait_time = backoff_wait_time(retry_count, 15, 120)
+        elif isinstance(error, openai.error.Timeout):
+            print("Timeout", error)
+            wait_time = backoff_wait_time(retry_count, 15, 120)
+        else:
+            print("APIConnectionError", error)
+            wait_time = backoff_wait_time(retry_count, 30, 120)
+        if retry_after is not None:
+            wait_time = max(wait_time, retry_after)
+        return wait_time
+
+    def _emit_event(
+        self,
+        retry_count: int,
+        queue_wait: float = 0.0,
+        start_time: Optional[float] = None,
+        response=None,
+        error: Optional[Exception] = None,
+        cached: bool = False,
+    ):
+        """
+        Reports a completion attempt to the completion hooks, see `completion_hook`.
+        """
+        try:
+            usage = response["usage"]
+            prompt_tokens = usage["prompt_tokens"]
+            completion_tokens = usage["completion_tokens"]
+        except (KeyError, TypeError):
+            prompt_tokens = 0
+            completion_tokens = 0
+        emit_completion_event(
+            CompletionEvent(
+                model=self.model,
+                attempt=retry_count,
+                cached=cached,
+                queue_wait=queue_wait,
+                latency=time.time() - start_time if start_time is not None else 0.0,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                error=type(error).__name__ if error is not None else None,
+            )
+        )
+
+    def _record_usage(self, response, n_tokens_reserved: int):
+        """
+        Reports the tokens actually used by a response to the rate limiter.
+        """
+        try:
+            n_tokens_used = response["usage"]["total_tokens"]
+        except (KeyError, TypeError):
+            return
+        self.rate_limiter.record_usage(n_tokens_reserved, n_tokens_used)
 
     def get_completion_from_messages(
         self,
         messages,
         temperature: float = 0,
-        max_tokens: int = 2000,
+        max_tokens: Optional[int] = None,
         retry_count: int = 0,
+        use_cache: bool = True,
     ):
         """
         Fetches a completion response from OpenAI's ChatCompletion API based on the provided messages.
+
+        If a response cache is set, identical requests are served from the cache,
+        unless use_cache is False. max_tokens defaults to the max_tokens of the instance.
         """
+        max_tokens = self._fit_max_tokens(messages, max_tokens)
+        cache_key = self._get_cache_key(messages, temperature, max_tokens, use_cache)
+        if cache_key is not None:
+            cached_response = self.response_cache.get(cache_key)
+            if cached_response is not None:
+                self._emit_event(retry_count, cached=True)
+                return cached_response
+        if self.batch_collector is not None:
+            return self._collect_batch_request(
+                messages, temperature, max_tokens, cache_key
+            )
+        n_tokens_reserved = RateLimiter.estimate_tokens(messages, max_tokens)
+        queue_wait = 0.0
+        start_time = None
         try:
-            # Attempting to fetch a response from OpenAI
+            # Wait for the rate limiter, then fetch a response from the backend
+            queue_wait = self.rate_limiter.acquire(n_tokens_reserved)
             start_time = time.time()
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+            try:
+                response = self.backend.complete(
+                    self.model, messages, temperature, max_tokens
+                )
+            except Exception:
+                # A failed attempt uses no tokens: give back its reservation
+                self.rate_limiter.record_usage(n_tokens_reserved, 0)
+                raise
             end_time = time.time()
             response_time_ms = int((end_time - start_time) * 1000)
+            self._record_usage(response, n_tokens_reserved)
+            self._emit_event(retry_count, queue_wait, start_time, response=response)
 
             # Logging the response to Athina
-            if self.metadata is None:
-                environment = None
-                prompt_slug = None
-                customer_id = None
-                customer_user_id = None
-                external_reference_id = None
-                session_id = None
-            else:
-                environment = (
-                    self.metadata["environment"]
-                    if self.metadata["environment"] is not None
-                    else "default"
-                )
-                prompt_slug = (
-                    self.metadata["prompt_slug"]
-                    if self.metadata["prompt_slug"] is not None
-                    else "default"
-                )
-                customer_id = (self.metadata["customer_id"],)
-                customer_user_id = (self.metadata["customer_user_id"],)
-                external_reference_id = (self.metadata["external_reference_id"],)
-                session_id = (self.metadata["session_id"],)
-
-            if AthinaApiKey.get_api_key() is not None:
-                try:
-                    InferenceLogger.log_open_ai_chat_response(
-                        prompt_slug=prompt_slug,
-                        messages=messages,
-                        model=self.model,
-                        completion=response,
-                        context=None,
-                        response_time=response_time_ms,
-                        customer_id=customer_id,
-                        customer_user_id=customer_user_id,
-                        external_reference_id=external_reference_id,
-                        session_id=session_id,
-                        environment=environment,
-                    )
-                except Exception as e:
-                    print("Failed to log to Athina", e)
-
-        except openai.error.RateLimitError as e:
-            print("RateLimitError", e)
-            # Calculate the wait time using exponential backoff
-            base_wait_time = 15
-            max_retries = 3
-            wait_time = base_wait_time * (2**retry_count)
-
-            # Wait for the calculated wait time
-            time.sleep(wait_time)
+            self._log_to_athina(messages, response, response_time_ms)
 
-            if retry_count < max_retries:
-                return self.get_completion_from_messages(
-                    messages, temperature, max_tokens, retry_count + 1
-                )
-            else:
-                print("Max retries reached - unable to complete OpenAI request")
+        except (
+            openai.error.RateLimitError,
+            openai.error.Timeout,
+            openai.error.APIConnectionError,
+        ) as e:
+            self._emit_event(retry_count, queue_wait, start_time, error=e)
+            wait_time = self._get_retry_wait_time(e, retry_count)
+            if wait_time is None:
                 raise e
+            time.sleep(wait_time)
+            return self.get_completion_from_messages(
+                messages, temperature, max_tokens, retry_count + 1, use_cache
+            )
         except openai.error.AuthenticationError as e:
+            self._emit_event(retry_count, queue_wait, start_time, error=e)
             raise openai.error.AuthenticationError("Please pass a valid OpenAi key.")
-        except openai.error.Timeout as e:
-            print("Timeout", e)
-            # In case of a rate limit error, wait for 15 seconds and retry
-            time.sleep(15)
-            if retry_count < 3:
-                return self.get_completion_from_messages(
-                    messages, retry_count=retry_count + 1
-                )
-            else:
-                print("Max retries reached - unable to complete OpenAI request")
-                raise e
         except openai.error.InvalidRequestError as e:
+            self._emit_event(retry_count, queue_wait, start_time, error=e)
             print("InvalidRequestError", e)
             raise e
-        except openai.error.APIConnectionError as e:
-            # In case of a api connection error, wait for 60 seconds and retry
-            time.sleep(30)
-            print("APIConnectionError", e)
-            if retry_count < 3:
-                return self.get_completion_from_messages(
-                    messages, retry_count=retry_count + 1
+        except Exception as e:
+            self._emit_event(retry_count, queue_wait, start_time, error=e)
+            print("Exception", e)
+            traceback.print_exc()
+            return None
+        content = response["choices"][0]["message"]["content"]
+        if cache_key is not None:
+            self.response_cache.set(cache_key, content)
+        return content
+
+    async def aget_completion_from_messages(
+        self,
+        messages,
+        temperature: float = 0,
+        max_tokens: Optional[int] = None,
+        retry_count: int = 0,
+        use_cache: bool = True,
+    ):
+        """
+        Asynchronous counterpart of get_completion_from_messages.
+
+        Waits between retries without blocking the event loop. Requests share the
+        aiohttp session set by `pooled_aiosession`, if any.
+        """
+        max_tokens = self._fit_max_tokens(messages, max_tokens)
+        cache_key = self._get_cache_key(messages, temperature, max_tokens, use_cache)
+        if cache_key is not None:
+            cached_response = self.response_cache.get(cache_key)
+            if cached_response is not None:
+                self._emit_event(retry_count, cached=True)
+                return cached_response
+        if self.batch_collector is not None:
+            return self._collect_batch_request(
+                messages, temperature, max_tokens, cache_key
+            )
+        n_tokens_reserved = RateLimiter.estimate_tokens(messages, max_tokens)
+        queue_wait = 0.0
+        start_time = None
+        try:
+            # Wait for the rate limiter, then fetch a response from the backend
+            queue_wait = await self.rate_limiter.aacquire(n_tokens_reserved)
+            start_time = time.time()
+            try:
+                response = await self.backend.acomplete(
+                    self.model, messages, temperature, max_tokens
                 )
-            else:
-                print("Max retries reached - unable to complete OpenAI request")
+            except Exception:
+                # A failed attempt uses no tokens: give back its reservation
+                self.rate_limiter.record_usage(n_tokens_reserved, 0)
+                raise
+            end_time = time.time()
+            response_time_ms = int((end_time - start_time) * 1000)
+            self._record_usage(response, n_tokens_reserved)
+            self._emit_event(retry_count, queue_wait, start_time, response=response)
+
+            # Logging the response to Athina
+            await self._alog_to_athina(messages, response, response_time_ms)
+
+        except (
+            openai.error.RateLimitError,
+            openai.error.Timeout,
+            openai.error.APIConnectionError,
+        ) as e:
+            self._emit_event(retry_count, queue_wait, start_time, error=e)
+            wait_time = self._get_retry_wait_time(e, retry_count)
+            if wait_time is None:
                 raise e
+            await asyncio.sleep(wait_time)
+            return await self.aget_completion_from_messages(
+                messages, temperature, max_tokens, retry_count + 1, use_cache
+            )
+        except openai.error.AuthenticationError as e:
+            self._emit_event(retry_count, queue_wait, start_time, error=e)
+            raise openai.error.AuthenticationError("Please pass a valid OpenAi key.")
+        except openai.error.InvalidRequestError as e:
+            self._emit_event(retry_count, queue_wait, start_time, error=e)
+            print("InvalidRequestError", e)
+            raise e
         except Exception as e:
+            self._emit_event(retry_count, queue_wait, start_time, error=e)
             print("Exception", e)
             traceback.print_exc()
             return None
-        return response.choices[0].message["content"]
+        content = response["choices"][0]["message"]["content"]
+        if cache_key is not None:
+            self.response_cache.set(cache_key, content)
+        return content
 
     @staticmethod
     def _extract_json(data_string: str) -> str:
@@ -0,0 +1,96 @@
+import functools
+from string import Formatter
+from typing import Optional
+from .tokens import TOKENS_PER_MESSAGE, TOKENS_PER_REPLY, count_tokens
+
+
+class PromptTemplate:
+    """
+    A chat prompt compiled once: a system message, and a user message made of a static
+    prefix followed by the fields of each row.
+
+    The static fields of the user message template, such as the instructions and the
+    few-shot examples, are filled in when the template is compiled. They must all come
+    before the row fields, so that the system message and the prefix of the user message
+    are byte-identical across rows, and can be cached by the providers which cache prompt
+    prefixes. Each row is then rendered with a single join of the prefix, its fields and
+    the text between them.
+
+    Attributes:
+        system_message (str): Content of the system message.
+        prefix (str): Static start of the user message, up to the first row field.
+        row_fields (tuple): Names of the row fields, in order.
+        model (str): Model whose tokenizer counts the tokens of the prompt.
+    """
+
+    def __init__(
+        self,
+        system_message: str,
+        user_message_template: str,
+        static_fields: Optional[dict] = None,
+        model: str = "gpt-3.5-turbo",
+    ):
+        static_fields = static_fields or {}
+        self.system_message = system_message
+        self.model = model
+        prefix = []
+        row_fields = []
+        # Text following each row field
+        literals = []
+        for literal, field, _, _ in Formatter().parse(user_message_template):
+            if row_fields:
+                literals[-1] = literals[-1] + literal
+            else:
+                prefix.append(literal)
+            if field is None:
+                continue
+            if field in static_fields:
+                if row_fields:
+                    raise ValueError(
+                        f"Static field '{field}' must come before the row fields of the template."
+                    )
+                prefix.append(str(static_fields[field]))
+            elif field:
+                row_fields.append(field)
+                literals.append("")
+            else:
+                raise ValueError("Template fields must be named.")
+        self.prefix = "".join(prefix)
+        self.row_fields = tuple(row_fields)
+        self._literals = literals
+
+    def format(self, **fields) -> str:
+        """Returns the user message of a row, given the values of its fields."""
+        parts = [self.prefix]
+        for field, literal in zip(self.row_fields, self._literals):
+            parts.append(str(fields[field]))
+            parts.append(literal)
+        return "".join(parts)
+
+    def build_messages(self, **fields) -> list:
+        """Returns the chat messages of a row."""
+        return [
+            {"role": "system", "content": self.system_message},
+            {"role": "user", "content": self.format(**fields)},
+        ]
+
+    @functools.cached_property
+    def static_tokens(self) -> int:
+        """
+        Number of prompt tokens shared by every row: the system message, the prefix of the
+        user message, and the chat format overhead.
+        """
+        return (
+            TOKENS_PER_REPLY
+            + 2 * TOKENS_PER_MESSAGE
+            + count_tokens(self.system_message, self.model)
+            + count_tokens(self.prefix, self.model)
+        )
+
+    def count_tokens(self, **fields) -> int:
+        """
+        Returns the number of prompt tokens of a row. Only the part of the user message
+        after the prefix is tokenized, so the count may be off by a token at the boundary.
+        """
+        row_message = self.format(**fields)[len(self.prefix):]
+        return self.static_tokens + count_tokens(row_message, self.model)
@@ -1,5 +1,7 @@
 from typing import Optional
-from ..base_llm_evaluator import BaseLlmEvaluator
+from .batch_judge import BatchJudge
+from ..completion_backend import CompletionBackend
+from ..response_cache import ResponseCache
 
 
 class FewShotExampleAnswertRelevance:
@@ -47,7 +49,7 @@ class FewShotExampleAnswertRelevance:
         )
 
 
-class AnswerRelevance(BaseLlmEvaluator):
+class AnswerRelevance(BatchJudge):
     """
     This class determines whether the chatbot's response answers specifically what the user is asking about, and covers all aspects of the user's query
 
@@ -56,24 +58,30 @@ class AnswerRelevance(BaseLlmEvaluator):
         athina_api_key (str): API key for Athina.
         metadata (dict): Metadata for logging.
         examples (list[FewShotExampleFaithfulness]): List of few-shot examples used for evaluation.
+        prompt_template (PromptTemplate): Compiled prompt, with a static prefix shared by every row.
     """
 
+    BATCH_FIELDS = ("query", "response")
+    BATCH_CRITERION = "Determine if the response answers specifically what the user is asking about, and covers all aspects of the user's query."
+
     SYSTEM_MESSAGE_TEMPLATE = """ 
         You are an expert at evaluating whether a response answers a user's query sufficiently.
     """
 
     USER_MESSAGE_TEMPLATE = """
         Let's think step by step.
-        1. Consider the following: 
-        user's query: {}.
-        response:{}.
-        2. Make sure to also consider these instructions: {}
+        1. Consider the user's query and the response given at the end of this message.
+        2. Make sure to also consider these instructions: {additional_instructions}
         3. Determine if the response answers specifically what the user is asking about, and covers all aspects of the user's query.
         4. Provide a brief explanation of why the response does or does not answer the user's query sufficiently, labeled as 'explanation', leading up to a verdict (Yes/No) labeled as 'verdict'.
         5. Return a JSON object in the following format: "verdict": 'verdict', "explanation": 'explanation'.
 
         Here's are some examples: 
-        {}
+        {examples}
+
+        Now evaluate the following:
+        user's query: {query}.
+        response:{response}.
     """
 
     def __init__(
@@ -83,43 +91,59 @@ class AnswerRelevance(BaseLlmEvaluator):
         athina_api_key: Optional[str] = None,
         metadata: Optional[dict] = None,
         additional_instructions: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        max_batch_tokens: Optional[int] = None,
+        backend: Optional[CompletionBackend] = None,
     ):
         super().__init__(
             model,
             open_ai_key=open_ai_key,
             athina_api_key=athina_api_key,
             metadata=metadata,
+            response_cache=response_cache,
+            max_batch_tokens=max_batch_tokens,
+            backend=backend,
         )
         self.examples = self.get_few_shot_examples()
         self.additional_instructions = additional_instructions
+        self.compile_prompt_templates()
 
     def system_message(self):
         return self.SYSTEM_MESSAGE_TEMPLATE
 
-    def user_message(self, context, response):
-        if self.additional_instructions is None:
-            self.additional_instructions = ""
-        return self.USER_MESSAGE_TEMPLATE.format(
-            context, response, self.additional_instructions, self.examples
-        )
+    def user_message(self, query, response):
+        return self.prompt_template.format(query=query, response=response)
+
+    def build_messages(self, query: str, response: str):
+        """
+        Builds the messages sent to OpenAI's ChatCompletion API.
+        """
+        return self.prompt_template.build_messages(query=query, response=response)
 
     def evaluate(self, query: str, response: str):
         """
         Evaluation for is response faithful to context
         """
-        user_message = self.user_message(query, response)
-        system_message = self.system_message()
-        message = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_message},
-        ]
-
+        message = self.build_messages(query, response)
         openai_response = self.open_ai_completion.get_completion_from_messages(message)
         openai_response_json = self.open_ai_completion.extract_json_from_response(
             openai_response
         )
         return openai_response_json
 
+    async def aevaluate(self, query: str, response: str):
+        """
+        Asynchronous counterpart of evaluate.
+        """
+        message = self.build_messages(query, response)
+        openai_response = (
+            await self.open_ai_completion.aget_completion_from_messages(message)
+        )
+        openai_response_json = self.open_ai_completion.extract_json_from_response(
+            openai_response
+        )
+        return openai_response_json
+
     # Few shot examples
     @staticmethod
     def get_few_shot_examples():
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import warnings
+from typing import Optional
+from ..base_llm_evaluator import BaseLlmEvaluator
+from ..completion_backend import CompletionBackend
+from ..prompt_template import PromptTemplate
+from ..response_cache import ResponseCache
+from ..tokens import context_window, count_tokens
+
+# Prompt tokens kept free in a batch, for the ids and separators of its items
+BATCH_TOKENS_MARGIN = 50
+
+
+class BatchJudge(BaseLlmEvaluator):
+    """
+    Base class for the RAG judges, able to evaluate several instances in a single request.
+
+    A batch sends the system message, the instructions and the few-shot examples once,
+    followed by the items as a JSON array, and asks for a JSON array of verdicts keyed
+    by item id. Batches are split so that their items fit in `max_batch_tokens`, which
+    defaults to the room left in the model's context window by the static part of the
+    prompt and the completion. The items whose verdict is missing or malformed are
+    evaluated again one by one.
+
+    The prompts are compiled once into PromptTemplates by `compile_prompt_templates`,
+    which subclasses call at the end of their constructor.
+
+    Subclasses define `user_message`, `system_message` and `examples`, as well as:
+    - BATCH_FIELDS: the names of the arguments of `evaluate`, used as item keys.
+    - BATCH_CRITERION: the question the judge answers for each item.
+    """
+
+    BATCH_FIELDS = ()
+    BATCH_CRITERION = ""
+
+    BATCH_MESSAGE_TEMPLATE = """
+        Let's think step by step.
+        1. Consider the items given as a JSON array at the end of this message.
+        2. Make sure to also consider these instructions: {additional_instructions}
+        3. For each item independently: {criterion}
+        4. For each item, provide a brief explanation labeled as 'explanation', leading up to a verdict (Yes/No) labeled as 'verdict'.
+        5. Return a JSON object in the following format: {{"results": [{{"id": 'id of the item', "verdict": 'verdict', "explanation": 'explanation'}}]}}, with one result per item.
+
+        Here's are some examples:
+        {examples}
+
+        Items:
+        {items}
+    """
+
+    def __init__(
+        self,
+        model,
+        open_ai_key,
+        athina_api_key: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        response_cache: Optional[ResponseCache] = None,
+        max_batch_tokens: Optional[int] = None,
+        backend: Optional[CompletionBackend] = None,
+    ):
+        super().__init__(
+            model,
+            open_ai_key=open_ai_key,
+            athina_api_key=athina_api_key,
+            metadata=metadata,
+            response_cache=response_cache,
+            backend=backend,
+        )
+        self.max_batch_tokens = max_batch_tokens
+
+    def compile_prompt_template(self, user_message_template: str) -> PromptTemplate:
+        """
+        Compiles a user message template of the judge, with its instructions, criterion
+        and few-shot examples as static fields.
+        """
+        return PromptTemplate(
+            self.SYSTEM_MESSAGE_TEMPLATE,
+            user_message_template,
+            static_fields={
+                "additional_instructions": self.additional_instructions or "",
+                "criterion": self.BATCH_CRITERION,
+                "examples": self.examples,
+            },
+            model=self.open_ai_completion.model,
+        )
+
+    def compile_prompt_templates(self):
+        """Compiles the prompt templates of single and batched evaluations."""
+        self.prompt_template = self.compile_prompt_template(self.USER_MESSAGE_TEMPLATE)
+        self.batch_prompt_template = self.compile_prompt_template(
+            self.BATCH_MESSAGE_TEMPLATE
+        )
+        if self.max_batch_tokens is None:
+            self.max_batch_tokens = self.default_max_batch_tokens()
+
+    def default_max_batch_tokens(self) -> int:
+        """
+        Returns the number of prompt tokens left for the items of a batch in the model's
+        context window, once the static part of the prompt and the completion are counted.
+        """
+        return max(
+            context_window(self.open_ai_completion.model)
+            - self.open_ai_completion.max_tokens
+            - self.batch_prompt_template.static_tokens
+            - BATCH_TOKENS_MARGIN,
+            1,
+        )
+
+    def _count_item_tokens(self, item: dict) -> int:
+        """Counts the prompt tokens of an item, as rendered in the batch."""
+        return count_tokens(json.dumps(item, indent=1), self.open_ai_completion.model)
+
+    def split_batch(self, items: list) -> list:
+        """
+        Splits a list of items (tuples of evaluate arguments) into consecutive batches
+        whose size fits in max_batch_tokens. An item too large on its own forms a batch
+        by itself. Warns when the items do not fit in a single batch.
+        """
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for item in items:
+            n_tokens = self._count_item_tokens(dict(zip(self.BATCH_FIELDS, item)))
+            if batch and batch_tokens + n_tokens > self.max_batch_tokens:
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(item)
+            batch_tokens = batch_tokens + n_tokens
+        if batch:
+            batches.append(batch)
+        if len(batches) > 1:
+            warnings.warn(
+                f"A batch of {len(items)} items was split into {len(batches)} requests to fit "
+                f"in max_batch_tokens={self.max_batch_tokens}; lower batch_size or raise "
+                "max_batch_tokens to avoid it."
+            )
+        return batches
+
+    def build_batch_messages(self, items: list):
+        """
+        Builds the messages sent to OpenAI's ChatCompletion API to evaluate a batch of items.
+        """
+        batch_items = [
+            {"id": index, **dict(zip(self.BATCH_FIELDS, item))}
+            for index, item in enumerate(items)
+        ]
+        return self.batch_prompt_template.build_messages(
+            items=json.dumps(batch_items, indent=1)
+        )
+
+    @staticmethod
+    def parse_batch_response(openai_response_json, n_items: int) -> list:
+        """
+        Maps the verdicts of a batch response back to the items by id. Items without a
+        valid Yes/No verdict and an explanation are set to None.
+        """
+        evaluations = [None] * n_items
+        if not isinstance(openai_response_json, dict):
+            return evaluations
+        results = openai_response_json.get("results")
+        if not isinstance(results, list):
+            return evaluations
+        for result in results:
+            if not isinstance(result, dict) or "explanation" not in result:
+                continue
+            if str(result.get("verdict")).lower() not in ("yes", "no"):
+                continue
+            try:
+                index = int(result.get("id"))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < n_items:
+                evaluations[index] = {
+                    "verdict": result["verdict"],
+                    "explanation": result["explanation"],
+                }
+        return evaluations
+
+    def _evaluate_single_batch(self, items: list) -> list:
+        """Evaluates one batch, falling back to single calls for the unparsed items."""
+        if len(items) == 1:
+            return [self.evaluate(*items[0])]
+        message = self.build_batch_messages(items)
+        openai_response = self.open_ai_completion.get_completion_from_messages(message)
+        openai_response_json = self.open_ai_completion.extract_json_from_response(
+            openai_response
+        )
+        evaluations = self.parse_batch_response(openai_response_json, len(items))
+        return [
+            evaluation if evaluation is not None else self.evaluate(*item)
+            for item, evaluation in zip(items, evaluations)
+        ]
+
+    async def _aevaluate_single_batch(self, items: list) -> list:
+        """Asynchronous counterpart of _evaluate_single_batch."""
+        if len(items) == 1:
+            return [await self.aevaluate(*items[0])]
+        message = self.build_batch_messages(items)
+        openai_response = (
+            await self.open_ai_completion.aget_completion_from_messages(message)
+        )
+        openai_response_json = self.open_ai_completion.extract_json_from_response(
+            openai_response
+        )
+        evaluations = self.parse_batch_response(openai_response_json, len(items))
+        fallbacks = {
+            index: self.aevaluate(*item)
+            for index, (item, evaluation) in enumerate(zip(items, evaluations))
+            if evaluation is None
+        }
+        fallback_results = await asyncio.gather(*fallbacks.values())
+        for index, evaluation in zip(fallbacks, fallback_results):
+            evaluations[index] = evaluation
+        return evaluations
+
+    def evaluate_batch(self, items: list) -> list:
+        """
+        Evaluates a list of items, each a tuple of the arguments of evaluate, and returns
+        their evaluations in the same order.
+        """
+        evaluations = []
+        for batch in self.split_batch(items):
+            evaluations.extend(self._evaluate_single_batch(batch))
+        return evaluations
+
+    async def aevaluate_batch(self, items: list) -> list:
+        """
+        Asynchronous counterpart of evaluate_batch. The batches are sent concurrently.
+        """
+        batch_evaluations = await asyncio.gather(
+            *[self._aevaluate_single_batch(batch) for batch in self.split_batch(items)]
+        )
+        return [evaluation for batch in batch_evaluations for evaluation in batch]
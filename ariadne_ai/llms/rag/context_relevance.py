@@ -1,5 +1,7 @@
 from typing import Optional
-from ..base_llm_evaluator import BaseLlmEvaluator
+from .batch_judge import BatchJudge
+from ..completion_backend import CompletionBackend
+from ..response_cache import ResponseCache
 
 
 class FewShotExampleContextRelevance:
@@ -35,8 +37,19 @@ class FewShotExampleContextRelevance:
         self.eval_result = eval_result
         self.eval_reason = eval_reason
 
+    def __str__(self):
+        """
+        Return a string representation of the FewShotExample.
+        """
+        return (
+            f"Context: {self.context}\n"
+            f"Query: {self.query}\n"
+            f"{self.eval_function}: {self.eval_result}\n"
+            f"Reason:{self.eval_reason}"
+        )
 
-class ContextRelevance(BaseLlmEvaluator):
+
+class ContextRelevance(BatchJudge):
     """
     This class determines whether the chatbot's response can be inferred using only the information provided as context.
 
@@ -45,24 +58,30 @@ class ContextRelevance(BaseLlmEvaluator):
         athina_api_key (str): API key for Athina.
         metadata (dict): Metadata for logging.
         examples (list[FewShotExampleFaithfulness]): List of few-shot examples used for evaluation.
+        prompt_template (PromptTemplate): Compiled prompt, with a static prefix shared by every row.
     """
 
+    BATCH_FIELDS = ("query", "context")
+    BATCH_CRITERION = "Determine if the chatbot can answer the user's query with nothing but the \"context\" information provided to you."
+
     SYSTEM_MESSAGE_TEMPLATE = """
         You are an expert at evaluating whether a chatbot can answer a user's query using ONLY the information provided to you as context.
     """
 
     USER_MESSAGE_TEMPLATE = """
         Let's think step by step.
-        1. Consider the following: 
-        user's query: {}.
-        context:{}.
-        2. Make sure to also consider these instructions: {}
+        1. Consider the user's query and the context given at the end of this message.
+        2. Make sure to also consider these instructions: {additional_instructions}
         3. Determine if the chatbot can answer the user's query with nothing but the "context" information provided to you.
         4. Provide a brief explanation of why the context does or does not contain sufficient information, labeled as 'explanation', leading up to a verdict (Yes/No) labeled as 'verdict'.
         5. Return a JSON object in the following format: "verdict": 'verdict', "explanation": 'explanation'.
 
         Here's are some examples: 
-        {}
+        {examples}
+
+        Now evaluate the following:
+        user's query: {query}.
+        context:{context}.
     """
 
     def __init__(
@@ -72,6 +91,9 @@ class ContextRelevance(BaseLlmEvaluator):
         athina_api_key: Optional[str] = None,
         metadata: Optional[dict] = None,
         additional_instructions: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        max_batch_tokens: Optional[int] = None,
+        backend: Optional[CompletionBackend] = None,
     ):
         """
         Initialize the QuestionAnswerer class.
@@ -81,38 +103,50 @@ class ContextRelevance(BaseLlmEvaluator):
             open_ai_key=open_ai_key,
             athina_api_key=athina_api_key,
             metadata=metadata,
+            response_cache=response_cache,
+            max_batch_tokens=max_batch_tokens,
+            backend=backend,
         )
         self.examples = self.get_few_shot_examples()
         self.additional_instructions = additional_instructions
+        self.compile_prompt_templates()
 
     def system_message(self):
         return self.SYSTEM_MESSAGE_TEMPLATE
 
     def user_message(self, query, context):
-        if self.additional_instructions is None:
-            self.additional_instructions = ""
+        return self.prompt_template.format(query=query, context=context)
 
-        return self.USER_MESSAGE_TEMPLATE.format(
-            query, context, self.additional_instructions, self.examples
-        )
+    def build_messages(self, query: str, context: str):
+        """
+        Builds the messages sent to OpenAI's ChatCompletion API.
+        """
+        return self.prompt_template.build_messages(query=query, context=context)
 
     def evaluate(self, query: str, context: str):
         """
         Evaluation for is response faithful to context
         """
-        user_message = self.user_message(query, context)
-        system_message = self.system_message()
-        message = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_message},
-        ]
-
+        message = self.build_messages(query, context)
         openai_response = self.open_ai_completion.get_completion_from_messages(message)
         openai_response_json = self.open_ai_completion.extract_json_from_response(
             openai_response
         )
         return openai_response_json
 
+    async def aevaluate(self, query: str, context: str):
+        """
+        Asynchronous counterpart of evaluate.
+        """
+        message = self.build_messages(query, context)
+        openai_response = (
+            await self.open_ai_completion.aget_completion_from_messages(message)
+        )
+        openai_response_json = self.open_ai_completion.extract_json_from_response(
+            openai_response
+        )
+        return openai_response_json
+
     # Few shot examples
     @staticmethod
     def get_few_shot_examples():
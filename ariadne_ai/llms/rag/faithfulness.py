@@ -1,5 +1,18 @@
+import asyncio
+import functools
+import json
+import re
 from typing import Optional
-from ..base_llm_evaluator import BaseLlmEvaluator
+from .batch_judge import BatchJudge
+from ..completion_backend import CompletionBackend
+from ..response_cache import ResponseCache
+from ..tokens import (
+    COMPLETION_TOKENS_RESERVED,
+    MIN_CHUNK_TOKENS,
+    available_context_tokens,
+    count_tokens,
+    split_text,
+)
 
 
 class FewShotExampleFaithfulness:
@@ -35,34 +48,69 @@ class FewShotExampleFaithfulness:
         self.eval_result = eval_result
         self.eval_reason = eval_reason
 
+    def __str__(self):
+        """
+        Return a string representation of the FewShotExample.
+        """
+        return (
+            f"Context: {self.context}\n"
+            f"Response: {self.response}\n"
+            f"{self.eval_function}: {self.eval_result}\n"
+            f"Reason:{self.eval_reason}"
+        )
 
-class Faithfulness(BaseLlmEvaluator):
+
+class Faithfulness(BatchJudge):
     """
     This class determines whether the chatbot's answer hether the response can be inferred using only the information provided as context.
 
+    Contexts too long for the model's context window are split into chunks, evaluated in parallel
+    by the executor if any. The response is then split into statements, each judged against every
+    chunk: a statement is supported if any chunk supports it, and the response is faithful if all
+    its statements are. If the response leaves less than MIN_CHUNK_TOKENS for the context, the
+    instance is not evaluated.
+
     Attributes:
         open_ai_completion (OpenAICompletion): Instance for interactions with OpenAI's API.
         athina_api_key (str): API key for Athina.
         metadata (dict): Metadata for logging.
         examples (list[FewShotExampleFaithfulness]): List of few-shot examples used for evaluation.
+        executor (EvaluationExecutor, optional): Executor running the chunks of an instance concurrently.
+        prompt_template (PromptTemplate): Compiled prompt, with a static prefix shared by every row.
     """
 
+    BATCH_FIELDS = ("context", "response")
+    BATCH_CRITERION = "Determine if the response can be inferred from the context provided."
+
     SYSTEM_MESSAGE_TEMPLATE = """
         You are an expert at evaluating whether the response can be inferred using the information provided as context.
     """
 
     USER_MESSAGE_TEMPLATE = """
         Let's think step by step.
-        1. Consider the following: 
-        context: {}.
-        response:{}.
-        2. Make sure to also consider these instructions: {}
+        1. Consider the context and the response given at the end of this message.
+        2. Make sure to also consider these instructions: {additional_instructions}
         3. Determine if the response can be inferred from the context provided.
         4. Provide a brief explanation of what information the response contained that was not provided to it in the context, labeled as 'explanation', leading up to a verdict (Yes/No) labeled as 'verdict'.
         5. Return a JSON object in the following format: "verdict": 'verdict', "explanation": 'explanation'.
 
         Here's are some examples: 
-        {}
+        {examples}
+
+        Now evaluate the following:
+        context: {context}.
+        response:{response}.
+    """
+
+    CHUNK_USER_MESSAGE_TEMPLATE = """
+        Let's think step by step.
+        1. Consider the statements of a response and the context excerpt given at the end of this message.
+        2. Make sure to also consider these instructions: {additional_instructions}
+        3. For each statement, determine if it can be inferred from the context excerpt provided.
+        4. Return a JSON object in the following format: {{"statement id": 'verdict (Yes/No)', ...}}.
+
+        statements of the response: {statements}.
+        context excerpt: {chunk}.
     """
 
     def __init__(
@@ -72,40 +120,165 @@ class Faithfulness(BaseLlmEvaluator):
         athina_api_key: Optional[str] = None,
         metadata: Optional[dict] = None,
         additional_instructions: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        max_batch_tokens: Optional[int] = None,
+        backend: Optional[CompletionBackend] = None,
+        executor=None,
     ):
         super().__init__(
             model,
             open_ai_key=open_ai_key,
             athina_api_key=athina_api_key,
             metadata=metadata,
+            response_cache=response_cache,
+            max_batch_tokens=max_batch_tokens,
+            backend=backend,
         )
         self.examples = self.get_few_shot_examples()
         self.additional_instructions = additional_instructions
+        self.executor = executor
+        self.compile_prompt_templates()
+
+    def compile_prompt_templates(self):
+        """Compiles the prompt templates, including the one of the context chunks."""
+        super().compile_prompt_templates()
+        self.chunk_prompt_template = self.compile_prompt_template(
+            self.CHUNK_USER_MESSAGE_TEMPLATE
+        )
 
     # Pre-defined prompts for OpenAI's GPT model
     def system_message(self):
         return self.SYSTEM_MESSAGE_TEMPLATE
 
     def user_message(self, context, response):
-        if self.additional_instructions is None:
-            self.additional_instructions = ""
+        return self.prompt_template.format(context=context, response=response)
+
+    def build_messages(self, context: str, response: str):
+        """
+        Builds the messages sent to OpenAI's ChatCompletion API.
+        """
+        return self.prompt_template.build_messages(context=context, response=response)
 
-        return self.USER_MESSAGE_TEMPLATE.format(
-            context, response, self.additional_instructions, self.examples
+    @staticmethod
+    def split_statements(response: str) -> dict:
+        """
+        Splits a response into its sentences, numbered from 1.
+        """
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+", response.strip()) if s]
+        return {str(index + 1): sentence for index, sentence in enumerate(sentences)}
+
+    def build_chunk_messages(self, chunk: str, statements: dict):
+        """
+        Builds the messages evaluating the statements of a response against a context chunk.
+        """
+        return self.chunk_prompt_template.build_messages(
+            statements=json.dumps(statements), chunk=chunk
         )
 
-    def evaluate(self, context: str, response: str):
+    def split_context(self, context: str, response: str) -> list:
         """
-        Evaluation for is response faithful to context
+        Returns the context as a single chunk if the prompt fits in the model's context
+        window, or else split into chunks fitting in the chunk prompt. Returns None if the
+        chunks would be smaller than MIN_CHUNK_TOKENS.
+        """
+        model = self.open_ai_completion.model
+        max_tokens = min(self.open_ai_completion.max_tokens, COMPLETION_TOKENS_RESERVED)
+        budget = available_context_tokens(
+            model, self.build_messages("", response), max_tokens
+        )
+        if count_tokens(context, model) <= budget:
+            return [context]
+        statements = self.split_statements(response)
+        chunk_budget = available_context_tokens(
+            model, self.build_chunk_messages("", statements), max_tokens
+        )
+        if chunk_budget < MIN_CHUNK_TOKENS:
+            return None
+        return split_text(context, chunk_budget, model)
+
+    @staticmethod
+    def merge_chunk_evaluations(statements: dict, chunk_evaluations: list):
         """
-        user_message = self.user_message(context, response)
-        system_message = self.system_message()
-        message = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_message},
+        Merges the statement verdicts of every chunk: a statement is supported if any
+        chunk supports it, and the verdict is Yes only if every statement is supported.
+        Returns None if a chunk could not be evaluated.
+        """
+        if any(not isinstance(evaluation, dict) for evaluation in chunk_evaluations):
+            return None
+        unsupported = [
+            statement
+            for statement_id, statement in statements.items()
+            if not any(
+                str(evaluation.get(statement_id)).lower() == "yes"
+                for evaluation in chunk_evaluations
+            )
         ]
+        if not unsupported:
+            return {
+                "verdict": "Yes",
+                "explanation": "Every statement of the response is supported by the context.",
+            }
+        return {
+            "verdict": "No",
+            "explanation": "The context does not support the following statements: "
+            + " ".join(unsupported),
+        }
 
+    def _evaluate_chunk(self, chunk: str, statements: dict):
+        message = self.build_chunk_messages(chunk, statements)
         openai_response = self.open_ai_completion.get_completion_from_messages(message)
+        return self.open_ai_completion.extract_json_from_response(openai_response)
+
+    async def _aevaluate_chunk(self, chunk: str, statements: dict):
+        message = self.build_chunk_messages(chunk, statements)
+        openai_response = (
+            await self.open_ai_completion.aget_completion_from_messages(message)
+        )
+        return self.open_ai_completion.extract_json_from_response(openai_response)
+
+    def evaluate(self, context: str, response: str):
+        """
+        Evaluation for is response faithful to context
+        """
+        chunks = self.split_context(context, response)
+        if chunks is None:
+            print("The response leaves too little room for the context in the prompt")
+            return None
+        if len(chunks) > 1:
+            statements = self.split_statements(response)
+            calls = [
+                functools.partial(self._evaluate_chunk, chunk, statements) for chunk in chunks
+            ]
+            if self.executor is not None:
+                chunk_evaluations = self.executor.run_parallel(*calls)
+            else:
+                chunk_evaluations = [call() for call in calls]
+            return self.merge_chunk_evaluations(statements, chunk_evaluations)
+        message = self.build_messages(context, response)
+        openai_response = self.open_ai_completion.get_completion_from_messages(message)
+        openai_response_json = self.open_ai_completion.extract_json_from_response(
+            openai_response
+        )
+        return openai_response_json
+
+    async def aevaluate(self, context: str, response: str):
+        """
+        Asynchronous counterpart of evaluate.
+        """
+        chunks = self.split_context(context, response)
+        if chunks is None:
+            print("The response leaves too little room for the context in the prompt")
+            return None
+        if len(chunks) > 1:
+            statements = self.split_statements(response)
+            chunk_evaluations = await asyncio.gather(
+                *[self._aevaluate_chunk(chunk, statements) for chunk in chunks]
+            )
+            return self.merge_chunk_evaluations(statements, chunk_evaluations)
+        message = self.build_messages(context, response)
+        openai_response = (
+            await self.open_ai_completion.aget_completion_from_messages(message)
+        )
         openai_response_json = self.open_ai_completion.extract_json_from_response(
             openai_response
         )
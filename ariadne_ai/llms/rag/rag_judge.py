@@ -0,0 +1,201 @@
+import json
+from typing import Optional
+from ..base_llm_evaluator import BaseLlmEvaluator
+from ..completion_backend import CompletionBackend
+from ..prompt_template import PromptTemplate
+from ..response_cache import ResponseCache
+
+
+class FewShotExampleRagJudge:
+    """
+    Class represting an example of the combined evaluation that could be used for few-shot prompting.
+    """
+
+    # User's question
+    query: str
+    # Retrieved context
+    context: str
+    # Chatbot's response
+    response: str
+    # Evaluation result, mapping each criterion to its verdict and explanation
+    eval_result: dict
+
+    def __init__(self, query: str, context: str, response: str, eval_result: dict):
+        """
+        Initialize a new instance of FewShotExampleRagJudge.
+        """
+        self.query = query
+        self.context = context
+        self.response = response
+        self.eval_result = eval_result
+
+    def __str__(self):
+        """
+        Return a string representation of the FewShotExampleRagJudge.
+        """
+        return (
+            f"Query: {self.query}\n"
+            f"Context: {self.context}\n"
+            f"Response: {self.response}\n"
+            f"Result: {json.dumps(self.eval_result)}"
+        )
+
+
+class RagJudge(BaseLlmEvaluator):
+    """
+    This class evaluates a chatbot's response for faithfulness, context relevance and answer
+    relevance in a single call, so that the query, the context and the few-shot examples are
+    sent once instead of three times.
+
+    Each criterion is answered with the same verdict (Yes/No) and explanation as the
+    Faithfulness, ContextRelevance and AnswerRelevance evaluators, so that the results can be
+    scored with the same metrics.
+
+    Attributes:
+        open_ai_completion (OpenAICompletion): Instance for interactions with OpenAI's API.
+        athina_api_key (str): API key for Athina.
+        metadata (dict): Metadata for logging.
+        examples (str): Few-shot examples used for evaluation.
+        prompt_template (PromptTemplate): Compiled prompt, with a static prefix shared by every row.
+    """
+
+    CRITERIA = ["faithfulness", "context_relevance", "answer_relevance"]
+
+    SYSTEM_MESSAGE_TEMPLATE = """
+        You are an expert at evaluating the answers of a retrieval-augmented chatbot.
+    """
+
+    USER_MESSAGE_TEMPLATE = """
+        Let's think step by step.
+        1. Consider the user's query, the context and the response given at the end of this message.
+        2. Make sure to also consider these instructions: {additional_instructions}
+        3. Evaluate the three following criteria independently:
+        - faithfulness: Determine if the response can be inferred from the context provided.
+        - context_relevance: Determine if the chatbot can answer the user's query with nothing but the context provided.
+        - answer_relevance: Determine if the response answers specifically what the user is asking about, and covers all aspects of the user's query.
+        4. For each criterion, provide a brief explanation labeled as 'explanation', leading up to a verdict (Yes/No) labeled as 'verdict'.
+        5. Return a JSON object in the following format: {{"faithfulness": {{"verdict": 'verdict', "explanation": 'explanation'}}, "context_relevance": {{"verdict": 'verdict', "explanation": 'explanation'}}, "answer_relevance": {{"verdict": 'verdict', "explanation": 'explanation'}}}}.
+
+        Here's are some examples:
+        {examples}
+
+        Now evaluate the following:
+        user's query: {query}.
+        context: {context}.
+        response: {response}.
+    """
+
+    def __init__(
+        self,
+        model,
+        open_ai_key,
+        athina_api_key: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        additional_instructions: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        backend: Optional[CompletionBackend] = None,
+    ):
+        super().__init__(
+            model,
+            open_ai_key=open_ai_key,
+            athina_api_key=athina_api_key,
+            metadata=metadata,
+            response_cache=response_cache,
+            backend=backend,
+        )
+        self.examples = self.get_few_shot_examples()
+        self.additional_instructions = additional_instructions
+        self.prompt_template = PromptTemplate(
+            self.SYSTEM_MESSAGE_TEMPLATE,
+            self.USER_MESSAGE_TEMPLATE,
+            static_fields={
+                "additional_instructions": additional_instructions or "",
+                "examples": self.examples,
+            },
+            model=self.open_ai_completion.model,
+        )
+
+    def system_message(self):
+        return self.SYSTEM_MESSAGE_TEMPLATE
+
+    def user_message(self, query, context, response):
+        return self.prompt_template.format(query=query, context=context, response=response)
+
+    def build_messages(self, query: str, context: str, response: str):
+        """
+        Builds the messages sent to OpenAI's ChatCompletion API.
+        """
+        return self.prompt_template.build_messages(
+            query=query, context=context, response=response
+        )
+
+    @classmethod
+    def parse_response(cls, openai_response_json):
+        """
+        Checks that the response contains a Yes/No verdict and an explanation for every criterion.
+        Returns None otherwise, like an evaluation that failed.
+        """
+        if not isinstance(openai_response_json, dict):
+            return None
+        for criterion in cls.CRITERIA:
+            evaluation = openai_response_json.get(criterion)
+            if not isinstance(evaluation, dict):
+                return None
+            if "explanation" not in evaluation:
+                return None
+            if str(evaluation.get("verdict")).lower() not in ("yes", "no"):
+                return None
+        return openai_response_json
+
+    def evaluate(self, query: str, context: str, response: str):
+        """
+        Evaluation of the faithfulness, context relevance and answer relevance of a response
+        """
+        message = self.build_messages(query, context, response)
+        openai_response = self.open_ai_completion.get_completion_from_messages(message)
+        openai_response_json = self.open_ai_completion.extract_json_from_response(
+            openai_response
+        )
+        return self.parse_response(openai_response_json)
+
+    async def aevaluate(self, query: str, context: str, response: str):
+        """
+        Asynchronous counterpart of evaluate.
+        """
+        message = self.build_messages(query, context, response)
+        openai_response = (
+            await self.open_ai_completion.aget_completion_from_messages(message)
+        )
+        openai_response_json = self.open_ai_completion.extract_json_from_response(
+            openai_response
+        )
+        return self.parse_response(openai_response_json)
+
+    @staticmethod
+    def get_few_shot_examples():
+        """
+        Returns the few-shot examples.
+        """
+        example1 = FewShotExampleRagJudge(
+            query="How many companies has Y Combinator launched?",
+            context="Y Combinator is a startup accelerator launched in March 2005. It has been used to launch more than 4,000 companies",
+            response="125,000",
+            eval_result={
+                "faithfulness": {
+                    "verdict": "No",
+                    "explanation": "The context does not contain any information to substantiate the response.",
+                },
+                "context_relevance": {
+                    "verdict": "Yes",
+                    "explanation": "The context states how many companies Y Combinator has launched.",
+                },
+                "answer_relevance": {
+                    "verdict": "Yes",
+                    "explanation": "The response gives a number of companies, which is what the user asked for.",
+                },
+            },
+        )
+
+        # Joining the string representations of the instances
+        examples = "\n\n".join([str(example1)])
+        return examples
@@ -0,0 +1,234 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+
+def backoff_wait_time(retry_count: int, base_wait_time: float, max_wait_time: float) -> float:
+    """
+    Returns a jittered, capped exponential backoff.
+
+    Half of the delay is fixed and half is random, so that workers failing at the same
+    time do not retry at the same time.
+    """
+    wait_time = min(max_wait_time, base_wait_time * (2**retry_count))
+    return wait_time / 2 + random.uniform(0, wait_time / 2)
+
+
+def parse_reset_duration(value) -> Optional[float]:
+    """
+    Parses a rate-limit reset duration, such as '20ms', '1s', '6m0s' or '30', into seconds.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+class _TokenBucket:
+    """
+    A token bucket refilled continuously at `limit` units per minute.
+
+    The level may go negative: a reservation larger than the available capacity is
+    granted a wait time, and later reservations queue behind it.
+    """
+
+    def __init__(self, limit: Optional[float] = None):
+        self.limit = limit
+        self.level = limit
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.limit is None:
+            return
+        elapsed = now - self.updated_at
+        self.level = min(self.limit, self.level + elapsed * self.limit / 60)
+        self.updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes amount from the bucket and returns how long to wait before using it."""
+        if self.limit is None:
+            return 0
+        self._refill(now)
+        self.level -= amount
+        if self.level >= 0:
+            return 0
+        return -self.level * 60 / self.limit
+
+    def refund(self, amount: float, now: float):
+        """Gives back part of a reservation, for instance when fewer tokens were used."""
+        if self.limit is None:
+            return
+        self._refill(now)
+        self.level = min(self.limit, self.level + amount)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], now: float):
+        """Aligns the bucket with the limit and remaining capacity reported by the provider."""
+        if limit is not None and limit > 0:
+            if self.limit is None:
+                self.level = limit
+            self.limit = limit
+        if self.limit is None:
+            return
+        self._refill(now)
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """
+    A process-wide rate limiter tracking requests per minute and tokens per minute for a model.
+
+    Limits can be configured explicitly, or learned from the provider's rate-limit headers.
+    Until a limit is known, requests are not throttled.
+
+    Attributes:
+        requests_per_minute (float, optional): Maximum number of requests per minute.
+        tokens_per_minute (float, optional): Maximum number of tokens per minute.
+    """
+
+    _limiters = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        """
+        Initializes the limiter with optional requests and tokens per minute limits.
+        """
+        self._lock = threading.Lock()
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._paused_until = 0
+
+    @property
+    def requests_per_minute(self) -> Optional[float]:
+        return self._requests.limit
+
+    @property
+    def tokens_per_minute(self) -> Optional[float]:
+        return self._tokens.limit
+
+    @classmethod
+    def for_model(cls, model: str) -> "RateLimiter":
+        """
+        Returns the limiter shared by all the completions of a model in this process.
+        """
+        with cls._registry_lock:
+            if model not in cls._limiters:
+                cls._limiters[model] = cls()
+            return cls._limiters[model]
+
+    @classmethod
+    def configure(
+        cls,
+        model: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> "RateLimiter":
+        """
+        Sets the limits of a model, for instance from the quota of the account.
+        """
+        limiter = cls.for_model(model)
+        with limiter._lock:
+            now = time.monotonic()
+            limiter._requests.sync(requests_per_minute, None, now)
+            limiter._tokens.sync(tokens_per_minute, None, now)
+        return limiter
+
+    def reserve(self, n_tokens: int) -> float:
+        """
+        Reserves capacity for one request of n_tokens tokens, and returns the number
+        of seconds to wait before sending it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait_requests = self._requests.reserve(1, now)
+            wait_tokens = self._tokens.reserve(n_tokens, now)
+            wait_pause = self._paused_until - now
+        return max(0, wait_requests, wait_tokens, wait_pause)
+
+    def acquire(self, n_tokens: int) -> float:
+        """
+        Blocks until a request of n_tokens tokens can be sent. Returns the time waited.
+        """
+        wait_time = self.reserve(n_tokens)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    async def aacquire(self, n_tokens: int) -> float:
+        """
+        Asynchronous counterpart of acquire.
+        """
+        wait_time = self.reserve(n_tokens)
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        return wait_time
+
+    def record_usage(self, n_tokens_reserved: int, n_tokens_used: int):
+        """
+        Refunds the tokens that were reserved for a request but not used.
+        """
+        with self._lock:
+            self._tokens.refund(n_tokens_reserved - n_tokens_used, time.monotonic())
+
+    def pause(self, seconds: float):
+        """
+        Holds every request to this model for the given number of seconds.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers) -> Optional[float]:
+        """
+        Updates the limits from the provider's rate-limit headers, if present.
+
+        Returns the number of seconds the provider asked to wait (Retry-After), if any.
+        """
+        if not headers:
+            return None
+        headers = {str(key).lower(): value for key, value in dict(headers).items()}
+
+        def to_float(key):
+            try:
+                return float(headers[key])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        with self._lock:
+            now = time.monotonic()
+            self._requests.sync(
+                to_float("x-ratelimit-limit-requests"),
+                to_float("x-ratelimit-remaining-requests"),
+                now,
+            )
+            self._tokens.sync(
+                to_float("x-ratelimit-limit-tokens"),
+                to_float("x-ratelimit-remaining-tokens"),
+                now,
+            )
+        retry_after = parse_reset_duration(headers.get("retry-after"))
+        if retry_after is not None:
+            self.pause(retry_after)
+        return retry_after
+
+    @staticmethod
+    def estimate_tokens(messages, max_tokens: int) -> int:
+        """
+        Estimates the tokens a request counts against the quota: its prompt plus max_tokens.
+        """
+        n_characters = sum(len(message["content"]) for message in messages)
+        return n_characters // 4 + max_tokens
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class ResponseCache:
+    """
+    A persistent cache of LLM responses, stored in a SQLite database.
+
+    Responses are keyed by a hash of the request (model, messages, temperature and max_tokens),
+    so identical prompts are only paid for once across runs.
+
+    Attributes:
+        filename (str): Path of the SQLite database.
+        max_entries (int, optional): Maximum number of cached responses. The least recently
+            used responses are evicted first.
+        max_age_seconds (float, optional): Responses older than this are treated as missing
+            and evicted.
+    """
+
+    # Number of writes between two evictions
+    EVICTION_INTERVAL = 100
+
+    def __init__(
+        self,
+        filename: str = "data/cache/llm_responses.sqlite",
+        max_entries: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ):
+        """
+        Opens (or creates) the cache database.
+        """
+        self.filename = filename
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        directory_path = os.path.dirname(self.filename)
+        if directory_path and not os.path.exists(directory_path):
+            os.makedirs(directory_path)
+        self._lock = threading.Lock()
+        self._n_writes = 0
+        self._connection = sqlite3.connect(self.filename, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+        self.evict()
+
+    @staticmethod
+    def make_key(model: str, messages, temperature: float, max_tokens: int) -> str:
+        """
+        Returns the content hash identifying a request.
+        """
+        request = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        serialized = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response for a key, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self.max_age_seconds is not None and now - created_at > self.max_age_seconds:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Stores a response, and periodically evicts old entries.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._n_writes += 1
+            should_evict = self._n_writes % self.EVICTION_INTERVAL == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes expired responses, then the least recently used ones above max_entries.
+        """
+        with self._lock, self._connection:
+            if self.max_age_seconds is not None:
+                self._connection.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (time.time() - self.max_age_seconds,),
+                )
+            if self.max_entries is not None:
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        """
+        Removes all the cached responses.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
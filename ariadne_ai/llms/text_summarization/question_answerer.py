@@ -1,4 +1,16 @@
+import asyncio
+import functools
+from typing import Optional
 from ..open_ai_completion import OpenAICompletion
+from ..completion_backend import CompletionBackend
+from ..response_cache import ResponseCache
+from ..tokens import (
+    COMPLETION_TOKENS_RESERVED,
+    MIN_CHUNK_TOKENS,
+    available_context_tokens,
+    count_tokens,
+    split_text,
+)
 
 
 class QuestionAnswerer:
@@ -6,8 +18,14 @@ class QuestionAnswerer:
     This class determines whether the chatbot's answer was correct based on
     the given content and user's question.
 
+    Contexts too long for the model's context window are split into chunks, answered in
+    parallel by the executor if any. A definitive answer from any chunk wins over 'Unknown',
+    and 'Yes' wins over 'No', since a chunk may lack the passage that supports the question.
+    If the questions leave less than MIN_CHUNK_TOKENS for the context, they are not answered.
+
     Attributes:
         openAIcompletion (OpenAICompletion): Instance for interactions with OpenAI's API.
+        executor (EvaluationExecutor, optional): Executor running the chunks of a context concurrently.
     """
 
     # Pre-defined prompts for OpenAI's GPT model
@@ -25,11 +43,77 @@ class QuestionAnswerer:
         3. Return a JSON object in the following format: "question1": "answer1", "question2": "answer2",...
     """
 
-    def __init__(self, model, open_ai_key):
+    def __init__(
+        self,
+        model,
+        open_ai_key,
+        response_cache: Optional[ResponseCache] = None,
+        backend: Optional[CompletionBackend] = None,
+        executor=None,
+    ):
         """
         Initialize the QuestionAnswerer class.
         """
-        self.openAIcompletion = OpenAICompletion(model, open_ai_key)
+        self.openAIcompletion = OpenAICompletion(
+            model, open_ai_key, response_cache=response_cache, backend=backend
+        )
+        self.executor = executor
+
+    def build_messages(self, questions: str, context: str):
+        """
+        Builds the messages sent to OpenAI's ChatCompletion API.
+        """
+        user_message = self.USER_MESSAGE_TEMPLATE.format(questions, context)
+        return [
+            {"role": "system", "content": self.SYSTEM_MESSAGE},
+            {"role": "user", "content": user_message},
+        ]
+
+    def split_context(self, questions: str, context: str) -> list:
+        """
+        Splits the context into chunks, so that each prompt fits in the model's context window.
+        Returns None if the chunks would be smaller than MIN_CHUNK_TOKENS.
+        """
+        model = self.openAIcompletion.model
+        max_tokens = min(self.openAIcompletion.max_tokens, COMPLETION_TOKENS_RESERVED)
+        budget = available_context_tokens(
+            model, self.build_messages(questions, ""), max_tokens
+        )
+        if count_tokens(context, model) <= budget:
+            return [context]
+        if budget < MIN_CHUNK_TOKENS:
+            return None
+        return split_text(context, budget, model)
+
+    @staticmethod
+    def merge_chunk_answers(chunk_answers: list):
+        """
+        Merges the answers of every chunk, question by question: 'Yes' if any chunk
+        answers 'Yes', else 'No' if any chunk answers 'No', else 'Unknown'.
+        Returns None if a chunk could not be answered.
+        """
+        if any(not isinstance(answers, dict) for answers in chunk_answers):
+            return None
+        rank = {"yes": 2, "no": 1}
+        merged = {}
+        for answers in chunk_answers:
+            for question, answer in answers.items():
+                current_rank = rank.get(str(merged.get(question)).lower(), 0)
+                if question not in merged or rank.get(str(answer).lower(), 0) > current_rank:
+                    merged[question] = answer
+        return merged
+
+    def _answer_chunk(self, questions: str, context: str) -> dict:
+        message = self.build_messages(questions, context)
+        openai_response = self.openAIcompletion.get_completion_from_messages(message)
+        return self.openAIcompletion.extract_json_from_response(openai_response)
+
+    async def _aanswer_chunk(self, questions: str, context: str) -> dict:
+        message = self.build_messages(questions, context)
+        openai_response = await self.openAIcompletion.aget_completion_from_messages(
+            message
+        )
+        return self.openAIcompletion.extract_json_from_response(openai_response)
 
     def answer(self, questions: str, context: str) -> dict:
         """
@@ -43,12 +127,21 @@ class QuestionAnswerer:
             dict: Evaluation results formatted as a dictionary with questions as keys and
                   'Yes', 'No', or 'Unknown' as values.
         """
+        chunks = self.split_context(questions, context)
+        if chunks is None:
+            print("The questions leave too little room for the context in the prompt")
+            return None
+        if len(chunks) > 1:
+            calls = [
+                functools.partial(self._answer_chunk, questions, chunk) for chunk in chunks
+            ]
+            if self.executor is not None:
+                chunk_answers = self.executor.run_parallel(*calls)
+            else:
+                chunk_answers = [call() for call in calls]
+            return self.merge_chunk_answers(chunk_answers)
 
-        user_message = self.USER_MESSAGE_TEMPLATE.format(questions, context)
-        message = [
-            {"role": "system", "content": self.SYSTEM_MESSAGE},
-            {"role": "user", "content": user_message},
-        ]
+        message = self.build_messages(questions, context)
 
         openai_response = self.openAIcompletion.get_completion_from_messages(message)
         openai_response_json = self.openAIcompletion.extract_json_from_response(
@@ -56,3 +149,28 @@ class QuestionAnswerer:
         )
 
         return openai_response_json
+
+    async def aanswer(self, questions: str, context: str) -> dict:
+        """
+        Asynchronous counterpart of answer.
+        """
+        chunks = self.split_context(questions, context)
+        if chunks is None:
+            print("The questions leave too little room for the context in the prompt")
+            return None
+        if len(chunks) > 1:
+            chunk_answers = await asyncio.gather(
+                *[self._aanswer_chunk(questions, chunk) for chunk in chunks]
+            )
+            return self.merge_chunk_answers(chunk_answers)
+
+        message = self.build_messages(questions, context)
+
+        openai_response = await self.openAIcompletion.aget_completion_from_messages(
+            message
+        )
+        openai_response_json = self.openAIcompletion.extract_json_from_response(
+            openai_response
+        )
+
+        return openai_response_json
@@ -1,4 +1,7 @@
+from typing import Optional
 from ..open_ai_completion import OpenAICompletion
+from ..completion_backend import CompletionBackend
+from ..response_cache import ResponseCache
 
 class QuestionGenerator:
     """
@@ -21,12 +24,25 @@ class QuestionGenerator:
         3. Return a JSON object in the following format: "question 1": 'Your question', "question 2": 'Your next question', ...
     """
 
-    def __init__(self, model: str, n_questions: int, open_ai_key:str):
+    def __init__(self, model: str, n_questions: int, open_ai_key:str,
+                 response_cache: Optional[ResponseCache] = None,
+                 backend: Optional[CompletionBackend] = None):
         """
         Initialize the QuestionGenerator.
         """
         self.n_questions = n_questions
-        self.openAIcompletion = OpenAICompletion(model, open_ai_key)
+        self.openAIcompletion = OpenAICompletion(model, open_ai_key, response_cache=response_cache,
+                                                 backend=backend)
+
+    def build_messages(self, text: str):
+        """
+        Builds the messages sent to OpenAI's ChatCompletion API.
+        """
+        user_message = self.USER_MESSAGE_TEMPLATE.format(text, self.n_questions)
+        return [
+            {'role': 'system', 'content': self.SYSTEM_MESSAGE}, 
+            {'role': 'user', 'content': user_message}
+        ]
 
     def generate(self, text: str) -> dict:
         """
@@ -38,13 +54,20 @@ class QuestionGenerator:
         Returns:
             dict: A dictionary of generated questions with keys indicating the question order and values being the questions themselves.
         """
-        user_message = self.USER_MESSAGE_TEMPLATE.format(text, self.n_questions)
-        message = [
-            {'role': 'system', 'content': self.SYSTEM_MESSAGE}, 
-            {'role': 'user', 'content': user_message}
-        ]
+        message = self.build_messages(text)
 
         openai_response = self.openAIcompletion.get_completion_from_messages(message)
         openai_response_json = self.openAIcompletion.extract_json_from_response(openai_response)
 
         return openai_response_json
+
+    async def agenerate(self, text: str) -> dict:
+        """
+        Asynchronous counterpart of generate.
+        """
+        message = self.build_messages(text)
+
+        openai_response = await self.openAIcompletion.aget_completion_from_messages(message)
+        openai_response_json = self.openAIcompletion.extract_json_from_response(openai_response)
+
+        return openai_response_json
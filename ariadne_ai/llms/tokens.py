@@ -0,0 +1,145 @@
+import functools
+import re
+import threading
+
+# Context windows of the supported models, in tokens. Models are matched by longest prefix.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 4096,
+    "gpt-3.5-turbo-16k": 16385,
+    "gpt-3.5-turbo-1106": 16385,
+    "gpt-3.5-turbo-0125": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-1106-preview": 128000,
+    "gpt-4-0125-preview": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Smallest chunk a context is split into. When the rest of the prompt leaves less room
+# than this, the context is not split, since it would take too many requests.
+MIN_CHUNK_TOKENS = 256
+
+# Completion tokens kept free when fitting a context in a prompt: enough for the JSON
+# verdicts and answers of the evaluators. Requests lower their max_tokens to the room
+# actually left, so contexts are only split when the prompt itself cannot fit.
+COMPLETION_TOKENS_RESERVED = 500
+
+# Tokens added by the chat format around each message, and to prime the reply
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+_encoding_lock = threading.Lock()
+
+
+def context_window(model: str) -> int:
+    """
+    Returns the context window of a model, in tokens.
+    """
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def _get_encoding(model: str):
+    """
+    Returns the tiktoken encoding of a model, or None if tiktoken or the encoding
+    is unavailable, for instance when offline.
+    """
+    # Loading an encoding may download it: only let one thread try
+    with _encoding_lock:
+        return _load_encoding(model)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Counts the tokens of a text with the model's tokenizer, or estimates them at
+    about 4 characters per token if tiktoken is not available.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Counts the prompt tokens of chat messages, including the chat format overhead.
+    """
+    n_tokens = TOKENS_PER_REPLY
+    for message in messages:
+        n_tokens = n_tokens + TOKENS_PER_MESSAGE + count_tokens(message["content"], model)
+    return n_tokens
+
+
+def _split_long_text(text: str, max_tokens: int, model: str) -> list:
+    """
+    Splits a text without sentence boundaries into pieces of at most max_tokens tokens.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        size = max_tokens * 4
+        return [text[start : start + size] for start in range(0, len(text), size)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [
+        encoding.decode(tokens[start : start + max_tokens])
+        for start in range(0, len(tokens), max_tokens)
+    ]
+
+
+def split_text(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> list:
+    """
+    Splits a text into consecutive chunks of at most max_tokens tokens, cutting between
+    sentences whenever possible.
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1.")
+    if count_tokens(text, model) <= max_tokens:
+        return [text]
+    chunks = []
+    chunk = []
+    chunk_tokens = 0
+    for sentence in re.split(r"(?<=[.!?\n])\s+", text):
+        n_tokens = count_tokens(sentence, model) + 1
+        if n_tokens > max_tokens:
+            pieces = _split_long_text(sentence, max_tokens, model)
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            n_tokens = min(max_tokens, count_tokens(piece, model) + 1)
+            if chunk and chunk_tokens + n_tokens > max_tokens:
+                chunks.append(" ".join(chunk))
+                chunk = []
+                chunk_tokens = 0
+            chunk.append(piece)
+            chunk_tokens = chunk_tokens + n_tokens
+    if chunk:
+        chunks.append(" ".join(chunk))
+    return chunks
+
+
+def available_context_tokens(
+    model: str, messages, max_tokens: int, margin: int = 50
+) -> int:
+    """
+    Returns the number of tokens left for a context in a prompt, given the messages of the
+    prompt without the context and the number of tokens reserved for the completion.
+    """
+    return context_window(model) - count_message_tokens(messages, model) - max_tokens - margin
@@ -1,5 +1,130 @@
 from abc import ABC, abstractmethod
+import gzip
+import io
 import json
+import os
+
+
+def open_text_file(filename: str):
+    """
+    Opens a text file for reading, decompressing it on the fly if it ends with '.gz' or '.zst'.
+
+    Raises:
+        ImportError: If the file is zstd-compressed and the zstandard package is not installed.
+    """
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt", encoding="utf-8")
+    if filename.endswith((".zst", ".zstd")):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "Reading zstd-compressed files requires the zstandard package: pip install zstandard"
+            )
+        raw_file = open(filename, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw_file, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(filename, "r", encoding="utf-8")
+
+
+def iter_jsonl(filename: str):
+    """
+    Yields the records of a JSON Lines file one by one, skipping blank lines.
+    """
+    with open_text_file(filename) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_dataframe(df, columns: list, chunksize: int = 10000):
+    """
+    Yields the rows of a pandas DataFrame as records, restricted to the given columns
+    when present. Rows are converted chunk by chunk, and missing values become None.
+    """
+    df = df[[column for column in columns if column in df.columns]]
+    for start in range(0, len(df), chunksize):
+        chunk = df.iloc[start : start + chunksize]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield from chunk.to_dict("records")
+
+
+def iter_csv(filename: str, columns: list, chunksize: int = 10000):
+    """
+    Yields the records of a CSV file, optionally compressed, reading it in chunks.
+
+    Only the given columns are parsed; the others are skipped by the reader. Empty cells
+    become None, while texts such as 'NA' are kept as is.
+    """
+    import pandas as pd
+
+    reader = pd.read_csv(
+        filename,
+        usecols=lambda column: column in columns,
+        chunksize=chunksize,
+        keep_default_na=False,
+        na_values=[""],
+    )
+    with reader:
+        for chunk in reader:
+            yield from iter_dataframe(chunk, columns, chunksize)
+
+
+def iter_parquet(filename: str, columns: list, chunksize: int = 10000):
+    """
+    Yields the records of a Parquet file, or of an Arrow IPC (Feather) file ending with
+    '.arrow' or '.feather', reading it in batches.
+
+    Only the given columns are read. The file is memory-mapped, so the batches are not
+    copied in memory until they are converted to records.
+
+    Raises:
+        ImportError: If the pyarrow package is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Reading Parquet and Arrow files requires the pyarrow package: pip install pyarrow"
+        )
+    if filename.endswith((".arrow", ".feather")):
+        with pyarrow.memory_map(filename, "r") as source:
+            table = pyarrow.ipc.open_file(source).read_all()
+            table = table.select([c for c in columns if c in table.column_names])
+            for batch in table.to_batches(max_chunksize=chunksize):
+                yield from batch.to_pylist()
+        return
+    parquet_file = pyarrow.parquet.ParquetFile(filename, memory_map=True)
+    names = parquet_file.schema_arrow.names
+    for batch in parquet_file.iter_batches(
+        batch_size=chunksize, columns=[c for c in columns if c in names]
+    ):
+        yield from batch.to_pylist()
+
+
+class StreamingDataset:
+    """
+    A processed dataset read lazily from a JSON Lines file.
+
+    Each iteration re-reads the file, so only one instance, or one chunk of a CSV or
+    Parquet file, is held in memory at a time.
+
+    Attributes:
+        filename (str): The JSON Lines file, optionally gzip or zstd compressed.
+        process_instance (callable): Function turning a raw instance into a processed one.
+        read (callable): Function yielding the raw instances of the file, iter_jsonl by default.
+    """
+
+    def __init__(self, filename: str, process_instance, read=iter_jsonl):
+        self.filename = filename
+        self.process_instance = process_instance
+        self.read = read
+
+    def __iter__(self):
+        for raw_instance in self.read(self.filename):
+            yield self.process_instance(raw_instance)
 
 
 class Loader(ABC):
@@ -14,3 +139,88 @@ class Loader(ABC):
     def process(self) -> None:
         """Prepare dataset to be consumed by evaluators."""
         pass
+
+    @abstractmethod
+    def columns(self) -> list:
+        """Returns the columns of the raw dataset used by the loader."""
+        pass
+
+    def _load_records(self, filename: str, read) -> None:
+        """
+        Loads and processes the records yielded by read(filename), one at a time, replacing
+        the dataset of a previous load.
+
+        Only the processed dataset is kept in memory, not the raw records. In streaming mode,
+        the processed dataset reads the file lazily instead.
+        """
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"File '{filename}' not found.")
+        self._raw_dataset = {}
+        if self.streaming:
+            self._processed_dataset = StreamingDataset(filename, self.process_instance, read)
+            return
+        self._processed_dataset = [
+            self.process_instance(raw_instance) for raw_instance in read(filename)
+        ]
+
+    def load_csv(self, filename: str, chunksize: int = 10000) -> None:
+        """
+        Loads and processes data from a CSV file, optionally compressed, in chunks of
+        chunksize rows. Only the columns of the loader are parsed.
+
+        Raises:
+            FileNotFoundError: If the specified CSV file is not found.
+            KeyError: If mandatory columns are missing in the file.
+        """
+        columns = self.columns()
+        self._load_records(
+            filename, lambda filename: iter_csv(filename, columns, chunksize)
+        )
+
+    def load_parquet(self, filename: str, chunksize: int = 10000) -> None:
+        """
+        Loads and processes data from a memory-mapped Parquet or Arrow IPC file, in batches
+        of chunksize rows. Only the columns of the loader are read.
+
+        Raises:
+            FileNotFoundError: If the specified file is not found.
+            ImportError: If the pyarrow package is not installed.
+            KeyError: If mandatory columns are missing in the file.
+        """
+        columns = self.columns()
+        self._load_records(
+            filename, lambda filename: iter_parquet(filename, columns, chunksize)
+        )
+
+    def load_pandas(self, df, chunksize: int = 10000) -> None:
+        """
+        Loads and processes data from a pandas DataFrame, converting chunksize rows at a time,
+        replacing the dataset of a previous load. Only the columns of the loader are converted.
+
+        Raises:
+            KeyError: If mandatory columns are missing in the DataFrame.
+        """
+        self._raw_dataset = {}
+        self._processed_dataset = [
+            self.process_instance(raw_instance)
+            for raw_instance in iter_dataframe(df, self.columns(), chunksize)
+        ]
+
+    def load_jsonl(self, filename: str) -> None:
+        """
+        Loads and processes data from a JSON Lines file, optionally gzip or zstd compressed.
+
+        In streaming mode, the processed dataset is an iterable reading the file lazily,
+        instead of a list, and the columns and JSON of each instance are validated when it is
+        read. Otherwise the dataset of a previous load is replaced.
+
+        Raises:
+            FileNotFoundError: If the specified JSON Lines file is not found.
+            json.JSONDecodeError: If there's an issue decoding a line.
+        """
+        if self.streaming:
+            self._load_records(filename, iter_jsonl)
+            return
+        self._raw_dataset = list(iter_jsonl(filename))
+        self._processed_dataset = []
+        self.process()
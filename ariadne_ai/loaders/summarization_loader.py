@@ -13,11 +13,15 @@ class SummarizationLoader(Loader):
         col_comment (str, optional): Column name corresponding to additional comments, if any.
         raw_dataset (dict): Raw dataset as loaded from the source.
         processed_dataset (list): Processed dataset with documents, summaries, and other attributes if present.
+            In streaming mode, an iterable reading the instances lazily.
     """
     
     def __init__(self, col_document='document', col_summary='summary', 
-                 col_label=None, col_comment=None, format = 'json'):
-        """ Initializes the loader with specified or default column names."""
+                 col_label=None, col_comment=None, format = 'json', streaming = False):
+        """
+        Initializes the loader with specified or default column names.
+        If streaming is True, JSON Lines files are read lazily instead of being loaded in memory.
+        """
         self.col_document = col_document
         self.col_summary = col_summary
         self.col_label = col_label
@@ -25,6 +29,7 @@ class SummarizationLoader(Loader):
         self._raw_dataset = {}
         self._processed_dataset = []
         self.format = format
+        self.streaming = streaming
 
     @property
     def processed_dataset(self):
@@ -36,6 +41,41 @@ class SummarizationLoader(Loader):
         """ Returns the raw dataset."""
         return self._raw_dataset
 
+    def process_instance(self, raw_instance: dict) -> dict:
+        """
+        Extracts the attributes of a single raw instance.
+
+        Raises:
+            KeyError: If mandatory columns (document or summary) are missing in the raw instance.
+        """
+        # Check for mandatory columns in raw_instance
+        if self.col_document not in raw_instance:
+            raise KeyError(f"'{self.col_document}' not found in provided data.")
+        if self.col_summary not in raw_instance:
+            raise KeyError(f"'{self.col_summary}' not found in provided data.")
+        # Create a processed instance with mandatory fields
+        processed_instance = {
+            'document': raw_instance[self.col_document],
+            'summary': raw_instance[self.col_summary]
+        }
+
+       # Add optional attributes if they exist
+        if self.col_label is not None and self.col_label in raw_instance:
+            processed_instance['label'] = raw_instance[self.col_label]
+        if self.col_comment is not None and self.col_comment in raw_instance:
+            processed_instance['comment'] = raw_instance[self.col_comment]
+        return processed_instance
+
+    def columns(self) -> list:
+        """
+        Returns the columns of the raw dataset used by the loader.
+        """
+        columns = [self.col_document, self.col_summary]
+        for column in [self.col_label, self.col_comment]:
+            if column is not None:
+                columns.append(column)
+        return columns
+
     def process(self) -> None:
         """
         Transforms the raw data into a structured format. Processes each entry from the raw dataset, and extracts attributes
@@ -45,25 +85,8 @@ class SummarizationLoader(Loader):
             KeyError: If optional columns (label or comment) are missing in the raw dataset if defined.
         """
         for raw_instance in self._raw_dataset:
-            # Check for mandatory columns in raw_instance
-            if self.col_document not in raw_instance:
-                raise KeyError(f"'{self.col_document}' not found in provided data.")
-            if self.col_summary not in raw_instance:
-                raise KeyError(f"'{self.col_summary}' not found in provided data.")
-            # Create a processed instance with mandatory fields
-            processed_instance = {
-                'document': raw_instance[self.col_document],
-                'summary': raw_instance[self.col_summary]
-            }
-
-           # Add optional attributes if they exist
-            if self.col_label is not None and self.col_label in raw_instance:
-                processed_instance['label'] = raw_instance[self.col_label]
-            if self.col_comment is not None and self.col_comment in raw_instance:
-                processed_instance['comment'] = raw_instance[self.col_comment]
-
             # Store the results
-            self._processed_dataset.append(processed_instance)
+            self._processed_dataset.append(self.process_instance(raw_instance))
 
     def load_json(self, filename: str) -> None:
         """
@@ -99,28 +122,15 @@ class SummarizationLoader(Loader):
         """" """
         if self.format == 'json':
             self.load_json(data)
+        elif self.format == 'jsonl':
+            self.load_jsonl(data)
         elif self.format == 'dict':
             self.load_dict(data)
+        elif self.format == 'csv':
+            self.load_csv(data)
+        elif self.format in ['parquet', 'arrow']:
+            self.load_parquet(data)
+        elif self.format == 'pandas':
+            self.load_pandas(data)
         else:
             raise NotImplementedError("This file format has not been supported yet.")
-    
-        
-    def load_csv(self) -> None:
-        """
-        Placeholder for loading data from a CSV file.
-
-        Raises:
-            NotImplementedError: This method has not been implemented yet.
-        """
-        raise NotImplementedError("This method has not been implemented yet.")
-
-    def load_pandas(self) -> None:
-        """
-        Placeholder for loading data from a pandas DataFrame.
-
-        Raises:
-            NotImplementedError: This method has not been implemented yet.
-        """
-        raise NotImplementedError("This method has not been implemented yet.")
-
-   
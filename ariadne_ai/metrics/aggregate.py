@@ -0,0 +1,241 @@
+import math
+from statistics import NormalDist
+from typing import Iterable, Optional
+
+
+def _wilson_interval(p: float, n: int, z: float) -> tuple:
+    """Returns the Wilson score interval of a proportion p observed over n trials."""
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half_width = z / denominator * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    return center - half_width, center + half_width
+
+
+class MetricAggregate:
+    """
+    Streaming, mergeable summary of the scores of a metric for one label.
+
+    Keeps the count and the sum of the scores, the sum of squared deviations from the mean
+    with Welford's algorithm, the minimum and maximum, and a merging t-digest for
+    approximate quantiles. Aggregates of partial runs, such as shards, can be merged in any
+    order, and serialized to JSON.
+
+    Attributes:
+        count (int): Number of scores.
+        total (float): Sum of the scores.
+        m2 (float): Sum of the squared deviations from the mean.
+        min (float): Smallest score.
+        max (float): Largest score.
+        compression (int): Size parameter of the t-digest; more centroids give more
+            accurate quantiles.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.count = 0
+        self.total = 0
+        self.m2 = 0.0
+        # Running mean of Welford's algorithm
+        self._mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.compression = compression
+        # Centroids of the t-digest as [mean, weight], sorted by mean
+        self._centroids = []
+        self._buffer = []
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], **kwargs) -> "MetricAggregate":
+        """Returns the aggregate of a sequence of scores."""
+        aggregate = cls(**kwargs)
+        for value in values:
+            aggregate.add(value)
+        return aggregate
+
+    @classmethod
+    def from_array(cls, values, **kwargs) -> "MetricAggregate":
+        """
+        Returns the aggregate of a NumPy array of scores, computed in a vectorized way.
+        The t-digest starts from the distinct scores, which are few for most metrics.
+        """
+        import numpy as np
+
+        aggregate = cls(**kwargs)
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return aggregate
+        aggregate.count = len(values)
+        aggregate.total = values.sum().item()
+        aggregate._mean = values.mean().item()
+        aggregate.m2 = ((values - aggregate._mean) ** 2).sum().item()
+        aggregate.min = values.min().item()
+        aggregate.max = values.max().item()
+        distinct_values, counts = np.unique(values, return_counts=True)
+        aggregate._centroids = [
+            [value, count] for value, count in zip(distinct_values.tolist(), counts.tolist())
+        ]
+        aggregate._compress(force=True)
+        return aggregate
+
+    def add(self, value: float):
+        """Adds a score."""
+        self.count = self.count + 1
+        self.total = self.total + value
+        value = float(value)
+        delta = value - self._mean
+        self._mean = self._mean + delta / self.count
+        self.m2 = self.m2 + delta * (value - self._mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._buffer.append(value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "MetricAggregate") -> "MetricAggregate":
+        """Adds the scores summarized by another aggregate, and returns self."""
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean = self._mean + delta * other.count / count
+        self.m2 = self.m2 + other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total = self.total + other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        other._compress()
+        self._centroids = self._centroids + other._centroids
+        self._compress(force=True)
+        return self
+
+    @classmethod
+    def merge_moments(cls, aggregates: Iterable["MetricAggregate"]) -> "MetricAggregate":
+        """
+        Returns the count, mean, variance and range of several aggregates merged, without
+        their quantiles. Cheap enough to be called after every score, such as for early stopping.
+        """
+        merged = cls()
+        for other in aggregates:
+            if other.count == 0:
+                continue
+            count = merged.count + other.count
+            delta = other._mean - merged._mean
+            merged._mean = merged._mean + delta * other.count / count
+            merged.m2 = merged.m2 + other.m2 + delta * delta * merged.count * other.count / count
+            merged.count = count
+            merged.total = merged.total + other.total
+            merged.min = min(merged.min, other.min)
+            merged.max = max(merged.max, other.max)
+        return merged
+
+    def _compress(self, force: bool = False):
+        """Merges the buffered scores into the centroids of the t-digest."""
+        if not self._buffer and not force:
+            return
+        points = sorted(self._centroids + [[value, 1] for value in self._buffer])
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+        centroids = []
+        cumulative = 0.0
+        for mean, weight in points:
+            if centroids:
+                last = centroids[-1]
+                q = (cumulative + last[1] + weight / 2) / total
+                # Centroids are kept small at the tails, where quantiles need precision
+                if last[1] + weight <= max(1, 4 * total * q * (1 - q) / self.compression):
+                    last[0] = last[0] + (mean - last[0]) * weight / (last[1] + weight)
+                    last[1] = last[1] + weight
+                    continue
+                cumulative = cumulative + last[1]
+            centroids.append([mean, weight])
+        self._centroids = centroids
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean of the scores, or None without scores."""
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance of the scores, or None with fewer than two scores."""
+        if self.count < 2:
+            return None
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self) -> Optional[float]:
+        """Sample standard deviation of the scores."""
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+    def confidence_interval(self, confidence: float = 0.95) -> Optional[tuple]:
+        """
+        Returns the confidence interval of the mean, or None with fewer than two scores.
+
+        Scores between 0 and 1, such as the failure metrics, get the Wilson score interval,
+        which keeps a positive width when every score so far is the same, as happens for
+        rare failures. Other scores get the normal-approximation interval.
+        """
+        if self.count < 2:
+            return None
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        if self.min >= 0 and self.max <= 1:
+            return _wilson_interval(self.mean, self.count, z)
+        half_width = z * math.sqrt(self.variance / self.count)
+        return self.mean - half_width, self.mean + half_width
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns the approximate q-quantile (0-1) of the scores."""
+        if self.count == 0:
+            return None
+        self._compress()
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        target = q * self.count
+        cumulative = 0.0
+        previous_mean, previous_position = self.min, 0.0
+        for mean, weight in self._centroids:
+            position = cumulative + weight / 2
+            if target <= position:
+                span = position - previous_position
+                fraction = (target - previous_position) / span if span > 0 else 0
+                return previous_mean + (mean - previous_mean) * fraction
+            cumulative = cumulative + weight
+            previous_mean, previous_position = mean, position
+        return previous_mean + (self.max - previous_mean) * (
+            (target - previous_position) / max(self.count - previous_position, 1e-12)
+        )
+
+    def to_dict(self) -> dict:
+        """Returns the aggregate as a JSON-serializable dict."""
+        self._compress()
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self._mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "compression": self.compression,
+            "centroids": self._centroids,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MetricAggregate":
+        """Restores an aggregate serialized with to_dict."""
+        aggregate = cls(compression=data["compression"])
+        aggregate.count = data["count"]
+        aggregate.total = data["total"]
+        aggregate._mean = data["mean"]
+        aggregate.m2 = data["m2"]
+        if data["count"]:
+            aggregate.min = data["min"]
+            aggregate.max = data["max"]
+        aggregate._centroids = [list(centroid) for centroid in data["centroids"]]
+        return aggregate
+
+    def __repr__(self):
+        return f"MetricAggregate(count={self.count}, mean={self.mean})"
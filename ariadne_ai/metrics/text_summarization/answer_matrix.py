@@ -0,0 +1,127 @@
+import numpy as np
+
+# Codes of the normalized answers. Other answers get codes from OTHER upwards, one per
+# distinct normalized string, so that agreement stays an exact string comparison.
+PAD = -1
+UNKNOWN = 0
+YES = 1
+NO = 2
+OTHER = 3
+
+
+class AnswerMatrix:
+    """
+    Answers of many instances to their questions, normalized once into two small integer
+    matrices of shape (instances, questions), based on the document and on the summary.
+
+    The summarization metrics are computed for every instance in one vectorized pass,
+    with the same results as the metric classes. Rows with fewer answers are padded with
+    PAD, which never counts towards a metric.
+
+    Attributes:
+        answers_src (np.ndarray): Codes of the answers based on the source document.
+        answers_sum (np.ndarray): Codes of the answers based on the summary.
+    """
+
+    def __init__(self, answers_src: np.ndarray, answers_sum: np.ndarray):
+        self.answers_src = answers_src
+        self.answers_sum = answers_sum
+
+    @classmethod
+    def from_answers(cls, answers_src_list, answers_sum_list) -> "AnswerMatrix":
+        """
+        Builds the matrix from the answer dicts of each instance, in question order.
+
+        Each distinct raw answer is normalized with strip and lower only once.
+        """
+        vocabulary = {"unknown": UNKNOWN, "yes": YES, "no": NO}
+        codes_by_answer = {}
+
+        def encode(answers):
+            codes = []
+            for answer in answers.values():
+                code = codes_by_answer.get(answer)
+                if code is None:
+                    normalized = answer.strip().lower()
+                    code = vocabulary.setdefault(normalized, OTHER + len(vocabulary) - 3)
+                    codes_by_answer[answer] = code
+                codes.append(code)
+            return codes
+
+        codes_src, codes_sum, lengths = [], [], []
+        for answers_src, answers_sum in zip(answers_src_list, answers_sum_list):
+            row_src = encode(answers_src)
+            row_sum = encode(answers_sum)
+            # Answers are compared pairwise, as zip does in the metric classes
+            length = min(len(row_src), len(row_sum))
+            codes_src.extend(row_src[:length])
+            codes_sum.extend(row_sum[:length])
+            lengths.append(length)
+
+        dtype = np.int16 if len(vocabulary) < 2**15 else np.int32
+        lengths = np.asarray(lengths, dtype=np.int64)
+        width = int(lengths.max()) if len(lengths) else 0
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        offsets = np.cumsum(lengths) - lengths
+        cols = np.arange(len(codes_src)) - np.repeat(offsets, lengths)
+        matrices = []
+        for codes in [codes_src, codes_sum]:
+            matrix = np.full((len(lengths), width), PAD, dtype=dtype)
+            matrix[rows, cols] = np.asarray(codes, dtype=dtype)
+            matrices.append(matrix)
+        return cls(*matrices)
+
+    def __len__(self):
+        return self.answers_src.shape[0]
+
+    def _is_answered(self, answers):
+        return (answers == YES) | (answers == NO)
+
+    def agreement_counts(self) -> np.ndarray:
+        valid = self.answers_src != PAD
+        return ((self.answers_src == self.answers_sum) & valid).sum(axis=1)
+
+    def hallucination_counts(self) -> np.ndarray:
+        return (
+            (self.answers_src == UNKNOWN) & self._is_answered(self.answers_sum)
+        ).sum(axis=1)
+
+    def contradiction_counts(self) -> np.ndarray:
+        return (
+            self._is_answered(self.answers_src) & (self.answers_src != self.answers_sum)
+        ).sum(axis=1)
+
+    def non_informativeness_counts(self) -> np.ndarray:
+        return (
+            (self.answers_sum == UNKNOWN) & self._is_answered(self.answers_src)
+        ).sum(axis=1)
+
+    def compute(self, metric: str, n_questions: int) -> np.ndarray:
+        """
+        Returns the scores of a metric for every instance, as returned by its metric class.
+        """
+        if metric == "agreement_score":
+            return self.agreement_counts() / n_questions
+        if metric == "hallucination_failure":
+            return self.hallucination_counts() / n_questions
+        if metric == "contradiction_failure":
+            return self.contradiction_counts() / n_questions
+        if metric == "informativeness_failure":
+            return (self.non_informativeness_counts() > 0).astype(np.int64)
+        raise ValueError(f"Unknown summarization metric: {metric}")
+
+
+def split_by_label(values: np.ndarray, labels: list) -> dict:
+    """
+    Returns the values of each label as arrays, in order of first appearance of the labels.
+    """
+    index = {}
+    codes = np.fromiter(
+        (index.setdefault(label, len(index)) for label in labels),
+        dtype=np.int64,
+        count=len(labels),
+    )
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(index)))[:-1]
+    groups = np.split(np.asarray(values)[order], bounds)
+    return {label: groups[i] for label, i in index.items()}
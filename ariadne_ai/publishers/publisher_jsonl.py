@@ -0,0 +1,115 @@
+from .publisher import Publisher
+import json
+import os
+
+
+class PublisherJsonl(Publisher):
+    """
+    A class to publish logs incrementally, appending one JSON record per line.
+
+    Records are buffered and flushed every `batch_size` records. Every `checkpoint_interval`
+    records, the log file is fsynced and its size is appended to a manifest. A record is
+    therefore only covered by the manifest once it is safely on disk.
+
+    When resuming, the log file is truncated back to the last checkpoint, dropping any record
+    written after it. The records left identify the instances already evaluated.
+
+    Attributes:
+        filename (str): The output JSON Lines file.
+        manifest_filename (str): The manifest of the checkpoints, next to the output file.
+        batch_size (int): Number of records buffered before writing them to the file.
+        checkpoint_interval (int): Number of records between two checkpoints.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        batch_size: int = 10,
+        checkpoint_interval: int = 100,
+        resume: bool = False,
+    ):
+        """
+        Initializes the publisher. Unless resuming, existing log and manifest files are overwritten.
+        """
+        self.filename = filename
+        self.manifest_filename = f"{filename}.manifest"
+        self.batch_size = batch_size
+        self.checkpoint_interval = checkpoint_interval
+        directory_path = os.path.dirname(self.filename)
+        if directory_path and not os.path.exists(directory_path):
+            os.makedirs(directory_path)
+
+        self._buffer = []
+        self._n_records_since_checkpoint = 0
+        checkpoint_offset = 0
+        if resume:
+            checkpoint_offset = self._read_manifest()
+        else:
+            open(self.manifest_filename, "w").close()
+        self._file = open(self.filename, "a+b")
+        self._file.truncate(checkpoint_offset)
+        self._file.seek(checkpoint_offset)
+
+    def _read_manifest(self) -> int:
+        """Returns the size of the log file at the last checkpoint of the manifest."""
+        checkpoint_offset = 0
+        if not os.path.exists(self.manifest_filename):
+            return checkpoint_offset
+        with open(self.manifest_filename, "r") as f:
+            for line in f:
+                try:
+                    checkpoint = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash during a checkpoint may leave a partial last line
+                    break
+                checkpoint_offset = checkpoint["offset"]
+        return checkpoint_offset
+
+    def append(self, record: dict):
+        """Appends a record, and flushes or checkpoints when the thresholds are reached."""
+        self._buffer.append(json.dumps(record) + "\n")
+        self._n_records_since_checkpoint += 1
+        if self._n_records_since_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+        elif len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered records to the log file."""
+        if self._buffer:
+            self._file.write("".join(self._buffer).encode("utf-8"))
+            self._buffer = []
+        self._file.flush()
+
+    def checkpoint(self):
+        """Flushes and fsyncs the log file, then records its size in the manifest."""
+        self.flush()
+        os.fsync(self._file.fileno())
+        checkpoint = {"offset": self._file.tell()}
+        with open(self.manifest_filename, "a") as f:
+            f.write(json.dumps(checkpoint) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._n_records_since_checkpoint = 0
+
+    def close(self):
+        """Checkpoints the remaining records and closes the log file."""
+        if self._file.closed:
+            return
+        self.checkpoint()
+        self._file.close()
+
+    def write(self, data: list):
+        """Writes a list of records and closes the log file."""
+        for record in data:
+            self.append(record)
+        self.close()
+
+    def read(self):
+        """Yields the records of the log file one by one."""
+        if not self._file.closed:
+            self.flush()
+        with open(self.filename, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
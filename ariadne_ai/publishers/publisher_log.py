@@ -1,4 +1,5 @@
 from .publisher import Publisher
+from .result_store import ResultStore
 import json
 import os
 
@@ -9,7 +10,7 @@ class PublisherLog(Publisher):
 
     Attributes:
         filename (str): The output filename for the publisher.
-        format (str): The format in which the data will be published, e.g., 'json', 'csv'.
+        format (str): The format in which the data will be published: 'json', 'csv' or 'parquet'.
     """
 
     def __init__(self, filename: str, format: str):
@@ -26,6 +27,8 @@ class PublisherLog(Publisher):
             self.write_json(data)
         elif self.format == "csv":
             self.write_csv(data)
+        elif self.format == "parquet":
+            self.write_parquet(data)
         else:
             raise NotImplementedError(
                 f"The '{self.format}' format has not been implemented yet."
@@ -34,8 +37,18 @@ class PublisherLog(Publisher):
     def write_json(self, data: dict):
         """Writes data to a JSON file."""
         with open(self.filename, "w") as f:
-            json.dump(data, f, indent=4)
+            json.dump(list(data), f, indent=4)
+
+    @staticmethod
+    def _to_result_store(data) -> ResultStore:
+        if isinstance(data, ResultStore):
+            return data
+        return ResultStore.from_records(data)
 
     def write_csv(self, data: dict):
-        """Writes data to a CSV file."""
-        pass
+        """Writes data to a CSV file, with the nested values serialized to JSON."""
+        self._to_result_store(data).write_csv(self.filename)
+
+    def write_parquet(self, data: dict):
+        """Writes data to a Parquet file. Requires the pyarrow package."""
+        self._to_result_store(data).write_parquet(self.filename)
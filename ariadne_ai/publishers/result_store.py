@@ -0,0 +1,134 @@
+import json
+from collections.abc import Sequence
+from typing import Iterable
+
+# Value of a column for the logs without the field
+_MISSING = object()
+
+
+class ResultStore(Sequence):
+    """
+    A columnar store of evaluation logs.
+
+    Each log field is kept in its own column, instead of one dict per log. The text fields
+    of the logs are references to the strings of the instances, so they are not copied.
+
+    The store is a read-only sequence of the logs as dicts: it can be appended to,
+    iterated, indexed, sliced and measured, and compares equal to the list of the same
+    logs. It is not a list, though: `to_list` returns one, for instance to serialize the
+    logs with json. It can also be exported to pandas, to Arrow or to Parquet.
+
+    Attributes:
+        columns (dict): Values of each field, in log order.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self._n_logs = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "ResultStore":
+        """Builds a store from logs, such as the records of a 'jsonl' log file."""
+        store = cls()
+        for record in records:
+            store.append(record)
+        return store
+
+    def append(self, log: dict):
+        """Appends the log of an instance."""
+        for field, value in log.items():
+            column = self.columns.get(field)
+            if column is None:
+                column = self.columns[field] = [_MISSING] * self._n_logs
+            column.append(value)
+        self._n_logs = self._n_logs + 1
+        for column in self.columns.values():
+            if len(column) < self._n_logs:
+                column.append(_MISSING)
+
+    def __len__(self):
+        return self._n_logs
+
+    def __getitem__(self, index):
+        """Returns the log at an index, or the list of the logs of a slice."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(self._n_logs)[index]]
+        index = range(self._n_logs)[index]
+        return {
+            field: column[index]
+            for field, column in self.columns.items()
+            if column[index] is not _MISSING
+        }
+
+    def __iter__(self):
+        for index in range(self._n_logs):
+            yield self[index]
+
+    def __eq__(self, other):
+        if isinstance(other, ResultStore):
+            other = other.to_list()
+        if not isinstance(other, list):
+            return NotImplemented
+        return self.to_list() == other
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+    def to_list(self) -> list:
+        """Returns the logs as a list of dicts."""
+        return list(self)
+
+    def to_pandas(self):
+        """Returns the logs as a pandas DataFrame with one row per log."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            field: [None if value is _MISSING else value for value in column]
+            for field, column in self.columns.items()
+        })
+
+    @staticmethod
+    def _serialize_nested(df):
+        """Serializes the dict and list values, such as the answers, to JSON strings."""
+        for column in df.columns:
+            if df[column].map(lambda value: isinstance(value, (dict, list))).any():
+                df[column] = df[column].map(
+                    lambda value: json.dumps(value)
+                    if isinstance(value, (dict, list))
+                    else value
+                )
+        return df
+
+    def to_arrow(self):
+        """
+        Returns the logs as a pyarrow Table. Nested values are serialized to JSON strings.
+
+        Raises:
+            ImportError: If the pyarrow package is not installed.
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(
+                "Exporting logs to Arrow requires the pyarrow package: pip install pyarrow"
+            )
+        return pyarrow.Table.from_pandas(
+            self._serialize_nested(self.to_pandas()), preserve_index=False
+        )
+
+    def write_parquet(self, filename: str):
+        """
+        Writes the logs to a Parquet file.
+
+        Raises:
+            ImportError: If the pyarrow package is not installed.
+        """
+        table = self.to_arrow()
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(table, filename)
+
+    def write_csv(self, filename: str):
+        """Writes the logs to a CSV file."""
+        df = self._serialize_nested(self.to_pandas())
+        df.to_csv(filename, index=False)
@@ -0,0 +1,58 @@
+import argparse
+from ariadne_ai.benchmark import EVALUATORS, run_benchmarks, write_results
+
+# Constants and Configurations
+
+# Dataset sizes benchmarked by default.
+SIZES = [1000, 10000, 100000]
+
+# Path of the machine-readable results.
+OUTPUT_FILEPATH = "data/benchmarks/results.json"
+
+
+def parse_args():
+    """
+    Parse the command line arguments of the benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the end-to-end throughput of the evaluators against a simulated backend."
+    )
+    parser.add_argument("--evaluators", nargs="+", default=list(EVALUATORS), choices=list(EVALUATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean simulated latency per request, in seconds.")
+    parser.add_argument("--latency-jitter", type=float, default=0.02)
+    parser.add_argument("--log-format", default="jsonl")
+    parser.add_argument("--streaming", action="store_true", help="Stream the dataset instead of loading it in memory.")
+    parser.add_argument("--output", default=OUTPUT_FILEPATH)
+    return parser.parse_args()
+
+
+def main():
+    """
+    Main execution function. Runs every evaluator on every dataset size and writes the results.
+    """
+    args = parse_args()
+    cases = [
+        {
+            "evaluator_name": evaluator_name,
+            "n_rows": n_rows,
+            "max_concurrency": args.max_concurrency,
+            "mode": args.mode,
+            "latency": args.latency,
+            "latency_jitter": args.latency_jitter,
+            "log_format": args.log_format,
+            "streaming": args.streaming,
+        }
+        for evaluator_name in args.evaluators
+        for n_rows in args.sizes
+    ]
+    results = run_benchmarks(cases)
+    write_results(results, args.output)
+    print(f"Results written to {args.output}")
+
+
+# Ensure that the main execution only occurs if this script is run directly (not imported).
+if __name__ == "__main__":
+    main()
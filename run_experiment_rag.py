@@ -1,4 +1,5 @@
 from ariadne_ai.loaders.rag_loader import RagLoader
+from ariadne_ai.llms.response_cache import ResponseCache
 from ariadne_ai.evaluators.rag.faithfulness_evaluator import FaithfulnessEvaluator
 from ariadne_ai.evaluators.rag.context_relevance_evaluator import (
     ContextRelevanceEvaluator,
@@ -17,6 +18,9 @@ PERF_FILEPATH = "data/logs/perf_rag_faith_eval.txt"
 # OpenAI API key (should be kept confidential).
 OPEN_AI_KEY = None
 
+# Cache of the LLM responses, so that re-running the experiments only pays for new prompts.
+RESPONSE_CACHE = ResponseCache("data/cache/llm_responses.sqlite")
+
 loader = RagLoader(
     col_question="question",
     col_context="context",
@@ -26,7 +30,7 @@ loader = RagLoader(
 
 # Faithfulness
 loader.load(INPUT_FILEPATH)
-evaluator = FaithfulnessEvaluator(loader)
+evaluator = FaithfulnessEvaluator(loader, response_cache=RESPONSE_CACHE)
 evaluator.run()
 
 # Context Relevance
@@ -38,7 +42,7 @@ loader = RagLoader(
     col_label="label",
 )
 loader.load(INPUT_FILEPATH)
-evaluator = ContextRelevanceEvaluator(loader=loader)
+evaluator = ContextRelevanceEvaluator(loader=loader, response_cache=RESPONSE_CACHE)
 evaluator.run()
 
 # Answer Relevance
@@ -51,5 +55,5 @@ loader = RagLoader(
     col_label="label",
 )
 loader.load(INPUT_FILEPATH)
-evaluator = AnswerRelevanceEvaluator(loader)
+evaluator = AnswerRelevanceEvaluator(loader, response_cache=RESPONSE_CACHE)
 evaluator.run()
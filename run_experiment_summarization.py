@@ -1,6 +1,7 @@
 from ariadne_ai.loaders.summarization_loader import SummarizationLoader
-from ariadne_ai.evaluators.text_summarization.hallucination_evaluator import HallucinationEvaluator
-from ariadne_ai.evaluators.text_summarization.informativeness_evaluator import InformativenessEvaluator
+from ariadne_ai.llms.response_cache import ResponseCache
+from ariadne_ai.llms.batch_backend import OpenAIBatchBackend
+from ariadne_ai.evaluators.text_summarization.qag_evaluator import QAGEvaluator
 # Constants and Configurations
 
 # Path to the input file containing raw data.
@@ -9,6 +10,13 @@ INPUT_FILEPATH = 'data/text_summarization/xsum_sample.json'
 # OpenAI API key (should be kept confidential).
 OPEN_AI_KEY = None
 
+# Cache of the LLM responses, so that re-running the experiments only pays for new prompts.
+RESPONSE_CACHE = ResponseCache('data/cache/llm_responses.sqlite')
+
+# Submit the requests as offline batch jobs, at a lower cost and within 24 hours,
+# instead of calling the API directly.
+USE_BATCH_JOBS = False
+
 # Each configuration specifies the log, performance file paths, model, and number of questions.
 # Configurations for different runs
 RUN_CONFIGS = [
@@ -39,33 +47,24 @@ def initialize_loader() -> SummarizationLoader:
     loader.load(INPUT_FILEPATH)
     return loader
 
-def run_evaluation_hallucination(loader: SummarizationLoader, config: dict) -> None:
-    """
-    Given a loader and configuration, initialize an evaluator and run the hallucination evaluation.
-    """
-    evaluator = HallucinationEvaluator(
-        loader,
-        log_filepath=config['log_filepath'],
-        llm_model=config['llm_model'],
-        performance_filepath=config['perf_filepath'],
-        open_ai_key=OPEN_AI_KEY,
-        n_questions=config.get('n_questions')
-    )
-    evaluator.run()
-
-def run_evaluation_informativeness(loader: SummarizationLoader, config: dict) -> None:
+def run_evaluation(loader: SummarizationLoader, config: dict) -> None:
     """
-    Given a loader and configuration, initialize an evaluator and run the non-informativeness evaluation.
+    Given a loader and configuration, initialize an evaluator and run the hallucination,
+    contradiction and non-informativeness evaluations from a single set of questions and answers.
     """
-    evaluator = InformativenessEvaluator(
+    evaluator = QAGEvaluator(
         loader,
         log_filepath=config['log_filepath'],
         llm_model=config['llm_model'],
         performance_filepath=config['perf_filepath'],
         open_ai_key=OPEN_AI_KEY,
-        n_questions=config.get('n_questions')
+        n_questions=config.get('n_questions'),
+        response_cache=RESPONSE_CACHE
     )
-    evaluator.run()
+    if USE_BATCH_JOBS:
+        evaluator.run_batch(OpenAIBatchBackend(OPEN_AI_KEY))
+    else:
+        evaluator.run()
 
 def main():
     """
@@ -73,8 +72,7 @@ def main():
     """
     loader = initialize_loader()
     for config in RUN_CONFIGS:
-        run_evaluation_informativeness(loader, config)
-        run_evaluation_hallucination(loader, config)
+        run_evaluation(loader, config)
 
 # Ensure that the main execution only occurs if this script is run directly (not imported).
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+import json
+import pytest
+from ariadne_ai.evaluators.rag.faithfulness_evaluator import FaithfulnessEvaluator
+from ariadne_ai.llms.completion_backend import ReplayBackend
+from ariadne_ai.loaders.rag_loader import RagLoader
+
+
+def _fake_judge(messages):
+    verdict = "No" if "bad" in messages[-1]["content"] else "Yes"
+    return json.dumps({"verdict": verdict, "explanation": ""})
+
+
+@pytest.fixture
+def fake_judge():
+    """ Response function of a ReplayBackend judging as unfaithful the answers containing 'bad' """
+    return _fake_judge
+
+
+@pytest.fixture
+def make_loader():
+    """ Factory of RagLoaders of a list of dicts, keeping their 'label' column """
+    def make_loader(dataset):
+        loader = RagLoader(col_label="label", format='dict')
+        loader.load(dataset)
+        return loader
+    return make_loader
+
+
+@pytest.fixture
+def make_evaluator(tmp_path):
+    """
+    Factory of FaithfulnessEvaluators judged by fake_judge, or by the given response function,
+    writing their log and report as tmp_path/<name>.log and tmp_path/<name>.txt
+    """
+    def make_evaluator(loader, name="eval", respond=_fake_judge, **kwargs):
+        return FaithfulnessEvaluator(
+            loader,
+            log_filepath=str(tmp_path / f"{name}.log"),
+            performance_filepath=str(tmp_path / f"{name}.txt"),
+            backend=ReplayBackend(respond=respond),
+            **kwargs,
+        )
+    return make_evaluator
@@ -0,0 +1,34 @@
+import json
+import random
+import statistics
+from ariadne_ai.metrics.aggregate import MetricAggregate
+
+
+def test_merged_aggregates_match_single_pass():
+    rng = random.Random(0)
+    values = [rng.random() for _ in range(5000)]
+    single = MetricAggregate.from_values(values)
+    parts = [MetricAggregate.from_values(values[i::3]) for i in range(3)]
+    # Serialized aggregates can be restored, then merged in any order
+    parts = [MetricAggregate.from_dict(json.loads(json.dumps(part.to_dict()))) for part in parts]
+    merged = parts[2].merge(parts[0]).merge(parts[1])
+    assert(merged.count == 5000)
+    assert(abs(merged.mean - statistics.mean(values)) < 1e-12)
+    assert(abs(merged.variance - statistics.variance(values)) < 1e-9)
+    assert(abs(merged.variance - single.variance) < 1e-9)
+    for q in [0.01, 0.5, 0.99]:
+        assert(abs(merged.quantile(q) - q) < 0.02)
+
+
+def test_confidence_interval_of_binary_scores():
+    aggregate = MetricAggregate.from_array([1] * 30 + [0] * 70)
+    low, high = aggregate.confidence_interval()
+    assert(aggregate.mean == 0.3)
+    assert(low < 0.3 < high)
+    # Wilson score interval
+    assert(abs(low - 0.2189) < 1e-3 and abs(high - 0.3958) < 1e-3)
+    low, high = MetricAggregate.from_array([0] * 30).confidence_interval()
+    assert(abs(low) < 1e-12 and high > 0.1)
+    low, high = MetricAggregate.from_values([2, 4, 6]).confidence_interval()
+    assert(abs((high - low) / 2 - 1.96 * (4 / 3) ** 0.5) < 1e-2)
+    assert(MetricAggregate.from_values([1]).confidence_interval() is None)
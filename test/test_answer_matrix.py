@@ -0,0 +1,28 @@
+from ariadne_ai.evaluators.text_summarization.qag_evaluator import QAGEvaluator
+from ariadne_ai.metrics.text_summarization.answer_matrix import AnswerMatrix, split_by_label
+
+
+def test_vectorized_metrics_match_metric_classes():
+    answers_src = [
+        {"question 1": "Yes", "question 2": " unknown", "question 3": "No"},
+        {"question 1": "Unknown", "question 2": "maybe"},
+    ]
+    answers_sum = [
+        {"question 1": "yes ", "question 2": "No", "question 3": "Unknown"},
+        {"question 1": "Unknown", "question 2": "MAYBE", "question 3": "Yes"},
+    ]
+    questions = {f"question {i}": f"Question {i}?" for i in range(1, 4)}
+    answer_matrix = AnswerMatrix.from_answers(answers_src, answers_sum)
+    for metric, metric_class in QAGEvaluator.metric_str_to_class.items():
+        expected = [
+            metric_class.compute(src, summ, questions, 3)[0]
+            for src, summ in zip(answers_src, answers_sum)
+        ]
+        assert(list(answer_matrix.compute(metric, 3)) == expected)
+
+
+def test_split_by_label():
+    groups = split_by_label([1.0, 0.5, 0.0], ["a", None, "a"])
+    assert(list(groups) == ["a", None])
+    assert(list(groups["a"]) == [1.0, 0.0])
+    assert(list(groups[None]) == [0.5])
@@ -0,0 +1,40 @@
+import threading
+from ariadne_ai.llms.athina_log_queue import AthinaLogQueue
+
+
+def test_logs_are_sent_in_background_and_flushed():
+    sent = []
+    log_queue = AthinaLogQueue(send=sent.append)
+    for i in range(50):
+        log_queue.put({"response_time": i})
+    assert(log_queue.flush(timeout=5))
+    assert([log["response_time"] for log in sent] == list(range(50)))
+
+
+def test_full_queue_drops_logs_without_blocking():
+    release = threading.Event()
+    log_queue = AthinaLogQueue(max_size=2, send=lambda log: release.wait(5))
+    for i in range(10):
+        log_queue.put({"response_time": i})
+    # One log is being sent, two are queued, the others are dropped
+    assert(log_queue.n_dropped >= 7)
+    release.set()
+    assert(log_queue.flush(timeout=5))
+
+
+def test_flush_reuses_the_worker_thread():
+    log_queue = AthinaLogQueue(send=lambda log: None)
+    log_queue.put({"response_time": 0})
+    n_threads = threading.active_count()
+    for _ in range(20):
+        assert(log_queue.flush(timeout=5))
+    assert(threading.active_count() == n_threads)
+
+
+def test_flush_times_out_while_a_log_is_being_sent():
+    release = threading.Event()
+    log_queue = AthinaLogQueue(send=lambda log: release.wait(5))
+    log_queue.put({"response_time": 0})
+    assert(not log_queue.flush(timeout=0.05))
+    release.set()
+    assert(log_queue.flush(timeout=5))
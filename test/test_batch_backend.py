@@ -0,0 +1,53 @@
+import json
+import threading
+import pytest
+from ariadne_ai.evaluators.rag.faithfulness_evaluator import FaithfulnessEvaluator
+from ariadne_ai.llms.batch_backend import BatchCollector, LocalBatchBackend, PendingRequest, batch_collection
+from ariadne_ai.llms.completion_backend import ReplayBackend
+from ariadne_ai.llms.open_ai_completion import OpenAICompletion
+from ariadne_ai.loaders.rag_loader import RagLoader
+
+
+def test_run_batch_with_local_backend(tmp_path):
+    """ Requests are submitted as one batch job and the responses folded back into the metrics """
+    loader = RagLoader(format='dict')
+    loader.load([
+        {"question": "q", "context": "c", "answer": "good"},
+        {"question": "q", "context": "c", "answer": "bad"},
+        {"question": "q", "context": "c", "answer": "bad"},
+    ])
+    evaluator = FaithfulnessEvaluator(
+        loader,
+        log_format=None,
+        performance_filepath=str(tmp_path / "perf.txt"),
+        open_ai_key="sk-test",
+    )
+    bodies = []
+
+    def respond(body):
+        bodies.append(body)
+        verdict = "No" if "response:bad" in body["messages"][-1]["content"] else "Yes"
+        return json.dumps({"verdict": verdict, "explanation": ""})
+
+    backend = LocalBatchBackend(respond, directory=str(tmp_path / "local"))
+    logs = evaluator.run_batch(backend, directory=str(tmp_path), poll_interval=0)
+    # Identical requests are submitted once
+    assert(len(bodies) == 2)
+    assert([log["faithfulness_failure"] for log in logs] == [0, 1, 1])
+    assert(evaluator.n_instances == 3)
+
+
+def test_batch_collection_only_affects_its_context():
+    completion = OpenAICompletion("gpt-3.5-turbo", None, backend=ReplayBackend(default_response="Yes"))
+    messages = [{"role": "user", "content": "Is the sky blue?"}]
+    other_thread_results = []
+    with batch_collection(BatchCollector()):
+        with pytest.raises(PendingRequest):
+            completion.get_completion_from_messages(messages)
+        thread = threading.Thread(
+            target=lambda: other_thread_results.append(completion.get_completion_from_messages(messages))
+        )
+        thread.start()
+        thread.join()
+    assert(other_thread_results == ["Yes"])
+    assert(completion.get_completion_from_messages(messages) == "Yes")
@@ -0,0 +1,31 @@
+import pytest
+from ariadne_ai.evaluators.rag.faithfulness_evaluator import FaithfulnessEvaluator
+from ariadne_ai.llms.completion_backend import ReplayBackend
+from ariadne_ai.llms.rag.faithfulness import Faithfulness
+from ariadne_ai.loaders.rag_loader import RagLoader
+
+
+def test_max_batch_tokens_defaults_to_the_context_window():
+    small = Faithfulness("gpt-3.5-turbo", None, backend=ReplayBackend())
+    large = Faithfulness("gpt-4o", None, backend=ReplayBackend())
+    assert(small.max_batch_tokens == 4096 - 2000 - small.batch_prompt_template.static_tokens - 50)
+    assert(large.max_batch_tokens > 100000)
+
+
+def test_max_batch_tokens_is_passed_through_and_splits_with_a_warning(tmp_path):
+    loader = RagLoader(format='dict')
+    loader.load([{"question": "q", "context": "c", "answer": "a"}])
+    evaluator = FaithfulnessEvaluator(
+        loader,
+        log_format=None,
+        performance_filepath=str(tmp_path / "perf.txt"),
+        batch_size=4,
+        max_batch_tokens=30,
+        backend=ReplayBackend(),
+    )
+    judge = evaluator.faithfulness_evaluator
+    assert(judge.max_batch_tokens == 30)
+    items = [("The context of the item. " * 3, "The response.")] * 4
+    with pytest.warns(UserWarning, match="split into"):
+        batches = judge.split_batch(items)
+    assert(len(batches) > 1 and sum(len(batch) for batch in batches) == 4)
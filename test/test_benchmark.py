@@ -0,0 +1,30 @@
+import json
+from ariadne_ai.benchmark import iter_dataset, percentile, run_benchmarks, run_case, write_dataset
+
+
+def test_percentile_interpolates():
+    assert(percentile([1, 2, 3, 4], 50) == 2.5)
+    assert(percentile([5], 99) == 5)
+    assert(percentile([], 50) is None)
+
+
+def test_run_case_measures_every_row(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    for evaluator_name, n_requests in [("faithfulness", 20), ("qag", 60)]:
+        result = run_case(evaluator_name, 20, max_concurrency=4, latency=0, latency_jitter=0)
+        assert(result["n_logs"] == 20)
+        assert(result["n_requests"] == n_requests)
+        assert(result["prompt_tokens_per_row"] > 0)
+        assert(result["latency_p50"] <= result["latency_p99"])
+
+
+def test_dataset_is_written_outside_the_measured_process(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    filename = str(tmp_path / "dataset.jsonl")
+    write_dataset(filename, "rag", 10, seed=1)
+    with open(filename) as f:
+        assert([json.loads(line) for line in f] == list(iter_dataset("rag", 10, seed=1)))
+    results = run_benchmarks([{
+        "evaluator_name": "faithfulness", "n_rows": 10, "latency": 0, "latency_jitter": 0
+    }])
+    assert(results["results"][0]["n_logs"] == 10)
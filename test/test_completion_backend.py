@@ -0,0 +1,63 @@
+import asyncio
+import json
+from ariadne_ai.evaluators.rag.faithfulness_evaluator import FaithfulnessEvaluator
+from ariadne_ai.llms.completion_backend import RecordingBackend, ReplayBackend
+from ariadne_ai.llms.open_ai_completion import OpenAICompletion
+from ariadne_ai.loaders.rag_loader import RagLoader
+
+
+def test_replay_backend_runs_without_openai_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    loader = RagLoader(format='dict')
+    loader.load([{"question": "q", "context": "c", "answer": f"a{i}"} for i in range(4)])
+    backend = ReplayBackend(default_response=json.dumps({"verdict": "No", "explanation": ""}))
+    evaluator = FaithfulnessEvaluator(
+        loader,
+        log_format=None,
+        performance_filepath=str(tmp_path / "perf.txt"),
+        backend=backend,
+    )
+    logs = evaluator.run()
+    assert([log["faithfulness_failure"] for log in logs] == [1, 1, 1, 1])
+
+
+class InFlightBackend(ReplayBackend):
+    """ ReplayBackend recording how many requests wait for their latency at the same time """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def acomplete(self, model, messages, temperature, max_tokens):
+        self.in_flight = self.in_flight + 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await super().acomplete(model, messages, temperature, max_tokens)
+        finally:
+            self.in_flight = self.in_flight - 1
+
+
+def test_replay_backend_simulates_latency_concurrently():
+    backend = InFlightBackend(default_response="{}", latency=0.05)
+    completion = OpenAICompletion("gpt-3.5-turbo", None, backend=backend)
+
+    async def complete_all():
+        return await asyncio.gather(*[
+            completion.aget_completion_from_messages([{"role": "user", "content": str(i)}])
+            for i in range(10)
+        ])
+
+    assert(asyncio.run(complete_all()) == ["{}"] * 10)
+    assert(backend.max_in_flight == 10)
+
+
+def test_recorded_responses_are_replayed(tmp_path):
+    filename = str(tmp_path / "recording.jsonl")
+    messages = [{"role": "user", "content": "Is the sky blue?"}]
+    recorder = RecordingBackend(ReplayBackend(default_response="Yes"), filename)
+    OpenAICompletion("gpt-3.5-turbo", None, backend=recorder).get_completion_from_messages(messages)
+
+    replay = ReplayBackend.from_jsonl(filename)
+    completion = OpenAICompletion("gpt-3.5-turbo", None, backend=replay)
+    assert(completion.get_completion_from_messages(messages) == "Yes")
@@ -0,0 +1,80 @@
+import pytest
+from ariadne_ai.evaluators.sampling import random_order, stratified_order
+
+
+def _dataset(n_rows, failure_period):
+    return [
+        {"question": "q", "context": "c", "answer": f"{'bad' if i % failure_period == 0 else 'good'}{i}"}
+        for i in range(n_rows)
+    ]
+
+
+def test_run_until_confident_stops_early(tmp_path, make_loader, make_evaluator):
+    evaluator = make_evaluator(make_loader(_dataset(5000, 10)), log_format=None, max_concurrency=4)
+    evaluator.run_until_confident(max_half_width=0.03)
+    n_evaluated = evaluator.early_stopping["n_evaluated"]
+    assert(evaluator.early_stopping["stopped"])
+    assert(100 < n_evaluated < 1000)
+    assert(abs(evaluator.compute_average_scores()["faithfulness_failure"]["overall"] - 0.1) < 0.03)
+    with open(tmp_path / "eval.txt") as f:
+        assert(f"evaluated {n_evaluated} of 5000 instances" in f.read())
+
+
+def test_stratified_order_keeps_label_proportions():
+    dataset = [{"label": "a"}] * 90 + [{"label": "b"}] * 10
+    order = stratified_order(dataset, lambda instance: instance["label"])
+    assert(len(order) == 100)
+    assert(sum(instance["label"] == "b" for instance in list(order)[:20]) == 2)
+
+
+class CountingDataset:
+    """ Re-iterable dataset without random access, counting how many times it is read """
+
+    def __init__(self, n):
+        self.n = n
+        self.n_reads = 0
+
+    def __iter__(self):
+        self.n_reads = self.n_reads + 1
+        for i in range(self.n):
+            yield {"index": i}
+
+
+def test_random_order_of_a_stream_reads_it_by_chunks():
+    dataset = CountingDataset(100)
+    order = random_order(dataset, seed=1)
+    order.chunk_size = 30
+    assert(len(order) == 100 and dataset.n_reads == 1)
+    instances = list(order)
+    assert([instance["index"] for instance in instances] == order.positions)
+    assert(sorted(order.positions) == list(range(100)) and order.positions != list(range(100)))
+    # One pass to count the instances, then one per chunk
+    assert(dataset.n_reads == 1 + 4)
+
+
+def test_run_until_confident_does_not_stop_on_rare_failures(make_loader, make_evaluator):
+    evaluator = make_evaluator(make_loader(_dataset(5000, 100)), log_format=None)
+    evaluator.run_until_confident(max_half_width=0.01, seed=3)
+    # Stopping at 30 instances without failures would report 0.0 ± 0
+    assert(evaluator.early_stopping["n_evaluated"] > 190)
+    overall = evaluator.compute_average_scores()["faithfulness_failure"]["overall"]
+    assert(abs(overall - 0.01) < 0.01)
+
+
+def test_run_until_confident_resumes_in_the_same_order(make_loader, make_evaluator):
+    dataset = _dataset(2000, 10)
+    evaluator = make_evaluator(make_loader(dataset), log_format="jsonl", batch_size=4)
+    evaluator.run_until_confident(max_half_width=0.03, seed=2)
+    n_evaluated = evaluator.early_stopping["n_evaluated"]
+    assert(evaluator.early_stopping["stopped"] and n_evaluated < 2000)
+
+    calls = []
+    resumed = make_evaluator(
+        make_loader(dataset), log_format="jsonl", batch_size=4, respond=calls.append, resume=True
+    )
+    resumed.run_until_confident(max_half_width=0.03, seed=2)
+    assert(calls == [])
+    assert(resumed.early_stopping["n_evaluated"] == n_evaluated)
+    assert(resumed.compute_average_scores() == evaluator.compute_average_scores())
+    with pytest.raises(ValueError, match="order"):
+        list(make_evaluator(make_loader(dataset), log_format="jsonl", resume=True).run())
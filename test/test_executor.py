@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+import pytest
+from ariadne_ai.evaluators.executor import EvaluationExecutor
+
+
+def _slow_square(x):
+    time.sleep(random.random() / 100)
+    return x * x
+
+
+def test_executor_keeps_dataset_order():
+    """ Results must come back in dataset order whatever the completion order """
+    instances = list(range(50))
+    results = list(EvaluationExecutor(max_concurrency=8).map(_slow_square, instances))
+    assert([instance for instance, _ in results] == instances)
+    assert([result for _, result in results] == [x * x for x in instances])
+
+
+def test_executor_consumes_iterators():
+    """ The executor must accept lazy iterables, not only lists """
+    results = list(EvaluationExecutor(max_concurrency=4).map(_slow_square, iter(range(10))))
+    assert(len(results) == 10)
+
+
+def test_executor_reraises_errors():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("boom")
+        return x
+    with pytest.raises(ValueError):
+        list(EvaluationExecutor(max_concurrency=4).map(fail_on_three, range(10)))
+
+
+def test_executor_rejects_invalid_concurrency():
+    with pytest.raises(ValueError):
+        EvaluationExecutor(max_concurrency=0)
+
+
+def test_run_parallel_overlaps_calls():
+    """ Independent calls of an instance must run concurrently and keep their order """
+    executor = EvaluationExecutor(max_concurrency=2)
+    # Each call only returns once both calls are running at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_other(result):
+        barrier.wait()
+        return result
+
+    results = executor.run_parallel(
+        lambda: wait_for_other("document"), lambda: wait_for_other("summary")
+    )
+    assert(results == ["document", "summary"])
+
+
+def test_map_overlaps_instances():
+    """ map must evaluate up to max_concurrency instances at the same time """
+    barrier = threading.Barrier(4, timeout=5)
+
+    def wait_for_others(x):
+        barrier.wait()
+        return x
+
+    results = list(EvaluationExecutor(max_concurrency=4).map(wait_for_others, range(8)))
+    assert(results == [(x, x) for x in range(8)])
+
+
+def test_nested_run_parallel_does_not_deadlock():
+    """ Subtasks calling run_parallel again must not wait for their own pool """
+    executor = EvaluationExecutor(max_concurrency=1)
+    inner = lambda: executor.run_parallel(lambda: "f", lambda: "g")
+    results = {}
+    thread = threading.Thread(
+        target=lambda: results.update(value=executor.run_parallel(inner, inner)), daemon=True
+    )
+    thread.start()
+    thread.join(timeout=5)
+    assert(results.get("value") == [["f", "g"], ["f", "g"]])
+
+
+def test_map_batches_keeps_dataset_order():
+    """ Batches results must be mapped back to their instances, in dataset order """
+    executor = EvaluationExecutor(max_concurrency=3, batch_size=4)
+    results = list(executor.map_batches(lambda batch: [x * x for x in batch], range(10)))
+    assert(results == [(x, x * x) for x in range(10)])
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import openai
+import pytest
+from ariadne_ai.evaluators.rag.faithfulness_evaluator import FaithfulnessEvaluator
+from ariadne_ai.llms import open_ai_completion
+from ariadne_ai.llms.completion_backend import ReplayBackend
+from ariadne_ai.llms.instrumentation import (
+    CompletionStats,
+    PrometheusExporter,
+    CompletionEvent,
+    completion_hook,
+    emit_completion_event,
+    estimate_cost,
+)
+from ariadne_ai.llms.open_ai_completion import OpenAICompletion
+from ariadne_ai.llms.response_cache import ResponseCache
+from ariadne_ai.loaders.rag_loader import RagLoader
+
+
+class FlakyBackend(ReplayBackend):
+    def __init__(self, n_failures):
+        super().__init__(default_response="Yes")
+        self.n_failures = n_failures
+
+    def complete(self, model, messages, temperature, max_tokens):
+        if self.n_failures > 0:
+            self.n_failures = self.n_failures - 1
+            raise openai.error.Timeout("timed out")
+        return super().complete(model, messages, temperature, max_tokens)
+
+
+def test_completion_events_record_retries_tokens_and_cost(monkeypatch):
+    monkeypatch.setattr(open_ai_completion, "backoff_wait_time", lambda *args: 0)
+    completion = OpenAICompletion("gpt-4", None, backend=FlakyBackend(n_failures=2))
+    events = []
+    with completion_hook(events.append):
+        assert(completion.get_completion_from_messages([{"role": "user", "content": "Hi"}]) == "Yes")
+    assert([event.attempt for event in events] == [0, 1, 2])
+    assert([event.error for event in events] == ["Timeout", "Timeout", None])
+    assert(events[-1].prompt_tokens > 0 and events[-1].completion_tokens > 0)
+    assert(events[-1].cost == estimate_cost("gpt-4", events[-1].prompt_tokens, events[-1].completion_tokens))
+
+
+def test_completion_stats_and_prometheus_export(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    completion = OpenAICompletion(
+        "gpt-3.5-turbo", None, response_cache=cache, backend=ReplayBackend(default_response="Yes")
+    )
+    stats = CompletionStats()
+    with completion_hook(stats):
+        for _ in range(3):
+            completion.get_completion_from_messages([{"role": "user", "content": "Hi"}])
+    completion.get_completion_from_messages([{"role": "user", "content": "Not recorded"}])
+    summary = stats.summary()
+    assert(summary["requests"] == 3)
+    assert(summary["cached"] == 2)
+    assert(summary["cost"] > 0)
+    text = PrometheusExporter(stats).to_text()
+    assert('ariadne_llm_requests_total{model="gpt-3.5-turbo"} 3' in text)
+    assert('ariadne_llm_cache_hits_total{model="gpt-3.5-turbo"} 2' in text)
+
+
+def test_concurrent_runs_record_only_their_own_completions(tmp_path):
+    def make_evaluator(n_rows, name):
+        loader = RagLoader(format='dict')
+        loader.load([
+            {"question": "q", "context": "c", "answer": f"{name} {i}"} for i in range(n_rows)
+        ])
+        return FaithfulnessEvaluator(
+            loader,
+            log_format=None,
+            performance_filepath=str(tmp_path / f"{name}.txt"),
+            max_concurrency=4,
+            backend=ReplayBackend(default_response='{"verdict": "Yes", "explanation": ""}', latency=0.01),
+        )
+
+    async def run_both():
+        return await asyncio.gather(first.arun(), second.arun())
+
+    first, second = make_evaluator(10, "first"), make_evaluator(30, "second")
+    asyncio.run(run_both())
+    assert(first.completion_stats.summary()["requests"] == 10)
+    assert(second.completion_stats.summary()["requests"] == 30)
+
+    first, second = make_evaluator(10, "first"), make_evaluator(30, "second")
+    threads = [threading.Thread(target=evaluator.run) for evaluator in [first, second]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert(first.completion_stats.summary()["requests"] == 10)
+    assert(second.completion_stats.summary()["requests"] == 30)
+
+
+def test_models_are_priced_by_longest_prefix():
+    assert(estimate_cost("gpt-4o-mini-2024-07-18", 1000, 0) == 0.00015)
+    assert(estimate_cost("gpt-4o-2024-05-13", 1000, 0) == 0.005)
+    assert(estimate_cost("unknown-model", 1000, 0) is None)
+
+
+def test_failing_hook_warns_without_failing_the_completion():
+    def failing_hook(event):
+        raise RuntimeError("exporter down")
+
+    with completion_hook(failing_hook), pytest.warns(UserWarning, match="exporter down"):
+        emit_completion_event(CompletionEvent("gpt-4"))
@@ -38,4 +38,83 @@ def test_loader_instance():
     text_summarization_loader.load_response(document= 'doc', summary='sum')
     processed_data = text_summarization_loader.processed_dataset
     assert(processed_data[0]["document"] == 'doc' )
-    assert(processed_data[0]["summary"] == 'sum' )
\ No newline at end of file
+    assert(processed_data[0]["summary"] == 'sum' )
+
+def test_streaming_loader_reads_compressed_jsonl(tmp_path):
+    """ Streaming mode yields processed instances lazily from a gzip-compressed JSON Lines file """
+    import gzip, json
+    filename = str(tmp_path / "data.jsonl.gz")
+    with gzip.open(filename, "wt") as f:
+        for i in range(3):
+            f.write(json.dumps({"doc": f"doc{i}", "sum": f"summary{i}"}) + "\n")
+    text_summarization_loader = SummarizationLoader(col_document='doc', col_summary='sum', format='jsonl', streaming=True)
+    text_summarization_loader.load(filename)
+    processed_data = text_summarization_loader.processed_dataset
+    assert(not isinstance(processed_data, list))
+    assert([instance["summary"] for instance in processed_data] == ["summary0", "summary1", "summary2"])
+    # The dataset can be iterated several times
+    assert(len(list(processed_data)) == 3)
+
+
+def test_streaming_loader_validates_columns(tmp_path):
+    """ Missing columns raise a KeyError when the instance is read """
+    filename = tmp_path / "data.jsonl"
+    filename.write_text('{"document": "doc1", "summary": "summary1"}\n{"document": "doc2"}\n')
+    text_summarization_loader = SummarizationLoader(format='jsonl', streaming=True)
+    text_summarization_loader.load(str(filename))
+    with pytest.raises(KeyError):
+        list(text_summarization_loader.processed_dataset)
+
+
+def test_csv_loader_reads_only_loader_columns_in_chunks(tmp_path):
+    """ CSV files are read in chunks, and unused columns are not materialized """
+    import pandas as pd
+    filename = str(tmp_path / "data.csv.gz")
+    pd.DataFrame({
+        "doc": [f"doc{i}" for i in range(5)],
+        "sum": ["NA", "", "summary2", "summary3", "summary4"],
+        "unused": range(5),
+    }).to_csv(filename, index=False)
+    text_summarization_loader = SummarizationLoader(col_document='doc', col_summary='sum', format='csv')
+    text_summarization_loader.load_csv(filename, chunksize=2)
+    processed_data = text_summarization_loader.processed_dataset
+    assert([instance["summary"] for instance in processed_data] == ["NA", None, "summary2", "summary3", "summary4"])
+    assert(set(processed_data[0]) == {"document", "summary"})
+
+
+def test_pandas_loader():
+    import pandas as pd
+    from ariadne_ai.loaders.rag_loader import RagLoader
+    df = pd.DataFrame({"question": ["q1", "q2"], "context": ["c1", "c2"], "answer": ["a1", "a2"], "label": ["x", None]})
+    rag_loader = RagLoader(col_label="label", format='pandas')
+    rag_loader.load(df)
+    assert(rag_loader.processed_dataset == [
+        {"question": "q1", "context": "c1", "answer": "a1", "label": "x"},
+        {"question": "q2", "context": "c2", "answer": "a2", "label": None},
+    ])
+    with pytest.raises(KeyError):
+        RagLoader(format='pandas').load(df.drop(columns=["answer"]))
+
+
+def test_loading_twice_replaces_the_dataset(tmp_path):
+    import pandas as pd
+    df = pd.DataFrame({"document": ["doc1", "doc2"], "summary": ["sum1", "sum2"]})
+    filename = str(tmp_path / "data.csv")
+    df.to_csv(filename, index=False)
+    text_summarization_loader = SummarizationLoader()
+    text_summarization_loader.load_pandas(df)
+    text_summarization_loader.load_pandas(df)
+    assert(len(text_summarization_loader.processed_dataset) == 2)
+    text_summarization_loader.load_csv(filename)
+    assert(len(text_summarization_loader.processed_dataset) == 2)
+
+
+def test_streaming_jsonl_loader_raises_on_missing_file(tmp_path):
+    text_summarization_loader = SummarizationLoader(format='jsonl', streaming=True)
+    with pytest.raises(FileNotFoundError):
+        text_summarization_loader.load(str(tmp_path / "missing.jsonl"))
+    filename = tmp_path / "data.jsonl"
+    filename.write_text('{"document": "doc1", "summary": "summary1"}\nnot json\n')
+    text_summarization_loader.load(str(filename))
+    with pytest.raises(ValueError):
+        list(text_summarization_loader.processed_dataset)
@@ -0,0 +1,74 @@
+import pytest
+from ariadne_ai.llms.completion_backend import ReplayBackend
+from ariadne_ai.llms.prompt_template import PromptTemplate
+from ariadne_ai.llms.rag.answer_relevance import AnswerRelevance
+from ariadne_ai.llms.rag.context_relevance import ContextRelevance
+from ariadne_ai.llms.rag.faithfulness import Faithfulness
+from ariadne_ai.llms.rag.rag_judge import RagJudge
+
+CONTEXT_RELEVANCE_PREFIX = (
+    "\n"
+    "        Let's think step by step.\n"
+    "        1. Consider the user's query and the context given at the end of this message.\n"
+    "        2. Make sure to also consider these instructions: \n"
+    "        3. Determine if the chatbot can answer the user's query with nothing but the \"context\" information provided to you.\n"
+    "        4. Provide a brief explanation of why the context does or does not contain sufficient information, labeled as 'explanation', leading up to a verdict (Yes/No) labeled as 'verdict'.\n"
+    "        5. Return a JSON object in the following format: \"verdict\": 'verdict', \"explanation\": 'explanation'.\n"
+    "\n"
+    "        Here's are some examples: \n"
+    "        Context: bjarne stroustrup invented C++\n"
+    "Query: Who invented the linux os\n"
+    "does_context_contain_sufficient_information: No\n"
+    "Reason:The context does not provide any relevant information about the Linux OS or its inventor.\n"
+    "\n"
+    "Context: In 1969, Neil Armstrong became the first person to walk on the moon.\n"
+    "Query: What was the name of the spaceship used for the moon landing in 1969?\n"
+    "does_context_contain_sufficient_information: No\n"
+    "Reason:The context provided does not include any information about the name of the spaceship used for the moon landing. The query specifically asks for the name of the spaceship, which is not present in the context.\n"
+    "\n"
+    "        Now evaluate the following:\n"
+    "        user's query: "
+)
+
+
+def test_prompt_template_renders_rows_after_static_prefix():
+    template = PromptTemplate(
+        "system",
+        "Instructions: {instructions}. {{Literal}} Row: {a} and {b}.",
+        static_fields={"instructions": "Be strict"},
+    )
+    assert(template.prefix == "Instructions: Be strict. {Literal} Row: ")
+    assert(template.row_fields == ("a", "b"))
+    assert(template.format(a=1, b="two") == "Instructions: Be strict. {Literal} Row: 1 and two.")
+    assert(template.count_tokens(a=1, b="two") > template.static_tokens)
+    with pytest.raises(ValueError):
+        PromptTemplate("system", "{a} then {instructions}", static_fields={"instructions": ""})
+
+
+def test_judge_prompts_share_a_byte_identical_prefix():
+    judge = Faithfulness(
+        "gpt-3.5-turbo",
+        open_ai_key=None,
+        additional_instructions="Be strict.",
+        backend=ReplayBackend(),
+    )
+    first = judge.build_messages("Paris is in France.", "Paris is in France.")
+    second = judge.build_messages("Rome is in Italy.", "Rome is in Spain.")
+    assert(first[0] == second[0])
+    prefix = judge.prompt_template.prefix
+    assert("Be strict." in prefix and judge.examples in prefix)
+    assert(first[1]["content"].startswith(prefix) and second[1]["content"].startswith(prefix))
+    assert(judge.additional_instructions == "Be strict.")
+    batch = judge.build_batch_messages([("Paris is in France.", "Paris is in France.")])
+    assert(batch[1]["content"].startswith(judge.batch_prompt_template.prefix))
+    assert('"results"' in judge.batch_prompt_template.prefix)
+
+
+def test_judge_prefixes_are_fixed_strings():
+    judges = [
+        judge_class("gpt-3.5-turbo", open_ai_key=None, backend=ReplayBackend())
+        for judge_class in [Faithfulness, ContextRelevance, AnswerRelevance, RagJudge]
+    ]
+    assert(judges[1].prompt_template.prefix == CONTEXT_RELEVANCE_PREFIX)
+    for judge in judges:
+        assert(" object at 0x" not in judge.prompt_template.prefix)
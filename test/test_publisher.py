@@ -0,0 +1,58 @@
+import json
+import pandas as pd
+from ariadne_ai.publishers.publisher_jsonl import PublisherJsonl
+from ariadne_ai.publishers.publisher_log import PublisherLog
+from ariadne_ai.publishers.result_store import ResultStore
+
+
+def test_publisher_jsonl_appends_records(tmp_path):
+    filename = str(tmp_path / "logs" / "log.jsonl")
+    publisher = PublisherJsonl(filename, batch_size=2, checkpoint_interval=4)
+    for i in range(5):
+        publisher.append({"index": i})
+    publisher.close()
+    assert([record["index"] for record in publisher.read()] == list(range(5)))
+
+
+def test_publisher_jsonl_resumes_from_last_checkpoint(tmp_path):
+    """ Records written after the last checkpoint are dropped when resuming after a crash """
+    filename = str(tmp_path / "log.jsonl")
+    publisher = PublisherJsonl(filename, batch_size=1, checkpoint_interval=3)
+    for i in range(5):
+        publisher.append({"index": i})
+    # Simulate a crash: records 3 and 4 are flushed but never checkpointed
+    publisher._file.flush()
+    with open(filename) as f:
+        assert(len(f.readlines()) == 5)
+
+    resumed = PublisherJsonl(filename, resume=True)
+    assert([record["index"] for record in resumed.read()] == [0, 1, 2])
+    resumed.append({"index": 3})
+    resumed.close()
+    with open(filename) as f:
+        assert([json.loads(line)["index"] for line in f] == [0, 1, 2, 3])
+
+
+def test_result_store_behaves_like_the_list_of_logs(tmp_path):
+    store = ResultStore()
+    logs = [{"document": "doc", "summary": f"sum{i % 2}", "label": "a", "score": i} for i in range(3)]
+    logs[1]["error"] = "timeout"
+    for log in logs:
+        store.append(log)
+    assert(store[1] == logs[1] and "error" not in store[2])
+    assert(store[2]["summary"] is logs[2]["summary"])
+    assert(store[:2] == [store[0], store[1]])
+    assert(store == logs and store != store[:2])
+    assert(json.loads(json.dumps(store.to_list())) == store)
+    assert(repr(store) == repr(logs))
+    df = store.to_pandas()
+    assert(list(df["score"]) == [0, 1, 2])
+    assert(list(df["summary"]) == ["sum0", "sum1", "sum0"])
+
+
+def test_publisher_log_writes_csv(tmp_path):
+    filename = str(tmp_path / "log.csv")
+    PublisherLog(filename, "csv").write([{"question": "q", "answers": {"question 1": "Yes"}, "score": 1}])
+    df = pd.read_csv(filename)
+    assert(json.loads(df["answers"][0]) == {"question 1": "Yes"})
+    assert(df["score"][0] == 1)
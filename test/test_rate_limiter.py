@@ -0,0 +1,61 @@
+import asyncio
+import openai
+import pytest
+from ariadne_ai.llms.completion_backend import ReplayBackend
+from ariadne_ai.llms.open_ai_completion import OpenAICompletion
+from ariadne_ai.llms.rate_limiter import RateLimiter, backoff_wait_time, parse_reset_duration
+
+
+def test_parse_reset_duration():
+    assert(parse_reset_duration("20ms") == 0.02)
+    assert(parse_reset_duration("6m0s") == 360)
+    assert(parse_reset_duration("1.5") == 1.5)
+    assert(parse_reset_duration(None) is None)
+
+
+def test_backoff_is_jittered_and_capped():
+    waits = [backoff_wait_time(10, 15, 120) for _ in range(100)]
+    assert(all(60 <= wait <= 120 for wait in waits))
+    assert(len(set(waits)) > 1)
+
+
+def test_unconfigured_limiter_does_not_wait():
+    limiter = RateLimiter()
+    assert(all(limiter.reserve(1000) == 0 for _ in range(100)))
+
+
+def test_limiter_paces_requests_per_minute():
+    limiter = RateLimiter(requests_per_minute=60)
+    waits = [limiter.reserve(0) for _ in range(62)]
+    # The bucket starts full, then grants one request per second
+    assert(waits[59] == 0)
+    assert(0.9 < waits[60] <= 1)
+    assert(1.9 < waits[61] <= 2)
+
+
+def test_limiter_learns_limits_from_headers():
+    limiter = RateLimiter()
+    retry_after = limiter.update_from_headers({
+        "x-ratelimit-limit-tokens": "90000",
+        "x-ratelimit-remaining-tokens": "0",
+        "Retry-After": "2",
+    })
+    assert(retry_after == 2)
+    assert(limiter.tokens_per_minute == 90000)
+    assert(limiter.reserve(1500) > 1)
+
+
+def test_failed_attempt_refunds_its_reservation():
+    def respond(messages):
+        raise openai.error.InvalidRequestError("Invalid request.", None)
+
+    limiter = RateLimiter.configure("test-refund-model", tokens_per_minute=100000)
+    completion = OpenAICompletion(
+        "test-refund-model", None, backend=ReplayBackend(respond=respond)
+    )
+    messages = [{"role": "user", "content": "Is the sky blue?"}]
+    with pytest.raises(openai.error.InvalidRequestError):
+        completion.get_completion_from_messages(messages)
+    with pytest.raises(openai.error.InvalidRequestError):
+        asyncio.run(completion.aget_completion_from_messages(messages))
+    assert(limiter._tokens.level == 100000)
@@ -0,0 +1,64 @@
+import subprocess
+import sys
+import time
+from ariadne_ai.llms.response_cache import ResponseCache
+
+
+def test_cache_key_depends_on_request():
+    messages = [{"role": "user", "content": "Is the sky blue?"}]
+    key = ResponseCache.make_key("gpt-3.5-turbo", messages, 0, 2000)
+    assert(key == ResponseCache.make_key("gpt-3.5-turbo", messages, 0, 2000))
+    assert(key != ResponseCache.make_key("gpt-4", messages, 0, 2000))
+    assert(key != ResponseCache.make_key("gpt-3.5-turbo", messages, 0, 1000))
+
+
+def test_cache_persists_responses(tmp_path):
+    filename = str(tmp_path / "cache.sqlite")
+    ResponseCache(filename).set("key", "response")
+    assert(ResponseCache(filename).get("key") == "response")
+    assert(ResponseCache(filename).get("missing") is None)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", "3")
+    cache.evict()
+    assert(len(cache) == 2)
+    assert(cache.get("b") is None)
+    assert(cache.get("a") == "1")
+
+
+def test_cache_expires_old_responses(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_age_seconds=0.01)
+    cache.set("key", "response")
+    time.sleep(0.02)
+    assert(cache.get("key") is None)
+
+
+KEY_SCRIPT = """
+from ariadne_ai.llms.completion_backend import ReplayBackend
+from ariadne_ai.llms.rag.context_relevance import ContextRelevance
+from ariadne_ai.llms.rag.faithfulness import Faithfulness
+from ariadne_ai.llms.response_cache import ResponseCache
+
+for judge_class in [Faithfulness, ContextRelevance]:
+    judge = judge_class("gpt-3.5-turbo", open_ai_key=None, backend=ReplayBackend())
+    messages = judge.build_messages("Paris is in France.", "Paris is in France.")
+    print(ResponseCache.make_key("gpt-3.5-turbo", messages, 0, 2000))
+"""
+
+
+def test_cache_key_is_stable_across_processes():
+    keys = [
+        subprocess.run(
+            [sys.executable, "-c", KEY_SCRIPT], capture_output=True, text=True, check=True
+        ).stdout
+        for _ in range(2)
+    ]
+    assert(keys[0] == keys[1])
@@ -0,0 +1,49 @@
+import pytest
+from ariadne_ai.evaluators.rag.faithfulness_evaluator import FaithfulnessEvaluator
+from ariadne_ai.loaders.rag_loader import RagLoader
+
+
+def test_resume_evaluates_only_missing_instances(tmp_path, make_loader, make_evaluator):
+    dataset = [
+        {"question": "q", "context": "c", "answer": answer}
+        for answer in ["good1", "bad1", "good2", "bad2"]
+    ]
+    evaluator = make_evaluator(make_loader(dataset[:2]), log_format="jsonl")
+    list(evaluator.run())
+    with open(tmp_path / "eval.txt") as f:
+        partial_report = f.read()
+
+    resumed = make_evaluator(make_loader(dataset), log_format="jsonl", resume=True)
+    logs = list(resumed.run())
+    # Only good2 and bad2 are sent to the judge
+    assert(resumed.completion_stats.summary()["requests"] == 2)
+    assert([log["answer"] for log in logs] == ["good1", "bad1", "good2", "bad2"])
+    assert(resumed.n_instances == 4)
+    assert(resumed.faithfulness_failure_scores["overall"].total == 2)
+    with open(tmp_path / "eval.txt") as f:
+        assert(f.read() != partial_report)
+
+
+def test_resume_rejects_logs_of_other_settings(make_loader, make_evaluator):
+    """ Changing the evaluator settings changes the fingerprints of the instances """
+    dataset = [{"question": "q", "context": "c", "answer": "good1"}]
+    list(make_evaluator(make_loader(dataset), log_format="jsonl").run())
+
+    calls = []
+    resumed = make_evaluator(
+        make_loader(dataset),
+        log_format="jsonl",
+        respond=calls.append,
+        resume=True,
+        additional_instructions="Be strict.",
+    )
+    with pytest.raises(ValueError):
+        list(resumed.run())
+    assert(calls == [])
+
+
+def test_resume_requires_jsonl_logs():
+    loader = RagLoader(format='dict')
+    loader.load([{"question": "q", "context": "c", "answer": "a"}])
+    with pytest.raises(ValueError):
+        FaithfulnessEvaluator(loader, log_format="json", open_ai_key="sk-test", resume=True)
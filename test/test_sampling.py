@@ -0,0 +1,44 @@
+import pytest
+from ariadne_ai.evaluators.sampling import StratifiedSampler
+
+# A skewed dataset: 900 'common' instances failing 10% of the time, 100 'rare' failing 50%
+DATASET = (
+    [{"question": "q", "context": "c", "answer": f"{'bad' if i % 10 == 0 else 'good'}{i}", "label": "common"} for i in range(900)]
+    + [{"question": "q", "context": "c", "answer": f"{'bad' if i % 2 == 0 else 'good'}{i}", "label": "rare"} for i in range(100)]
+)
+
+
+def test_budget_is_split_between_labels():
+    sampler = StratifiedSampler(budget_tokens=100 * 1000, prompt_tokens=1000)
+    allocation = sampler.allocate({"common": 900, "rare": 30}, {"common": 1000, "rare": 1000})
+    # The rare label is fully sampled, and the common label gets the rest of the budget
+    assert(allocation == {"common": 70, "rare": 30})
+    neyman = StratifiedSampler(budget_tokens=100, objective="overall", std_by_label={"common": 0.3, "rare": 0.5})
+    assert(neyman.allocate({"common": 900, "rare": 100}, {"common": 1, "rare": 1}) == {"common": 84, "rare": 15})
+
+
+def test_sampled_evaluation_reports_reweighted_estimate(tmp_path, make_loader, make_evaluator):
+    sampled_loader = StratifiedSampler(quotas=100).sample(make_loader(DATASET))
+    assert(len(sampled_loader.processed_dataset) == 200)
+    evaluator = make_evaluator(sampled_loader, log_format=None)
+    evaluator.run()
+    mean, half_width = evaluator.get_reweighted_estimate("faithfulness_failure")
+    # The population failure rate is 0.9 * 0.1 + 0.1 * 0.5 = 0.14
+    assert(abs(mean - 0.14) < 0.05)
+    assert(0 < half_width < 0.1)
+    with open(tmp_path / "eval.txt") as f:
+        assert("reweighted overall:" in f.read())
+
+
+def test_quotas_must_cover_every_label():
+    with pytest.raises(ValueError, match="rare"):
+        StratifiedSampler(quotas={"common": 10}).allocate({"common": 900, "rare": 100}, {})
+
+
+def test_no_reweighted_estimate_without_every_label(make_loader, make_evaluator):
+    sampled_loader = StratifiedSampler(quotas={"common": 50, "rare": 0}).sample(make_loader(DATASET))
+    evaluator = make_evaluator(sampled_loader, log_format=None)
+    with pytest.warns(UserWarning, match="rare"):
+        evaluator.run()
+    with pytest.warns(UserWarning):
+        assert(evaluator.get_reweighted_estimate("faithfulness_failure") is None)
@@ -0,0 +1,19 @@
+def _dataset():
+    return [
+        {"question": "q", "context": "c", "answer": f"{'bad' if i % 3 else 'good'}{i}", "label": f"l{i % 2}"}
+        for i in range(20)
+    ]
+
+
+def test_reduced_shards_match_single_run(tmp_path, make_loader, make_evaluator):
+    single_logs = list(make_evaluator(make_loader(_dataset()), "single").run())
+    directory = str(tmp_path / "shards")
+    for shard_index in range(3):
+        make_evaluator(make_loader(_dataset()), f"shard{shard_index}").run_shard(shard_index, 3, directory)
+    reduced_logs = list(make_evaluator(make_loader(_dataset()), "reduced").reduce_shards(3, directory))
+    assert(reduced_logs == single_logs)
+    with open(tmp_path / "single.txt") as f, open(tmp_path / "reduced.txt") as g:
+        single_report, reduced_report = f.read(), g.read()
+    # Timings differ between runs, and latency percentiles are not merged across shards
+    strip = lambda report: [line for line in report.splitlines() if "(s)" not in line]
+    assert(strip(reduced_report) == strip(single_report))
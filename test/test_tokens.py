@@ -0,0 +1,66 @@
+import json
+from ariadne_ai.evaluators.executor import EvaluationExecutor
+from ariadne_ai.llms.completion_backend import ReplayBackend
+from ariadne_ai.llms.rag.faithfulness import Faithfulness
+from ariadne_ai.llms.tokens import context_window, count_tokens, split_text
+from ariadne_ai.llms.text_summarization.question_answerer import QuestionAnswerer
+
+
+def test_context_window_matches_longest_prefix():
+    assert(context_window("gpt-3.5-turbo") == 4096)
+    assert(context_window("gpt-3.5-turbo-16k-0613") == 16385)
+    assert(context_window("unknown-model") == 4096)
+
+
+def test_split_text_fits_chunks_in_budget():
+    text = " ".join(f"Sentence number {i} of the document." for i in range(500))
+    chunks = split_text(text, 100)
+    assert(len(chunks) > 1)
+    assert(all(count_tokens(chunk) <= 100 for chunk in chunks))
+    assert(" ".join(chunks) == text)
+
+
+def test_merge_chunk_answers_prefers_definitive_answers():
+    merged = QuestionAnswerer.merge_chunk_answers([
+        {"question 1": "Unknown", "question 2": "No", "question 3": "Unknown"},
+        {"question 1": "No", "question 2": "Yes", "question 3": "Unknown"},
+    ])
+    assert(merged == {"question 1": "No", "question 2": "Yes", "question 3": "Unknown"})
+    assert(QuestionAnswerer.merge_chunk_answers([{"question 1": "Yes"}, None]) is None)
+
+
+def test_long_context_chunks_run_on_the_executor():
+    requests = []
+
+    def respond(messages):
+        requests.append(messages)
+        return json.dumps({"1": "Yes"})
+
+    executor = EvaluationExecutor(max_concurrency=2)
+    judge = Faithfulness(
+        "gpt-3.5-turbo", None, backend=ReplayBackend(respond=respond), executor=executor
+    )
+    context = " ".join(f"Sentence number {i} of the context." for i in range(2000))
+    evaluation = judge.evaluate(context, "The context has sentences.")
+    assert(evaluation["verdict"] == "Yes")
+    assert(len(requests) > 1)
+    assert(executor._subtask_pool._max_workers == 2)
+
+
+def test_context_is_not_split_below_the_minimum_chunk_size():
+    requests = []
+    judge = Faithfulness(
+        "gpt-3.5-turbo", None, backend=ReplayBackend(respond=requests.append)
+    )
+    context = " ".join(f"Sentence number {i} of the context." for i in range(200))
+    response = " ".join(f"Statement number {i} of the response." for i in range(300))
+    assert(judge.evaluate(context, response) is None)
+    assert(requests == [])
+
+
+def test_context_fitting_with_a_shorter_completion_is_not_split():
+    judge = Faithfulness("gpt-3.5-turbo", None, backend=ReplayBackend())
+    context = " ".join(f"Sentence number {i} of the context." for i in range(300))
+    # Over the 4096 - 2000 tokens left by the default max_tokens, but fits with a shorter completion
+    assert(count_tokens(context) > 2000)
+    assert(judge.split_context(context, "The context has sentences.") == [context])